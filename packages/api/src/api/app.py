@@ -25,13 +25,18 @@ from api.handlers.report_file import report_file_router
 
 import uvicorn
 from zhitou_agent.agent.agno import create_agent_db
+from zhitou_agent.config import ZhitouAgentConfigLoader
 from zhitou_agent.memory.agent_repo import AgentRepositoryImpl
+from zhitou_agent.memory.session_summary import SessionSummarizer
+from zhitou_agent.tools.http_client import close_http_client, configure_http_client
+from zhitou_agent.tools.search_cache import close_search_cache
 
 from .state import (
   RepositoriesState,
   ServicesState,
   AppState,
 )
+import asyncio
 import json
 
 
@@ -74,8 +79,27 @@ async def lifespan(app: FastAPI):
   app.state.state = AppState(
     config=config, db_manager=db_manager, repositories=repositories, services=services
   )
+  # agent 工具共用一个 HTTP 连接池，进程内只配置一次
+  agent_config = ZhitouAgentConfigLoader().load()
+  configure_http_client(agent_config.tool_http)
+  summary_task = None
+  if agent_config.session_summary.enabled:
+    summarizer = SessionSummarizer(
+      db=create_agent_db(agent_config.database),
+      dashscope=agent_config.dashscpope,
+      config=agent_config.session_summary,
+    )
+    summary_task = asyncio.create_task(summarizer.run_forever())
   yield
   # 清理资源
+  if summary_task is not None:
+    summary_task.cancel()
+    try:
+      await summary_task
+    except asyncio.CancelledError:
+      pass
+  await close_http_client()
+  await close_search_cache()
 
 
 app = FastAPI(lifespan=lifespan)
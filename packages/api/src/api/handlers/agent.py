@@ -1,3 +1,4 @@
+import asyncio
 from typing import Annotated, List, Literal, Optional
 from api.api_models.api_response import APIResponse
 from api.state import AppState, get_app_state_dep
@@ -46,8 +47,9 @@ async def agui_proxy(
       detail="Missing required header: X-Agent-Session-ID",
     )
 
-  agui_app = create_agui_agno_app(
-    session_id=x_agent_session_id, user_id=str(current_user.id)
+  # 创建 agent 时会同步读取会话历史，放到线程中以免阻塞事件循环
+  agui_app = await asyncio.to_thread(
+    create_agui_agno_app, session_id=x_agent_session_id, user_id=str(current_user.id)
   )
 
   request.scope["path"] = "/agui"
@@ -66,8 +68,8 @@ async def status_proxy(
       status_code=status.HTTP_400_BAD_REQUEST,
       detail="Missing required header: X-Agent-Session-ID",
     )
-  agui_app = create_agui_agno_app(
-    session_id=x_agent_session_id, user_id=str(current_user.id)
+  agui_app = await asyncio.to_thread(
+    create_agui_agno_app, session_id=x_agent_session_id, user_id=str(current_user.id)
   )
 
   request.scope["path"] = "/status"
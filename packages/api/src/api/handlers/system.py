@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from api.api_models.api_response import APIResponse
 from fastapi.responses import StreamingResponse
+from zhitou_agent.tools.search_cache import search_cache_stats
 import json
 import time
 import asyncio
@@ -19,6 +20,12 @@ def root():
   return "ok"
 
 
+@system_router.get("/search_cache")
+def get_search_cache_stats():
+  """Hit rates of the tool result caches of this process, by cache name."""
+  return APIResponse(data=search_cache_stats())
+
+
 async def a_fake_json_streamer():
   print("a_fake_json_streamer")
   t0 = time.time()
@@ -5,9 +5,20 @@ from .models import (
   LoggingConfig,
   RedisConfig,
   ChinaAnnualReportSoures,
+  AnnualReportWorkerConfig,
+  IngestionQueueConfig,
+  ReportDiscoveryConfig,
+  ScheduledJobConfig,
+  SchedulerConfig,
   JWTConfig,
   DashsopeConfig,
   BochaConfig,
+  SearchCacheConfig,
+  ToolHttpConfig,
+  ToolOutputConfig,
+  ReportRetrievalConfig,
+  HistoryConfig,
+  SessionSummaryConfig,
   CopilotkitServerConfig,
 )
 
@@ -18,8 +29,19 @@ __all__ = [
   "LoggingConfig",
   "RedisConfig",
   "ChinaAnnualReportSoures",
+  "AnnualReportWorkerConfig",
+  "IngestionQueueConfig",
+  "ReportDiscoveryConfig",
+  "ScheduledJobConfig",
+  "SchedulerConfig",
   "JWTConfig",
   "DashsopeConfig",
   "BochaConfig",
+  "SearchCacheConfig",
+  "ToolHttpConfig",
+  "ToolOutputConfig",
+  "ReportRetrievalConfig",
+  "HistoryConfig",
+  "SessionSummaryConfig",
   "CopilotkitServerConfig",
 ]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -26,10 +26,95 @@ class LoggingConfig(BaseModel):
   )
 
 
+class RAGFlowHttpConfig(BaseModel):
+  connect_timeout: float = Field(default=5.0, gt=0)
+  read_timeout: float = Field(default=120.0, gt=0)
+  pool_connections: int = Field(default=4, ge=1)
+  pool_maxsize: int = Field(default=32, ge=1)
+  max_retries: int = Field(default=3, ge=0)
+  backoff_base: float = Field(default=0.5, gt=0)
+  backoff_max: float = Field(default=30.0, gt=0)
+  breaker_failure_threshold: int = Field(default=10, ge=1)
+  breaker_cooldown: float = Field(default=30.0, gt=0)
+
+
 class RAGFlowConfig(BaseModel):
   url: str
   apikey: str
   kb_name: str
+  http: RAGFlowHttpConfig = Field(default_factory=RAGFlowHttpConfig)
+
+
+class AnnualReportWorkerConfig(BaseModel):
+  pipelined: bool = Field(default=False)
+  parse_window: int = Field(default=10, ge=1)
+  parse_poll_interval: float = Field(default=2.0, gt=0)
+  # 单个文档解析超过该秒数仍未结束时取消并记为失败，None 表示不限制
+  parse_timeout: Optional[float] = Field(default=3600.0, gt=0)
+  upload_batch_bytes: int = Field(default=64 * 1024 * 1024, ge=1)
+  upload_batch_count: int = Field(default=16, ge=1)
+  ledger_path: Optional[str] = Field(default=".worker/annual_report_ledger.sqlite3")
+  dedupe: bool = Field(default=True)
+  hash_workers: int = Field(default=4, ge=1)
+  # 清单边读边传：最多提前 stat/哈希多少个文件
+  hash_lookahead: int = Field(default=256, ge=1)
+  # 上传前在进程池中校验 PDF（文件头、加密、页数），不合格的文件隔离并记录原因
+  pdf_validation: bool = Field(default=True)
+  validation_workers: int = Field(default=2, ge=1)
+  # AIMD 自适应并发：健康时逐步加大上传/解析并发，超时、429、5xx 时成倍回退
+  adaptive_concurrency: bool = Field(default=True)
+  upload_concurrency: int = Field(default=2, ge=1)
+  max_upload_concurrency: int = Field(default=8, ge=1)
+  max_parse_window: int = Field(default=32, ge=1)
+  concurrency_decrease_factor: float = Field(default=0.5, gt=0, lt=1)
+  upload_latency_target: float = Field(default=60.0, gt=0)
+  # 解析失败/取消的文档的定向重试
+  max_parse_attempts: int = Field(default=3, ge=1)
+  parse_retry_backoff: float = Field(default=300.0, ge=0)
+  # 吞吐与延迟指标：metrics_port 开启 Prometheus 抓取端口，metrics_report_path 在运行结束时写 JSON 报告
+  metrics_port: Optional[int] = Field(default=None, ge=0, le=65535)
+  metrics_host: str = Field(default="127.0.0.1")
+  metrics_report_path: Optional[str] = Field(default=None)
+  # 上传和解析结果写回 china_company_announcement_file（RAGFlow 文档 ID、解析状态、chunk/token 数）
+  record_announcement_status: bool = Field(default=True)
+
+
+class IngestionQueueConfig(BaseModel):
+  visibility_timeout: float = Field(default=600.0, gt=0)
+  max_attempts: int = Field(default=5, ge=1)
+  retry_backoff_base: float = Field(default=30.0, gt=0)
+  retry_backoff_max: float = Field(default=3600.0, gt=0)
+  poll_interval: float = Field(default=5.0, gt=0)
+
+
+class ScheduledJobConfig(BaseModel):
+  cron: str
+  enabled: bool = Field(default=True)
+  max_concurrency: int = Field(default=1, ge=1)
+
+
+class ReportDiscoveryConfig(BaseModel):
+  # 扫描 china_annual_report_soures.base_path 生成年报清单，并与上次快照比对输出增量
+  snapshot_path: str = Field(default=".worker/report_discovery_snapshot.json")
+  delta_path: str = Field(default=".worker/report_discovery_delta.json")
+  scan_workers: int = Field(default=8, ge=1)
+  announcement_types: List[str] = Field(default_factory=lambda: ["ANNUAL_REPORT"])
+  # 有增量时重写 listing_file_path，供增量同步任务使用
+  write_listing: bool = Field(default=True)
+  # 删除已从目录中移除的文件对应的 RAGFlow 文档、台账记录和公告状态
+  remove_deleted: bool = Field(default=True)
+
+
+class SchedulerConfig(BaseModel):
+  state_path: str = Field(default=".worker/scheduler.sqlite3")
+  lock_dir: str = Field(default=".worker/locks")
+  max_workers: int = Field(default=4, ge=1)
+  timezone: str = Field(default="Asia/Shanghai")
+  jobs: Dict[str, ScheduledJobConfig] = Field(
+    default_factory=lambda: {
+      "annual_report_sync": ScheduledJobConfig(cron="0 2 * * *"),
+    }
+  )
 
 
 class ChinaAnnualReportSoures(BaseModel):
@@ -51,8 +136,91 @@ class DashsopeConfig(BaseModel):
   openai_compatible_base_url: str
 
 
+class SearchCacheConfig(BaseModel):
+  enabled: bool = Field(default=True)
+  max_entries: int = Field(default=2048, ge=1)
+  # 按请求的 freshness 决定缓存时间（秒），未列出的取值（如日期范围）用 default_ttl_seconds
+  ttl_seconds: Dict[str, float] = Field(
+    default_factory=lambda: {
+      "oneDay": 600.0,
+      "oneWeek": 3600.0,
+      "oneMonth": 6 * 3600.0,
+      "oneYear": 24 * 3600.0,
+      "noLimit": 6 * 3600.0,
+    }
+  )
+  default_ttl_seconds: float = Field(default=3600.0, gt=0)
+  # 设置后多个进程共享 Redis 中的缓存，例如 redis://localhost:6379/0
+  redis_url: Optional[str] = Field(default=None)
+  key_prefix: str = Field(default="zhitou:web_search:")
+
+
+class ToolHttpConfig(BaseModel):
+  connect_timeout: float = Field(default=5.0, gt=0)
+  read_timeout: float = Field(default=30.0, gt=0)
+  max_connections: int = Field(default=100, ge=1)
+  max_keepalive_connections: int = Field(default=20, ge=0)
+  keepalive_expiry: float = Field(default=60.0, ge=0)
+  http2: bool = Field(default=True)
+
+
+class ToolOutputConfig(BaseModel):
+  # 紧凑模式：去掉图片和无用字段、不缩进，并按 token 预算截断 snippet
+  compact: bool = Field(default=True)
+  token_budget: int = Field(default=1500, ge=100)
+  multi_search_token_budget: int = Field(default=3000, ge=100)
+  min_snippet_tokens: int = Field(default=20, ge=0)
+
+
+class HistoryConfig(BaseModel):
+  # 回放历史的 token 预算，从最新的运行往前填充
+  token_budget: int = Field(default=12000, ge=0)
+  min_runs: int = Field(default=1, ge=0)
+  max_runs: int = Field(default=30, ge=1)
+  max_tool_calls_from_history: Optional[int] = Field(default=3, ge=0)
+
+
+class SessionSummaryConfig(BaseModel):
+  # 后台把长会话中较早的运行折叠进 session summary
+  enabled: bool = Field(default=True)
+  model: str = Field(default="qwen-plus")
+  # 始终原样回放的最近运行数；未折叠的运行达到 keep_runs + batch_runs 时触发
+  keep_runs: int = Field(default=4, ge=1)
+  batch_runs: int = Field(default=6, ge=1)
+  max_summary_tokens: int = Field(default=800, ge=64)
+  max_input_tokens: int = Field(default=12000, ge=256)
+  max_message_tokens: int = Field(default=800, ge=32)
+  interval_seconds: float = Field(default=60.0, gt=0)
+  scan_limit: int = Field(default=50, ge=1)
+  timeout_seconds: float = Field(default=60.0, gt=0)
+
+
+class ReportRetrievalConfig(BaseModel):
+  enabled: bool = Field(default=True)
+  page_size: int = Field(default=8, ge=1, le=64)
+  similarity_threshold: float = Field(default=0.2, ge=0, le=1)
+  vector_similarity_weight: float = Field(default=0.3, ge=0, le=1)
+  # 股票代码 × 年份组合的上限，每个组合一次检索请求
+  max_filters: int = Field(default=6, ge=1)
+  max_concurrency: int = Field(default=4, ge=1)
+  token_budget: int = Field(default=2500, ge=100)
+  # 年报内容不会变化，缓存时间可以很长
+  cache: SearchCacheConfig = Field(
+    default_factory=lambda: SearchCacheConfig(
+      max_entries=1024,
+      ttl_seconds={},
+      default_ttl_seconds=24 * 3600.0,
+      key_prefix="zhitou:report_retrieval:",
+    )
+  )
+
+
 class BochaConfig(BaseModel):
   apikey: str
+  # multi_web_search 的并发上限和单次查询数上限
+  max_concurrent_searches: int = Field(default=4, ge=1)
+  max_queries_per_call: int = Field(default=8, ge=1)
+  cache: SearchCacheConfig = Field(default_factory=SearchCacheConfig)
 
 
 class AgentConfig(BaseModel):
@@ -0,0 +1,398 @@
+import asyncio
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+import httpx
+from loguru import logger
+from core.config.models import RAGFlowHttpConfig
+from core.integration.ragflow.client import RAGFlowClient, check_health_data
+from core.integration.ragflow.errors import RAGFlowAPIError, is_document_not_found
+from core.integration.ragflow.status import normalize_run_status
+from core.integration.ragflow.transport import (
+  IDEMPOTENT_METHODS,
+  RETRYABLE_STATUS_CODES,
+)
+
+if TYPE_CHECKING:
+  from core.models.china_mainland_listed_company import (
+    AnnualReportFile,
+    ChinaMainlandListedCompany,
+  )
+
+
+class AsyncRAGFlowClient:
+  """
+  Asyncio client for the RAGFlow HTTP API, built on httpx.
+
+  Offers the same surface as RAGFlowClient (health check, ensure knowledge base,
+  list, upload, update metadata, parse and poll status) but returns the plain
+  JSON dicts of the API instead of SDK objects. Connections are pooled by one
+  `httpx.AsyncClient`, at most `max_concurrency` requests are in flight at a
+  time, and idempotent requests are retried on connection errors, 429 and 5xx
+  with exponential backoff and jitter.
+
+  Usage:
+    async with AsyncRAGFlowClient(api_key, base_url) as client:
+      await client.health_check()
+      dataset = await client.ensure_knowledge_base("zhitou_kb")
+  """
+
+  def __init__(
+    self,
+    api_key: str,
+    base_url: str,
+    http_config: Optional[RAGFlowHttpConfig] = None,
+    max_concurrency: int = 16,
+    client: Optional[httpx.AsyncClient] = None,
+  ):
+    """
+    Args:
+      api_key: API key for authentication
+      base_url: Base URL of the RAGFlow service
+      http_config: Timeouts, retry and pool settings
+      max_concurrency: Maximum number of requests in flight at the same time
+      client: Optional existing httpx.AsyncClient to send requests through, e.g.
+        a process-wide pool; it is not closed by aclose()
+    """
+    self.api_key = api_key
+    self.base_url = base_url.rstrip("/")
+    self.config = http_config or RAGFlowHttpConfig()
+    self._semaphore = asyncio.Semaphore(max_concurrency)
+    self._headers = {"Authorization": f"Bearer {api_key}"}
+    self._owns_client = client is None
+    self._client = client or httpx.AsyncClient(
+      timeout=httpx.Timeout(self.config.read_timeout, connect=self.config.connect_timeout),
+      limits=httpx.Limits(
+        max_connections=self.config.pool_maxsize,
+        max_keepalive_connections=self.config.pool_maxsize,
+      ),
+    )
+
+  async def __aenter__(self) -> "AsyncRAGFlowClient":
+    return self
+
+  async def __aexit__(self, *exc) -> None:
+    await self.aclose()
+
+  async def aclose(self) -> None:
+    if self._owns_client:
+      await self._client.aclose()
+
+  def _backoff(self, attempt: int) -> float:
+    cap = min(self.config.backoff_max, self.config.backoff_base * (2**attempt))
+    return random.uniform(0, cap)
+
+  async def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    method = method.upper()
+    idempotent = method in IDEMPOTENT_METHODS
+    attempt = 0
+    while True:
+      try:
+        async with self._semaphore:
+          response = await self._client.request(
+            method, f"{self.base_url}{url}", headers=self._headers, **kwargs
+          )
+      except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+        # 连接未建立，请求未发出，任何方法都可以安全重试
+        if attempt >= self.config.max_retries:
+          raise
+        delay = self._backoff(attempt)
+        logger.debug(f"RAGFlow {method} {url} failed ({e}), retrying in {delay:.2f}s")
+      except httpx.TransportError as e:
+        if not idempotent or attempt >= self.config.max_retries:
+          raise
+        delay = self._backoff(attempt)
+        logger.debug(f"RAGFlow {method} {url} failed ({e}), retrying in {delay:.2f}s")
+      else:
+        if (
+          response.status_code not in RETRYABLE_STATUS_CODES
+          or not idempotent
+          or attempt >= self.config.max_retries
+        ):
+          return response
+        delay = self._backoff(attempt)
+        logger.debug(
+          f"RAGFlow {method} {url} returned {response.status_code}, retrying in {delay:.2f}s"
+        )
+
+      attempt += 1
+      await asyncio.sleep(delay)
+
+  async def _api(self, method: str, path: str, **kwargs: Any) -> Any:
+    """Calls a /api/v1 endpoint and returns the `data` field of the response."""
+    response = await self._send(method, f"/api/v1{path}", **kwargs)
+    response.raise_for_status()
+    body = response.json()
+    if body.get("code") != 0:
+      raise RAGFlowAPIError(body.get("message", "Unknown RAGFlow error"), body.get("code"))
+    return body.get("data")
+
+  async def health_check(self) -> Dict[str, Any]:
+    """
+    Check the health status of the RAGFlow service.
+
+    Returns:
+      Dict containing the health check response with all services 'ok'
+
+    Raises:
+      httpx.HTTPStatusError: If the request fails
+      RAGFlowHealthCheckError: If any service is not healthy
+    """
+    response = await self._send("GET", "/v1/system/healthz")
+    response.raise_for_status()
+    return check_health_data(response.json())
+
+  async def list_datasets(
+    self, id: Optional[str] = None, name: Optional[str] = None
+  ) -> List[Dict[str, Any]]:
+    params = {"page": 1, "page_size": 100, "id": id, "name": name}
+    return await self._api(
+      "GET", "/datasets", params={k: v for k, v in params.items() if v is not None}
+    )
+
+  async def ensure_knowledge_base(
+    self, kb_name: str, permission: str = "me"
+  ) -> Dict[str, Any]:
+    """
+    Ensures a dataset (knowledge base) exists with the given name, creating it
+    if needed. See RAGFlowClient.ensure_knowledge_base for the permission model.
+
+    Returns:
+      The dataset dict (either existing or newly created)
+
+    Raises:
+      ValueError: If invalid permission value provided
+      RAGFlowAPIError: If the dataset cannot be listed or created
+    """
+    if permission not in ["me", "team"]:
+      raise ValueError(f"Invalid permission '{permission}'. Must be 'me' or 'team'")
+
+    for dataset in await self.list_datasets():
+      if dataset["name"].lower() == kb_name.lower():
+        return dataset
+
+    logger.info(f"Dataset '{kb_name}' doesn't exist, creating with permission='{permission}'")
+    return await self._api(
+      "POST", "/datasets", json={"name": kb_name, "permission": permission}
+    )
+
+  async def list_documents(
+    self,
+    dataset_id: str,
+    id: Optional[str] = None,
+    keywords: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 30,
+  ) -> List[Dict[str, Any]]:
+    params = {"id": id, "keywords": keywords, "page": page, "page_size": page_size}
+    data = await self._api(
+      "GET",
+      f"/datasets/{dataset_id}/documents",
+      params={k: v for k, v in params.items() if v is not None},
+    )
+    return data.get("docs", [])
+
+  async def upload_documents(
+    self, dataset_id: str, documents: List[Tuple[str, bytes]]
+  ) -> List[Dict[str, Any]]:
+    """
+    Uploads documents in a single multipart request.
+
+    Args:
+      dataset_id: ID of the dataset to upload to
+      documents: (display_name, blob) pairs
+
+    Returns:
+      The created document dicts, in upload order
+    """
+    files = [("file", (name, blob)) for name, blob in documents]
+    return await self._api("POST", f"/datasets/{dataset_id}/documents", files=files)
+
+  async def update_document(
+    self, dataset_id: str, document_id: str, update: Dict[str, Any]
+  ) -> Dict[str, Any]:
+    return await self._api(
+      "PUT", f"/datasets/{dataset_id}/documents/{document_id}", json=update
+    )
+
+  async def update_document_metadata(
+    self, dataset_id: str, document_id: str, meta_fields: Dict[str, Any]
+  ) -> Dict[str, Any]:
+    return await self.update_document(
+      dataset_id, document_id, {"meta_fields": meta_fields}
+    )
+
+  async def delete_documents(self, dataset_id: str, ids: List[str]) -> None:
+    await self._api("DELETE", f"/datasets/{dataset_id}/documents", json={"ids": ids})
+
+  async def parse_documents(self, dataset_id: str, document_ids: List[str]) -> None:
+    """Starts parsing the documents without waiting for completion."""
+    await self._api(
+      "POST", f"/datasets/{dataset_id}/chunks", json={"document_ids": document_ids}
+    )
+
+  async def cancel_parse_documents(self, dataset_id: str, document_ids: List[str]) -> None:
+    await self._api(
+      "DELETE", f"/datasets/{dataset_id}/chunks", json={"document_ids": document_ids}
+    )
+
+  async def retrieve(
+    self,
+    dataset_ids: List[str],
+    question: str,
+    metadata_condition: Optional[Dict[str, Any]] = None,
+    page_size: int = 8,
+    similarity_threshold: float = 0.2,
+    vector_similarity_weight: float = 0.3,
+    top_k: int = 1024,
+    keyword: bool = False,
+  ) -> Dict[str, Any]:
+    """
+    Retrieves the chunks most relevant to a question from datasets.
+
+    Args:
+      dataset_ids: Datasets to search
+      question: Query text
+      metadata_condition: Optional document metadata filter, e.g.
+        {"logic": "and", "conditions": [{"name": "stock_code",
+        "comparison_operator": "is", "value": "600018"}]}
+      page_size: Chunks to return
+      similarity_threshold: Minimum similarity of a returned chunk
+      vector_similarity_weight: Weight of vector similarity against keyword similarity
+      top_k: Chunks taking part in the vector similarity computation
+      keyword: Whether to enable keyword extraction
+
+    Returns:
+      Dict with `chunks` (content, document_id, document_keyword, similarity, ...),
+      `doc_aggs` and `total`
+    """
+    body: Dict[str, Any] = {
+      "question": question,
+      "dataset_ids": dataset_ids,
+      "page": 1,
+      "page_size": page_size,
+      "similarity_threshold": similarity_threshold,
+      "vector_similarity_weight": vector_similarity_weight,
+      "top_k": top_k,
+      "keyword": keyword,
+    }
+    if metadata_condition:
+      body["metadata_condition"] = metadata_condition
+    return await self._api("POST", "/retrieval", json=body) or {}
+
+  async def get_document(self, dataset_id: str, document_id: str) -> Optional[Dict[str, Any]]:
+    """Returns the document, or None if it does not exist (any more)."""
+    try:
+      docs = await self.list_documents(dataset_id, id=document_id, page_size=1)
+    except RAGFlowAPIError as e:
+      if is_document_not_found(e):
+        return None
+      raise
+    return docs[0] if docs else None
+
+  async def wait_for_parse(
+    self,
+    dataset_id: str,
+    document_ids: List[str],
+    poll_interval: float = 2.0,
+    timeout: Optional[float] = None,
+  ) -> Dict[str, Dict[str, int | str]]:
+    """
+    Polls the documents concurrently until each one reached a terminal state.
+
+    A document that no longer exists, e.g. because it was deleted, is reported
+    as failed instead of being polled forever.
+
+    Args:
+      dataset_id: The dataset ID containing the documents
+      document_ids: Documents whose parsing was started
+      poll_interval: Seconds between two polls
+      timeout: Seconds after which documents still parsing are reported as
+        failed; wait without limit if None
+
+    Returns:
+      Dictionary mapping document_id to result dict with keys status,
+      chunk_count and token_count (and error for documents that were not found
+      or timed out), same shape as the worker's parse stage
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    results: Dict[str, Dict[str, int | str]] = {}
+    pending = set(document_ids)
+    while pending:
+      ids = list(pending)
+      docs = await asyncio.gather(
+        *(self.get_document(dataset_id, doc_id) for doc_id in ids),
+        return_exceptions=True,
+      )
+      for doc_id, doc in zip(ids, docs):
+        if isinstance(doc, BaseException):
+          continue
+        if doc is None:
+          pending.discard(doc_id)
+          results[doc_id] = {
+            "status": "failed",
+            "chunk_count": 0,
+            "token_count": 0,
+            "error": "document not found",
+          }
+          continue
+        status = normalize_run_status(doc.get("run"), doc.get("progress"))
+        if status is not None:
+          pending.discard(doc_id)
+          results[doc_id] = {
+            "status": status,
+            "chunk_count": doc.get("chunk_count") or 0,
+            "token_count": doc.get("token_count") or 0,
+          }
+      if not pending:
+        break
+      if deadline is not None and loop.time() + poll_interval > deadline:
+        for doc_id in pending:
+          results[doc_id] = {
+            "status": "failed",
+            "chunk_count": 0,
+            "token_count": 0,
+            "error": f"parsing did not finish within {timeout}s",
+          }
+        break
+      await asyncio.sleep(poll_interval)
+    return results
+
+  async def upload_annual_report(
+    self,
+    dataset_id: str,
+    company: "ChinaMainlandListedCompany",
+    report_file: "AnnualReportFile",
+    file_path: str,
+  ) -> Dict[str, Any]:
+    """
+    Uploads a China annual report and attaches its metadata to the returned document.
+
+    Returns:
+      The uploaded document dict, including its meta_fields
+    """
+    display_name = report_file.get_standardized_display_name(
+      company.code, company.short_name
+    )
+    blob = await asyncio.to_thread(Path(file_path).read_bytes)
+    docs = await self.upload_documents(dataset_id, [(display_name, blob)])
+    if not docs:
+      raise RAGFlowAPIError(f"Upload of {display_name} returned no document")
+
+    doc = docs[0]
+    metadata = RAGFlowClient.create_annual_report_metadata(
+      company.code, report_file.year, company.full_name, company.short_name
+    )
+    try:
+      await self.update_document_metadata(dataset_id, doc["id"], metadata)
+    except Exception as e:
+      try:
+        await self.delete_documents(dataset_id, [doc["id"]])
+      except Exception:
+        pass
+      raise RAGFlowAPIError(
+        f"Failed to update metadata for document {display_name}: {e}"
+      ) from e
+    doc["meta_fields"] = metadata
+    return doc
@@ -1,7 +1,11 @@
+from core.config.models import RAGFlowHttpConfig
 from core.integration.ragflow.errors import RAGFlowHealthCheckError
-from typing import Dict, Any, Optional, TYPE_CHECKING
-import requests
-from ragflow_sdk import RAGFlow
+from core.integration.ragflow.transport import PooledRAGFlow, RAGFlowTransport
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
+import os
+import time
 from loguru import logger
 if TYPE_CHECKING:
   from core.models.china_mainland_listed_company import (
@@ -10,18 +14,149 @@ if TYPE_CHECKING:
   )
 
 
+@dataclass(slots=True)
+class AnnualReportUpload:
+  """A single annual report file waiting to be uploaded."""
+
+  company: "ChinaMainlandListedCompany"
+  report_file: "AnnualReportFile"
+  file_path: str
+
+  @property
+  def key(self) -> Tuple[str, str]:
+    """(stock_code, year) of the report."""
+    return (self.company.code, self.report_file.year)
+
+  @property
+  def display_name(self) -> str:
+    return self.report_file.get_standardized_display_name(
+      self.company.code, self.company.short_name
+    )
+
+
+@dataclass(slots=True)
+class BatchUploadResult:
+  """
+  Result of uploading one batch, keyed by the file path of each upload.
+
+  A listing can hold several files for the same (stock_code, year), so results
+  are not keyed by report but by file.
+
+  Besides the documents and errors it carries the request size and the time spent
+  in the upload request and in each metadata update, for throughput metrics.
+  """
+
+  documents: Dict[str, Any] = field(default_factory=dict)
+  errors: Dict[str, Exception] = field(default_factory=dict)
+  uploaded_bytes: int = 0
+  upload_seconds: float = 0.0
+  metadata_seconds: Dict[str, float] = field(default_factory=dict)
+
+
+def group_upload_batches(
+  items: Iterable[AnnualReportUpload],
+  max_batch_bytes: int,
+  max_batch_count: int,
+) -> Iterator[List[AnnualReportUpload]]:
+  """
+  Groups uploads into batches bounded by total file size and file count.
+
+  Works lazily on any iterable, so batches are emitted while the input is still
+  being produced. A single file larger than max_batch_bytes forms its own batch.
+
+  Args:
+    items: Uploads to group
+    max_batch_bytes: Maximum total size in bytes of the files in one batch
+    max_batch_count: Maximum number of files in one batch
+
+  Yields:
+    Lists of uploads, each meant to be sent in a single request
+  """
+  batch: List[AnnualReportUpload] = []
+  batch_bytes = 0
+  for item in items:
+    try:
+      size = os.path.getsize(item.file_path)
+    except OSError:
+      # 文件已不可读，交给上传时按单个文件记录错误
+      size = 0
+    if batch and (
+      batch_bytes + size > max_batch_bytes or len(batch) >= max_batch_count
+    ):
+      yield batch
+      batch, batch_bytes = [], 0
+    batch.append(item)
+    batch_bytes += size
+  if batch:
+    yield batch
+
+
+def check_health_data(data: Dict[str, Any]) -> Dict[str, Any]:
+  """
+  Validates a RAGFlow /v1/system/healthz response body.
+
+  Args:
+    data: Decoded JSON body of the health check response
+
+  Returns:
+    The same data if all services are 'ok'
+
+  Raises:
+    RAGFlowHealthCheckError: If any service is missing or not healthy
+  """
+  required_services = ["db", "redis", "doc_engine", "storage", "status"]
+
+  missing_keys = [key for key in required_services if key not in data]
+  if missing_keys:
+    raise RAGFlowHealthCheckError(
+      f"Missing required health check keys: {missing_keys}"
+    )
+
+  unhealthy_services = {
+    key: data[key] for key in required_services if data[key] != "ok"
+  }
+
+  if unhealthy_services:
+    error_details = data.get("_meta", {})
+    raise RAGFlowHealthCheckError(
+      f"Unhealthy services: {unhealthy_services}. Details: {error_details}"
+    )
+
+  return data
+
+
 class RAGFlowClient:
-  def __init__(self, api_key: str, base_url: str):
+  def __init__(
+    self,
+    api_key: str,
+    base_url: str,
+    metadata_update_workers: int = 8,
+    http_config: Optional[RAGFlowHttpConfig] = None,
+  ):
     """
     Initialize RAGFlowClient with API credentials.
 
+    All traffic, including the SDK calls, goes through one pooled, retrying
+    RAGFlowTransport.
+
     Args:
       api_key: API key for authentication
       base_url: Base URL of the RAGFlow service
+      metadata_update_workers: Maximum concurrent metadata updates per upload batch
+      http_config: Timeouts, retry, pool and circuit breaker settings
     """
     self.api_key = api_key
     self.base_url = base_url.rstrip("/")
-    self.rag_flow = RAGFlow(api_key=api_key, base_url=base_url)
+    self.transport = RAGFlowTransport(http_config)
+    self.rag_flow = PooledRAGFlow(
+      api_key=api_key, base_url=self.base_url, transport=self.transport
+    )
+    self.metadata_update_workers = metadata_update_workers
+    self._datasets: Dict[str, Any] = {}
+
+  def close(self) -> None:
+    """Closes the pooled connections."""
+    self.transport.close()
 
   def health_check(self) -> Dict[str, Any]:
     """
@@ -35,30 +170,10 @@ class RAGFlowClient:
       RAGFlowHealthCheckError: If any service is not healthy
     """
     url = f"{self.base_url}/v1/system/healthz"
-    response = requests.get(url)
+    response = self.transport.request("GET", url)
     response.raise_for_status()
 
-    data = response.json()
-
-    required_services = ["db", "redis", "doc_engine", "storage", "status"]
-
-    missing_keys = [key for key in required_services if key not in data]
-    if missing_keys:
-      raise RAGFlowHealthCheckError(
-        f"Missing required health check keys: {missing_keys}"
-      )
-
-    unhealthy_services = {
-      key: data[key] for key in required_services if data[key] != "ok"
-    }
-
-    if unhealthy_services:
-      error_details = data.get("_meta", {})
-      raise RAGFlowHealthCheckError(
-        f"Unhealthy services: {unhealthy_services}. Details: {error_details}"
-      )
-
-    return data
+    return check_health_data(response.json())
 
   def ensure_knowledge_base(self, kb_name: str, permission: str = "me"):
     """
@@ -163,6 +278,64 @@ class RAGFlowClient:
       "short_name": short_name,
     }
 
+  def get_dataset(self, dataset_id: str):
+    """
+    Returns the DataSet object with the given ID, cached after the first lookup.
+
+    Args:
+      dataset_id: ID of the dataset
+
+    Returns:
+      The DataSet object
+
+    Raises:
+      ValueError: If the dataset does not exist or is not accessible
+    """
+    dataset = self._datasets.get(dataset_id)
+    if dataset is None:
+      datasets = self.rag_flow.list_datasets(id=dataset_id)
+      if not datasets or len(datasets) == 0:
+        raise ValueError(f"Dataset with ID {dataset_id} not found")
+      dataset = datasets[0]
+      self._datasets[dataset_id] = dataset
+    return dataset
+
+  def find_annual_report(
+    self, dataset_id: str, stock_code: str, year: str
+  ) -> Optional[Any]:
+    """
+    Finds the document of a China annual report in the knowledge base.
+
+    Documents are matched by their stock_code and year metadata; a document
+    without metadata is matched by its name prefix
+    ({year}_{stock_code}_{short_name}_年度报告.pdf).
+
+    Args:
+      dataset_id: ID of the dataset to search
+      stock_code: Stock code to search for
+      year: Year to search for
+
+    Returns:
+      The Document, or None if there is none
+
+    Raises:
+      Exception: If the listing request fails
+    """
+    dataset = self.get_dataset(dataset_id)
+    documents = dataset.list_documents(keywords=stock_code, page=1, page_size=100)
+    prefix = f"{year}_{stock_code}_"
+    for doc in documents:
+      meta_fields = getattr(doc, "meta_fields", None) or {}
+      if not isinstance(meta_fields, dict):
+        # SDK 把嵌套的 dict 包装成 Base 对象
+        meta_fields = meta_fields.to_json()
+      if "stock_code" in meta_fields or "year" in meta_fields:
+        if str(meta_fields.get("stock_code")) == stock_code and str(meta_fields.get("year")) == year:
+          return doc
+      elif doc.name.startswith(prefix):
+        return doc
+    return None
+
   def check_annual_report_exists(
     self, dataset_id: str, stock_code: str, year: str
   ) -> bool:
@@ -178,23 +351,7 @@ class RAGFlowClient:
       True if a document with the given stock_code and year exists, False otherwise
     """
     try:
-      dataset = self.rag_flow.list_datasets(id=dataset_id)
-      if not dataset or len(dataset) == 0:
-        return False
-
-      dataset = dataset[0]
-
-      documents = dataset.list_documents(
-        keywords=f"{stock_code}_{year}", page=1, page_size=100
-      )
-
-      for doc in documents:
-        # Note: meta_fields might not be directly accessible via the SDK
-        # This is a best-effort check based on document name
-        if stock_code in doc.name and year in doc.name:
-          return True
-
-      return False
+      return self.find_annual_report(dataset_id, stock_code, year) is not None
     except Exception:
       return False
 
@@ -227,38 +384,127 @@ class RAGFlowClient:
     ):
       return None
 
-    datasets = self.rag_flow.list_datasets(id=dataset_id)
-    if not datasets or len(datasets) == 0:
-      raise ValueError(f"Dataset with ID {dataset_id} not found")
+    upload = AnnualReportUpload(
+      company=company, report_file=report_file, file_path=file_path
+    )
+    result = self.upload_annual_report_batch(dataset_id, [upload])
+    if upload.file_path in result.errors:
+      raise result.errors[upload.file_path]
+    return result.documents.get(upload.file_path)
+
+  def upload_annual_report_batch(
+    self, dataset_id: str, uploads: List[AnnualReportUpload]
+  ) -> BatchUploadResult:
+    """
+    Uploads several China annual reports in a single request and attaches metadata.
 
-    dataset = datasets[0]
+    Metadata is attached directly to the Document objects returned by the upload,
+    so no extra lookup is needed. The returned documents are mapped back to
+    their uploads by display name, in upload order when several uploads share
+    a name, falling back to the upload order when RAGFlow renames a document.
 
-    metadata = self.create_annual_report_metadata(
-      company.code, report_file.year, company.full_name, company.short_name
-    )
+    Args:
+      dataset_id: ID of the dataset to upload to
+      uploads: Reports to upload, typically produced by group_upload_batches
 
-    display_name = report_file.get_standardized_display_name(
-      company.code, company.short_name
-    )
+    Returns:
+      BatchUploadResult with the uploaded Document objects and per-report errors,
+      including files that could not be read
+
+    Raises:
+      Exception: If the upload request itself fails
+    """
+    result = BatchUploadResult()
+    if not uploads:
+      return result
+
+    dataset = self.get_dataset(dataset_id)
 
-    with open(file_path, "rb") as f:
-      blob = f.read()
+    document_list = []
+    readable: List[AnnualReportUpload] = []
+    for upload in uploads:
+      try:
+        with open(upload.file_path, "rb") as f:
+          document_list.append({"display_name": upload.display_name, "blob": f.read()})
+      except OSError as e:
+        result.errors[upload.file_path] = e
+        continue
+      readable.append(upload)
+    if not readable:
+      return result
+    uploads = readable
+    result.uploaded_bytes = sum(len(item["blob"]) for item in document_list)
+
+    started = time.perf_counter()
+    documents = dataset.upload_documents(document_list)
+    result.upload_seconds = time.perf_counter() - started
+
+    # 同名文档按上传顺序依次对应，避免同一 (stock_code, year) 的两个文件相互覆盖
+    docs_by_name: Dict[str, List[Any]] = {}
+    for doc in documents:
+      docs_by_name.setdefault(doc.name, []).append(doc)
+    uploaded: List[Tuple[AnnualReportUpload, Any]] = []
+    for index, upload in enumerate(uploads):
+      same_name = docs_by_name.get(upload.display_name)
+      doc = same_name.pop(0) if same_name else None
+      if doc is None and len(documents) == len(uploads):
+        doc = documents[index]
+      if doc is None:
+        result.errors[upload.file_path] = Exception(
+          f"Uploaded document {upload.display_name} not found in upload response"
+        )
+        continue
+      uploaded.append((upload, doc))
+
+    self._attach_annual_report_metadata(dataset, uploaded, result)
+    return result
 
-    dataset.upload_documents([{"display_name": display_name, "blob": blob}])
+  def _attach_annual_report_metadata(
+    self,
+    dataset,
+    uploaded: List[Tuple[AnnualReportUpload, Any]],
+    result: BatchUploadResult,
+  ) -> None:
+    """
+    Attaches annual report metadata to freshly uploaded documents.
 
-    documents = dataset.list_documents(keywords=display_name, page=1, page_size=1)
-    if documents and len(documents) > 0:
-      doc = documents[0]
+    RAGFlow has no bulk metadata endpoint, so the per-document updates of a batch
+    are issued concurrently. A document whose metadata cannot be attached is
+    deleted again, so it is not left in the knowledge base without metadata.
+    """
+
+    def attach(upload: AnnualReportUpload, doc):
+      started = time.perf_counter()
       try:
+        metadata = self.create_annual_report_metadata(
+          upload.company.code,
+          upload.report_file.year,
+          upload.company.full_name,
+          upload.company.short_name,
+        )
         doc.update({"meta_fields": metadata})
         return doc
-      except Exception as e:
+      finally:
+        result.metadata_seconds[upload.file_path] = time.perf_counter() - started
+
+    if not uploaded:
+      return
+
+    with ThreadPoolExecutor(
+      max_workers=min(len(uploaded), self.metadata_update_workers)
+    ) as executor:
+      futures = {
+        executor.submit(attach, upload, doc): (upload, doc) for upload, doc in uploaded
+      }
+      for future in as_completed(futures):
+        upload, doc = futures[future]
         try:
-          dataset.delete_documents(ids=[doc.id])
-        except Exception:
-          pass
-        raise Exception(
-          f"Failed to update metadata for document {display_name}: {e}"
-        ) from e
-
-    return None
+          result.documents[upload.file_path] = future.result()
+        except Exception as e:
+          try:
+            dataset.delete_documents(ids=[doc.id])
+          except Exception:
+            pass
+          result.errors[upload.file_path] = Exception(
+            f"Failed to update metadata for document {upload.display_name}: {e}"
+          )
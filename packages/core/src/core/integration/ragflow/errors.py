@@ -2,3 +2,25 @@ class RAGFlowHealthCheckError(Exception):
   """Raised when RAGFlow health check indicates unhealthy services."""
 
   pass
+
+
+class RAGFlowAPIError(Exception):
+  """Raised when a RAGFlow HTTP API call returns a non-zero code."""
+
+  def __init__(self, message: str, code: int | None = None):
+    super().__init__(message)
+    self.code = code
+
+
+def is_document_not_found(error: BaseException) -> bool:
+  """
+  True if a RAGFlow error means the document does not exist (any more).
+
+  RAGFlow does not answer a lookup of an unknown or deleted document id with an
+  empty list but with a DATA_ERROR ("You don't own the document ..."), an update
+  with "The dataset doesn't own the document" and a delete with "Documents not
+  found: [...]". The SDK raises these as a plain Exception and
+  AsyncRAGFlowClient as RAGFlowAPIError.
+  """
+  message = str(error)
+  return "own the document" in message or "Documents not found" in message
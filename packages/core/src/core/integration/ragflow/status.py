@@ -0,0 +1,27 @@
+from typing import Any, Optional
+
+# RAGFlow document.run 的终态
+_TERMINAL_RUN_STATUS = {
+  "DONE": "success",
+  "FAIL": "failed",
+  "CANCEL": "cancelled",
+}
+
+
+def normalize_run_status(run: Any, progress: Any = None) -> Optional[str]:
+  """
+  Map a RAGFlow document run state to the worker's result status.
+
+  Args:
+    run: The `run` field of a RAGFlow Document (e.g. "RUNNING", "DONE")
+    progress: The `progress` field of the Document, used as a fallback
+
+  Returns:
+    "success", "failed" or "cancelled" if the document reached a terminal state,
+    otherwise None
+  """
+  if isinstance(run, str) and run.upper() in _TERMINAL_RUN_STATUS:
+    return _TERMINAL_RUN_STATUS[run.upper()]
+  if float(progress or 0.0) >= 1.0:
+    return "success"
+  return None
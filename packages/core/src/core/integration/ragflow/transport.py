@@ -0,0 +1,198 @@
+import random
+import threading
+import time
+from typing import Any, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+from ragflow_sdk import RAGFlow
+from core.config.models import RAGFlowHttpConfig
+
+# 可安全重试的 HTTP 方法（幂等）
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitBreaker:
+  """
+  Consecutive-failure circuit breaker shared by all RAGFlow requests.
+
+  After `failure_threshold` transient failures in a row the circuit opens and
+  every request waits until `cooldown` seconds have passed, instead of failing
+  straight away. The first request after the cooldown is let through as a probe:
+  a success closes the circuit, another failure opens it again.
+  """
+
+  def __init__(self, failure_threshold: int, cooldown: float):
+    self.failure_threshold = failure_threshold
+    self.cooldown = cooldown
+    self._lock = threading.Lock()
+    self._failures = 0
+    self._opened_at: Optional[float] = None
+
+  @property
+  def is_open(self) -> bool:
+    with self._lock:
+      return self._opened_at is not None
+
+  def wait_until_closed(self) -> None:
+    """Blocks while the circuit is open, pausing the caller until the cooldown ends."""
+    while True:
+      with self._lock:
+        if self._opened_at is None:
+          return
+        remaining = self._opened_at + self.cooldown - time.monotonic()
+        if remaining <= 0:
+          # 半开：放行一个探测请求，其余请求继续等待一个冷却周期
+          self._opened_at = time.monotonic()
+          return
+      logger.warning(f"RAGFlow circuit open, pausing requests for {remaining:.1f}s")
+      time.sleep(remaining)
+
+  def record_success(self) -> None:
+    with self._lock:
+      if self._opened_at is not None:
+        logger.info("RAGFlow circuit closed, resuming requests")
+      self._failures = 0
+      self._opened_at = None
+
+  def record_failure(self) -> None:
+    with self._lock:
+      self._failures += 1
+      if self._failures >= self.failure_threshold and self._opened_at is None:
+        logger.warning(
+          f"RAGFlow circuit opened after {self._failures} consecutive failures"
+        )
+        self._opened_at = time.monotonic()
+
+
+class RAGFlowTransport:
+  """
+  Shared HTTP transport for all RAGFlow traffic.
+
+  Uses one keep-alive `requests.Session` with a sized connection pool, applies
+  connect/read timeouts to every request, retries idempotent requests on
+  connection errors, 429 and 5xx with exponential backoff and full jitter, and
+  pauses all callers through a CircuitBreaker while RAGFlow keeps failing.
+  Non-idempotent requests (POST) are only retried when the connection could not
+  be established, since the request was never sent.
+  """
+
+  def __init__(self, config: Optional[RAGFlowHttpConfig] = None):
+    self.config = config or RAGFlowHttpConfig()
+    self.session = requests.Session()
+    adapter = HTTPAdapter(
+      pool_connections=self.config.pool_connections,
+      pool_maxsize=self.config.pool_maxsize,
+    )
+    self.session.mount("http://", adapter)
+    self.session.mount("https://", adapter)
+    self.breaker = CircuitBreaker(
+      failure_threshold=self.config.breaker_failure_threshold,
+      cooldown=self.config.breaker_cooldown,
+    )
+
+  def close(self) -> None:
+    self.session.close()
+
+  def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+    if response is not None and response.status_code == 429:
+      retry_after = response.headers.get("Retry-After")
+      if retry_after and retry_after.isdigit():
+        return min(float(retry_after), self.config.backoff_max)
+    cap = min(self.config.backoff_max, self.config.backoff_base * (2**attempt))
+    return random.uniform(0, cap)
+
+  def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+    """
+    Sends a request through the pooled session with timeouts, retries and the
+    circuit breaker.
+
+    Args:
+      method: HTTP method
+      url: Absolute URL
+      **kwargs: Passed through to `requests.Session.request`
+
+    Returns:
+      The last response, which may still carry a retryable status code once the
+      retries are exhausted
+
+    Raises:
+      requests.exceptions.RequestException: If the request still fails after
+        the retries
+    """
+    method = method.upper()
+    idempotent = method in IDEMPOTENT_METHODS
+    kwargs.setdefault(
+      "timeout", (self.config.connect_timeout, self.config.read_timeout)
+    )
+
+    attempt = 0
+    while True:
+      self.breaker.wait_until_closed()
+      try:
+        response = self.session.request(method, url, **kwargs)
+      except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        self.breaker.record_failure()
+        retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+        if not retryable or attempt >= self.config.max_retries:
+          raise
+        delay = self._backoff(attempt)
+        logger.debug(f"RAGFlow {method} {url} failed ({e}), retrying in {delay:.2f}s")
+      else:
+        if response.status_code not in RETRYABLE_STATUS_CODES:
+          self.breaker.record_success()
+          return response
+        self.breaker.record_failure()
+        if not idempotent or attempt >= self.config.max_retries:
+          return response
+        delay = self._backoff(attempt, response)
+        logger.debug(
+          f"RAGFlow {method} {url} returned {response.status_code}, retrying in {delay:.2f}s"
+        )
+
+      attempt += 1
+      time.sleep(delay)
+
+
+class PooledRAGFlow(RAGFlow):
+  """RAGFlow SDK client that sends every SDK call through a RAGFlowTransport."""
+
+  def __init__(self, api_key, base_url, transport: RAGFlowTransport, version="v1"):
+    super().__init__(api_key=api_key, base_url=base_url, version=version)
+    self.transport = transport
+
+  def post(self, path, json=None, stream=False, files=None):
+    return self.transport.request(
+      "POST",
+      self.api_url + path,
+      json=json,
+      headers=self.authorization_header,
+      stream=stream,
+      files=files,
+    )
+
+  def get(self, path, params=None, json=None):
+    return self.transport.request(
+      "GET",
+      self.api_url + path,
+      params=params,
+      headers=self.authorization_header,
+      json=json,
+    )
+
+  def delete(self, path, json):
+    return self.transport.request(
+      "DELETE", self.api_url + path, json=json, headers=self.authorization_header
+    )
+
+  def put(self, path, json):
+    return self.transport.request(
+      "PUT", self.api_url + path, json=json, headers=self.authorization_header
+    )
+
+  def patch(self, path, json):
+    # 新版 SDK 的 Document.update 走 PATCH
+    return self.transport.request(
+      "PATCH", self.api_url + path, json=json, headers=self.authorization_header
+    )
@@ -1,8 +1,76 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Any, Iterator, List
 import json
+import re
 from pathlib import Path
 
+_WHITESPACE = re.compile(r"\s*")
+
+
+def iter_json_array(file_path: str | Path, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+  """
+  Yields the elements of a top-level JSON array one at a time while the file is read.
+
+  The file is read in chunks and each element is decoded with
+  json.JSONDecoder.raw_decode as soon as it is complete, so memory holds one
+  chunk plus the element being decoded rather than the whole document.
+
+  Args:
+    file_path: Path to a JSON file whose top-level value is an array
+    chunk_size: Number of characters read at a time
+
+  Raises:
+    json.JSONDecodeError: If the file is not a valid JSON array
+  """
+  decoder = json.JSONDecoder()
+  with Path(file_path).open("r", encoding="utf-8") as f:
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def skip_whitespace() -> str:
+      """Advances past whitespace, reading more if needed; returns the next character or "" at EOF."""
+      nonlocal buffer, pos, eof
+      while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos < len(buffer) or eof:
+          return buffer[pos:pos + 1]
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    if skip_whitespace() != "[":
+      raise json.JSONDecodeError("Expecting '['", buffer, pos)
+    pos += 1
+    if skip_whitespace() == "]":
+      return
+
+    while True:
+      skip_whitespace()
+      try:
+        value, end = decoder.raw_decode(buffer, pos)
+        # 数字等标量可能在块边界被截断，看到其后的分隔符才算完整
+        following = _WHITESPACE.match(buffer, end).end()
+        complete = eof or buffer[following:following + 1] in (",", "]")
+      except json.JSONDecodeError:
+        if eof:
+          raise
+        complete = False
+      if not complete:
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+        continue
+      pos = end
+      yield value
+
+      separator = skip_whitespace()
+      if separator == "]":
+        return
+      if separator != ",":
+        raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+      pos += 1
+
 
 class ChinaMainlandListedCompany(BaseModel):
   """Represents a China mainland listed company."""
@@ -61,6 +129,28 @@ class CompanyAnnualReports(BaseModel):
     """Short name of the company (backward compatibility)."""
     return self.company.short_name
 
+  @classmethod
+  def from_listing_entry(cls, company_data: dict) -> "CompanyAnnualReports":
+    """
+    Create CompanyAnnualReports from one entry of the listing JSON.
+
+    Args:
+      company_data: Company data dictionary with flat structure
+                    (code, full_name, short_name, files at same level)
+
+    Returns:
+      CompanyAnnualReports instance
+    """
+    # Transform flat structure to nested structure
+    return cls(
+      company={
+        "code": company_data["code"],
+        "full_name": company_data["full_name"],
+        "short_name": company_data["short_name"]
+      },
+      files=company_data["files"]
+    )
+
   def get_file_display_name(self, file: AnnualReportFile) -> str:
     """
     Get the standardized display name for a file belonging to this company.
@@ -92,19 +182,7 @@ class ChinaAnnualReportList(BaseModel):
     Returns:
       ChinaAnnualReportList instance
     """
-    companies = []
-    for company_data in data:
-      # Transform flat structure to nested structure
-      transformed_data = {
-        "company": {
-          "code": company_data["code"],
-          "full_name": company_data["full_name"],
-          "short_name": company_data["short_name"]
-        },
-        "files": company_data["files"]
-      }
-      companies.append(CompanyAnnualReports(**transformed_data))
-
+    companies = [CompanyAnnualReports.from_listing_entry(company_data) for company_data in data]
     return cls(companies=companies, base_path=base_path)
 
   @classmethod
@@ -127,3 +205,31 @@ class ChinaAnnualReportList(BaseModel):
     with path.open("r", encoding="utf-8") as f:
       data = json.load(f)
     return cls.from_list(data, base_path=base_path)
+
+
+class StreamingAnnualReportList:
+  """
+  Annual report listing read lazily from a JSON file.
+
+  Has the same `companies` and `base_path` attributes as ChinaAnnualReportList,
+  but `companies` is an iterator that parses the file incrementally and
+  validates one company at a time, so consumers can start working on the first
+  entries while the rest of the file is still being read. Every access to
+  `companies` reads the file again from the start.
+
+  Usage:
+    report_list = StreamingAnnualReportList("listing.json", base_path="/data/reports")
+    for company in report_list.companies:
+      ...
+  """
+
+  def __init__(self, file_path: str | Path, base_path: str | None = None):
+    self.file_path = Path(file_path)
+    self.base_path = base_path
+    if not self.file_path.is_file():
+      raise FileNotFoundError(f"Listing file not found: {self.file_path}")
+
+  @property
+  def companies(self) -> Iterator[CompanyAnnualReports]:
+    for company_data in iter_json_array(self.file_path):
+      yield CompanyAnnualReports.from_listing_entry(company_data)
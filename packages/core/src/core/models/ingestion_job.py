@@ -0,0 +1,51 @@
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional
+
+
+class IngestionJobKind(str, Enum):
+    """入库任务类型"""
+    UPLOAD = "upload"  # 上传年报并写入元数据
+    PARSE = "parse"  # 解析已上传的文档
+
+
+class IngestionJobStatus(str, Enum):
+    """入库任务状态"""
+    PENDING = "pending"  # 等待领取（含退避中的重试）
+    RUNNING = "running"  # 已被 worker 领取
+    SUCCEEDED = "succeeded"  # 已完成
+    DEAD = "dead"  # 重试次数耗尽，进入死信，需人工处理后 requeue
+
+
+class IngestionJobModel(BaseModel):
+    """入库任务领域模型"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    kind: str
+    dedupe_key: str
+    payload: dict[str, Any]
+    result: Optional[dict[str, Any]] = None
+    status: str
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    run_after: datetime
+    locked_by: Optional[str] = None
+    locked_until: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_orm_model(cls, orm_model) -> "IngestionJobModel":
+        """从 ORM 模型转换"""
+        return cls.model_validate(orm_model)
+
+
+class EnqueueIngestionJobDto(BaseModel):
+    """入队任务 DTO"""
+    kind: IngestionJobKind
+    dedupe_key: str = Field(..., max_length=300, description="去重键，已存在时不重复入队")
+    payload: dict[str, Any] = Field(default_factory=dict)
+    max_attempts: int = Field(5, ge=1)
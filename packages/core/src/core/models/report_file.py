@@ -1,5 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from typing import Optional
+from datetime import datetime
 from enum import Enum
 
 
@@ -25,6 +26,14 @@ class AnnouncementType(str, Enum):
         }
         return type_names.get(announcement_type, f"{year}年报告")
 
+class AnnouncementParseStatus(str, Enum):
+    """公告文件在 RAGFlow 中的解析状态，未上传时为空"""
+    UNPARSED = "unparsed"  # 已上传，尚未解析完成
+    SUCCESS = "success"  # 解析成功，可检索
+    FAILED = "failed"  # 解析失败
+    CANCELLED = "cancelled"  # 解析被取消
+
+
 class AnnouncementFileModel(BaseModel):
     """年报文件领域模型"""
     model_config = ConfigDict(from_attributes=True)
@@ -34,7 +43,17 @@ class AnnouncementFileModel(BaseModel):
     report_year: int
     announcement_type: str
     file_path: Optional[str] = None
-    
+    ragflow_document_id: Optional[str] = None
+    parse_status: Optional[str] = None
+    chunk_count: Optional[int] = None
+    token_count: Optional[int] = None
+    uploaded_at: Optional[datetime] = None
+    parsed_at: Optional[datetime] = None
+
+    @property
+    def is_searchable(self) -> bool:
+        """文档已在 RAGFlow 中解析成功，可被检索"""
+        return self.parse_status == AnnouncementParseStatus.SUCCESS
 
     @classmethod
     def from_orm_model(cls, orm_model) -> "AnnouncementFileModel":
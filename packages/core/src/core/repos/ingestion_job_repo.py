@@ -0,0 +1,359 @@
+from datetime import timedelta
+from typing import Any, Optional, Protocol
+from sqlalchemy import and_, case, exists, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased
+
+from core.models.ingestion_job import (
+    EnqueueIngestionJobDto,
+    IngestionJobModel,
+    IngestionJobStatus,
+)
+from database.orm_models.ingestion_job import IngestionJobOrm
+
+# 去重键的唯一索引只覆盖未结束的任务
+_ACTIVE_STATUSES = (IngestionJobStatus.PENDING.value, IngestionJobStatus.RUNNING.value)
+
+
+class IngestionJobRepository(Protocol):
+    """入库任务队列仓储接口"""
+
+    def enqueue(
+        self,
+        session: Session,
+        dtos: list[EnqueueIngestionJobDto],
+    ) -> int:
+        """批量入队，去重键已有未结束任务的被忽略，返回实际入队数量"""
+        ...
+
+    def claim(
+        self,
+        session: Session,
+        kind: str,
+        worker_id: str,
+        limit: int,
+        visibility_timeout: float,
+    ) -> list[IngestionJobModel]:
+        """领取最多 limit 个可执行任务（FOR UPDATE SKIP LOCKED）"""
+        ...
+
+    def extend(
+        self,
+        session: Session,
+        job_ids: list[int],
+        worker_id: str,
+        visibility_timeout: float,
+    ) -> int:
+        """延长本 worker 持有任务的可见性超时，返回仍由本 worker 持有的任务数"""
+        ...
+
+    def complete(
+        self,
+        session: Session,
+        job_id: int,
+        worker_id: str,
+        result: Optional[dict[str, Any]] = None,
+    ) -> bool:
+        """标记任务成功"""
+        ...
+
+    def fail(
+        self,
+        session: Session,
+        job_id: int,
+        worker_id: str,
+        error: str,
+        retry_delay: float,
+    ) -> Optional[str]:
+        """标记任务失败：次数未耗尽时延迟重试，否则进入死信，返回新状态"""
+        ...
+
+    def release(self, session: Session, job_ids: list[int], worker_id: str) -> int:
+        """归还本 worker 持有的任务（如优雅退出时），不计入重试次数"""
+        ...
+
+    def count_by_status(
+        self,
+        session: Session,
+        kind: Optional[str] = None,
+    ) -> dict[str, int]:
+        """按状态统计任务数"""
+        ...
+
+    def requeue_dead(self, session: Session, kind: Optional[str] = None) -> int:
+        """将死信任务重置为待执行，返回数量"""
+        ...
+
+
+class IngestionJobRepositoryImpl:
+    """
+    入库任务队列仓储实现（PostgreSQL）
+
+    领取任务用 `SELECT ... FOR UPDATE SKIP LOCKED`，任意多个 worker 进程并发领取时
+    互不阻塞，也不会领到同一个任务。被领取的任务带有可见性超时 locked_until，
+    worker 失联后任务超时自动重新可见；所有时间都取数据库的 now()，不依赖各节点时钟。
+    """
+
+    def enqueue(
+        self,
+        session: Session,
+        dtos: list[EnqueueIngestionJobDto],
+    ) -> int:
+        """
+        批量入队，去重键已有未结束（pending/running）任务的被忽略，返回实际入队数量
+
+        已成功或进入死信的任务不参与去重，同一份报告可以再次入队。
+        """
+        if not dtos:
+            return 0
+        stmt = (
+            insert(IngestionJobOrm)
+            .values([
+                {
+                    "kind": dto.kind.value,
+                    "dedupe_key": dto.dedupe_key,
+                    "payload": dto.payload,
+                    "status": IngestionJobStatus.PENDING.value,
+                    "attempts": 0,
+                    "max_attempts": dto.max_attempts,
+                }
+                for dto in dtos
+            ])
+            .on_conflict_do_nothing(
+                index_elements=[IngestionJobOrm.dedupe_key],
+                index_where=text("status IN ('pending', 'running')"),
+            )
+            .returning(IngestionJobOrm.id)
+        )
+        return len(session.execute(stmt).all())
+
+    def claim(
+        self,
+        session: Session,
+        kind: str,
+        worker_id: str,
+        limit: int,
+        visibility_timeout: float,
+    ) -> list[IngestionJobModel]:
+        """
+        领取最多 limit 个可执行任务
+
+        可执行：pending 且已过 run_after，或 running 但可见性超时已过（worker 失联）。
+        超时任务若已用完重试次数，先转入死信而不再领取。
+        """
+        now = func.now()
+        expired = and_(
+            IngestionJobOrm.status == IngestionJobStatus.RUNNING.value,
+            IngestionJobOrm.locked_until < now,
+        )
+
+        # 失联且次数耗尽的任务进入死信
+        session.execute(
+            update(IngestionJobOrm)
+            .where(
+                IngestionJobOrm.kind == kind,
+                expired,
+                IngestionJobOrm.attempts >= IngestionJobOrm.max_attempts,
+            )
+            .values(
+                status=IngestionJobStatus.DEAD.value,
+                locked_by=None,
+                locked_until=None,
+                last_error=func.coalesce(IngestionJobOrm.last_error, "visibility timeout expired"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        claimable = (
+            select(IngestionJobOrm.id)
+            .where(
+                IngestionJobOrm.kind == kind,
+                or_(
+                    and_(
+                        IngestionJobOrm.status == IngestionJobStatus.PENDING.value,
+                        IngestionJobOrm.run_after <= now,
+                    ),
+                    expired,
+                ),
+            )
+            .order_by(IngestionJobOrm.run_after, IngestionJobOrm.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(IngestionJobOrm)
+            .where(IngestionJobOrm.id.in_(claimable))
+            .values(
+                status=IngestionJobStatus.RUNNING.value,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=visibility_timeout),
+                attempts=IngestionJobOrm.attempts + 1,
+            )
+            .returning(IngestionJobOrm)
+            .execution_options(synchronize_session=False)
+        )
+        jobs = session.execute(stmt).scalars().all()
+        return sorted(
+            (IngestionJobModel.from_orm_model(job) for job in jobs),
+            key=lambda job: (job.run_after, job.id),
+        )
+
+    def extend(
+        self,
+        session: Session,
+        job_ids: list[int],
+        worker_id: str,
+        visibility_timeout: float,
+    ) -> int:
+        """延长本 worker 持有任务的可见性超时，返回仍由本 worker 持有的任务数"""
+        if not job_ids:
+            return 0
+        result = session.execute(
+            update(IngestionJobOrm)
+            .where(
+                IngestionJobOrm.id.in_(job_ids),
+                IngestionJobOrm.status == IngestionJobStatus.RUNNING.value,
+                IngestionJobOrm.locked_by == worker_id,
+            )
+            .values(locked_until=func.now() + timedelta(seconds=visibility_timeout))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def complete(
+        self,
+        session: Session,
+        job_id: int,
+        worker_id: str,
+        result: Optional[dict[str, Any]] = None,
+    ) -> bool:
+        """
+        标记任务成功
+
+        Returns:
+            False 表示任务已不由本 worker 持有（超时后被其他 worker 领取），结果未写入
+        """
+        updated = session.execute(
+            update(IngestionJobOrm)
+            .where(
+                IngestionJobOrm.id == job_id,
+                IngestionJobOrm.status == IngestionJobStatus.RUNNING.value,
+                IngestionJobOrm.locked_by == worker_id,
+            )
+            .values(
+                status=IngestionJobStatus.SUCCEEDED.value,
+                result=result,
+                last_error=None,
+                locked_by=None,
+                locked_until=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return updated.rowcount > 0
+
+    def fail(
+        self,
+        session: Session,
+        job_id: int,
+        worker_id: str,
+        error: str,
+        retry_delay: float,
+    ) -> Optional[str]:
+        """
+        标记任务失败：次数未耗尽时在 retry_delay 秒后重试，否则进入死信
+
+        Returns:
+            任务的新状态，任务已不由本 worker 持有时返回 None
+        """
+        row = session.execute(
+            update(IngestionJobOrm)
+            .where(
+                IngestionJobOrm.id == job_id,
+                IngestionJobOrm.status == IngestionJobStatus.RUNNING.value,
+                IngestionJobOrm.locked_by == worker_id,
+            )
+            .values(
+                status=case(
+                    (
+                        IngestionJobOrm.attempts >= IngestionJobOrm.max_attempts,
+                        IngestionJobStatus.DEAD.value,
+                    ),
+                    else_=IngestionJobStatus.PENDING.value,
+                ),
+                last_error=error,
+                run_after=func.now() + timedelta(seconds=retry_delay),
+                locked_by=None,
+                locked_until=None,
+            )
+            .returning(IngestionJobOrm.status)
+            .execution_options(synchronize_session=False)
+        ).first()
+        return None if row is None else row[0]
+
+    def release(self, session: Session, job_ids: list[int], worker_id: str) -> int:
+        """归还本 worker 持有的任务（如优雅退出时），不计入重试次数"""
+        if not job_ids:
+            return 0
+        result = session.execute(
+            update(IngestionJobOrm)
+            .where(
+                IngestionJobOrm.id.in_(job_ids),
+                IngestionJobOrm.status == IngestionJobStatus.RUNNING.value,
+                IngestionJobOrm.locked_by == worker_id,
+            )
+            .values(
+                status=IngestionJobStatus.PENDING.value,
+                attempts=func.greatest(IngestionJobOrm.attempts - 1, 0),
+                run_after=func.now(),
+                locked_by=None,
+                locked_until=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def count_by_status(
+        self,
+        session: Session,
+        kind: Optional[str] = None,
+    ) -> dict[str, int]:
+        """按状态统计任务数"""
+        stmt = select(IngestionJobOrm.status, func.count()).group_by(IngestionJobOrm.status)
+        if kind:
+            stmt = stmt.where(IngestionJobOrm.kind == kind)
+        return {status: count for status, count in session.execute(stmt).all()}
+
+    def requeue_dead(self, session: Session, kind: Optional[str] = None) -> int:
+        """
+        将死信任务重置为待执行（重试次数清零），返回数量
+
+        同一去重键只重置最新的死信任务，去重键已有未结束任务的不重置。
+        """
+        active = aliased(IngestionJobOrm)
+        latest_dead = (
+            select(func.max(IngestionJobOrm.id))
+            .where(IngestionJobOrm.status == IngestionJobStatus.DEAD.value)
+            .group_by(IngestionJobOrm.dedupe_key)
+        )
+        stmt = (
+            update(IngestionJobOrm)
+            .where(
+                IngestionJobOrm.status == IngestionJobStatus.DEAD.value,
+                IngestionJobOrm.id.in_(latest_dead),
+                ~exists().where(
+                    active.dedupe_key == IngestionJobOrm.dedupe_key,
+                    active.status.in_(_ACTIVE_STATUSES),
+                ),
+            )
+            .values(
+                status=IngestionJobStatus.PENDING.value,
+                attempts=0,
+                run_after=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if kind:
+            stmt = stmt.where(IngestionJobOrm.kind == kind)
+        return session.execute(stmt).rowcount
+
@@ -1,12 +1,13 @@
 from typing import Optional, Protocol, List
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, select, or_, func
+from sqlalchemy import and_, select, or_, func, update
 
 from core.models.report_file import (
     AnnouncementFileModel, 
     CreateAnnouncementFileDto, 
     UpdateAnnouncementFileDto,
-    AnnouncementType
+    AnnouncementType,
+    AnnouncementParseStatus
 )
 from database.orm_models.report_file import ChinaCompanyAnnouncementFileOrm
 from database.orm_models.company import ChinaCompanyOrm
@@ -24,6 +25,11 @@ class AnnouncementFileWithCompany:
         self.report_year = announcement.report_year
         self.announcement_type = announcement.announcement_type
         self.file_path = announcement.file_path
+        self.ragflow_document_id = announcement.ragflow_document_id
+        self.parse_status = announcement.parse_status
+        self.chunk_count = announcement.chunk_count
+        self.token_count = announcement.token_count
+        self.parsed_at = announcement.parsed_at
         self.display_name = AnnouncementType.get_display_name(
             announcement.announcement_type, 
             announcement.report_year
@@ -176,6 +182,60 @@ class AnnouncementFileRepository(Protocol):
     ) -> bool:
         """检查指定企业、年度和类型的公告是否存在"""
         ...
+    
+    def get_by_ragflow_document_id(
+        self,
+        session: Session,
+        document_id: str
+    ) -> Optional[AnnouncementFileModel]:
+        """根据 RAGFlow 文档 ID 查找公告文件"""
+        ...
+    
+    def record_ragflow_upload(
+        self,
+        session: Session,
+        company_code: str,
+        report_year: int,
+        announcement_type: str,
+        document_id: str
+    ) -> Optional[AnnouncementFileModel]:
+        """记录公告文件已上传到 RAGFlow,重置解析状态;公告不存在时返回 None"""
+        ...
+    
+    def record_ragflow_parse(
+        self,
+        session: Session,
+        document_id: str,
+        parse_status: str,
+        chunk_count: int = 0,
+        token_count: int = 0
+    ) -> bool:
+        """记录 RAGFlow 文档的解析结果,返回是否找到对应公告"""
+        ...
+    
+    def clear_ragflow_document(self, session: Session, document_id: str) -> bool:
+        """清除 RAGFlow 文档已被删除的公告的上传与解析状态,返回是否找到对应公告"""
+        ...
+    
+    def list_by_parse_status(
+        self,
+        session: Session,
+        parse_status: Optional[str],
+        report_year: Optional[int] = None,
+        announcement_type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[AnnouncementFileWithCompany]:
+        """按解析状态查询公告文件,parse_status 为 None 时查询尚未上传的公告"""
+        ...
+    
+    def count_by_parse_status(
+        self,
+        session: Session,
+        report_year: Optional[int] = None,
+        announcement_type: Optional[str] = None,
+    ) -> dict[str, int]:
+        """统计各解析状态的公告数量,尚未上传的计入 not_uploaded"""
+        ...
 
 
 class AnnouncementFileRepositoryImpl:
@@ -536,4 +596,142 @@ class AnnouncementFileRepositoryImpl:
             company_id, 
             report_year,
             announcement_type
-        ) is not None
\ No newline at end of file
+        ) is not None
+    
+    def get_by_ragflow_document_id(
+        self,
+        session: Session,
+        document_id: str
+    ) -> Optional[AnnouncementFileModel]:
+        """根据 RAGFlow 文档 ID 查找公告文件"""
+        return self._orm_repo.get_one_by(
+            session,
+            ChinaCompanyAnnouncementFileOrm.ragflow_document_id == document_id
+        )
+    
+    def record_ragflow_upload(
+        self,
+        session: Session,
+        company_code: str,
+        report_year: int,
+        announcement_type: str,
+        document_id: str
+    ) -> Optional[AnnouncementFileModel]:
+        """记录公告文件已上传到 RAGFlow,重置解析状态;公告不存在时返回 None"""
+        stmt = (
+            select(ChinaCompanyAnnouncementFileOrm)
+            .join(ChinaCompanyOrm)
+            .where(
+                and_(
+                    ChinaCompanyOrm.company_code == company_code,
+                    ChinaCompanyAnnouncementFileOrm.report_year == report_year,
+                    ChinaCompanyAnnouncementFileOrm.announcement_type == announcement_type
+                )
+            )
+        )
+        announcement_orm = session.execute(stmt).scalar_one_or_none()
+        if announcement_orm is None:
+            return None
+        
+        announcement_orm.ragflow_document_id = document_id
+        announcement_orm.parse_status = AnnouncementParseStatus.UNPARSED.value
+        announcement_orm.chunk_count = None
+        announcement_orm.token_count = None
+        announcement_orm.uploaded_at = func.now()
+        announcement_orm.parsed_at = None
+        session.flush()
+        session.refresh(announcement_orm)
+        return AnnouncementFileModel.from_orm_model(announcement_orm)
+    
+    def record_ragflow_parse(
+        self,
+        session: Session,
+        document_id: str,
+        parse_status: str,
+        chunk_count: int = 0,
+        token_count: int = 0
+    ) -> bool:
+        """记录 RAGFlow 文档的解析结果,返回是否找到对应公告"""
+        stmt = (
+            update(ChinaCompanyAnnouncementFileOrm)
+            .where(ChinaCompanyAnnouncementFileOrm.ragflow_document_id == document_id)
+            .values(
+                parse_status=parse_status,
+                chunk_count=chunk_count,
+                token_count=token_count,
+                parsed_at=func.now()
+            )
+        )
+        return session.execute(stmt).rowcount > 0
+    
+    def clear_ragflow_document(self, session: Session, document_id: str) -> bool:
+        """清除 RAGFlow 文档已被删除的公告的上传与解析状态,返回是否找到对应公告"""
+        stmt = (
+            update(ChinaCompanyAnnouncementFileOrm)
+            .where(ChinaCompanyAnnouncementFileOrm.ragflow_document_id == document_id)
+            .values(
+                ragflow_document_id=None,
+                parse_status=None,
+                chunk_count=None,
+                token_count=None,
+                uploaded_at=None,
+                parsed_at=None
+            )
+        )
+        return session.execute(stmt).rowcount > 0
+    
+    def list_by_parse_status(
+        self,
+        session: Session,
+        parse_status: Optional[str],
+        report_year: Optional[int] = None,
+        announcement_type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[AnnouncementFileWithCompany]:
+        """按解析状态查询公告文件,parse_status 为 None 时查询尚未上传的公告"""
+        stmt = (
+            select(ChinaCompanyAnnouncementFileOrm)
+            .join(ChinaCompanyOrm)
+            .options(joinedload(ChinaCompanyAnnouncementFileOrm.company))
+        )
+        
+        if parse_status is None:
+            stmt = stmt.where(ChinaCompanyAnnouncementFileOrm.parse_status.is_(None))
+        else:
+            stmt = stmt.where(ChinaCompanyAnnouncementFileOrm.parse_status == parse_status)
+        if report_year:
+            stmt = stmt.where(ChinaCompanyAnnouncementFileOrm.report_year == report_year)
+        if announcement_type:
+            stmt = stmt.where(ChinaCompanyAnnouncementFileOrm.announcement_type == announcement_type)
+
+        stmt = stmt.order_by(
+            ChinaCompanyAnnouncementFileOrm.report_year.desc(),
+            ChinaCompanyOrm.company_code
+        )
+        if limit:
+            stmt = stmt.limit(limit)
+        
+        results = session.execute(stmt).scalars().all()
+        return [AnnouncementFileWithCompany(announcement) for announcement in results]
+    
+    def count_by_parse_status(
+        self,
+        session: Session,
+        report_year: Optional[int] = None,
+        announcement_type: Optional[str] = None,
+    ) -> dict[str, int]:
+        """统计各解析状态的公告数量,尚未上传的计入 not_uploaded"""
+        stmt = select(
+            ChinaCompanyAnnouncementFileOrm.parse_status,
+            func.count()
+        ).group_by(ChinaCompanyAnnouncementFileOrm.parse_status)
+        
+        if report_year:
+            stmt = stmt.where(ChinaCompanyAnnouncementFileOrm.report_year == report_year)
+        if announcement_type:
+            stmt = stmt.where(ChinaCompanyAnnouncementFileOrm.announcement_type == announcement_type)
+        
+        return {
+            parse_status or "not_uploaded": count
+            for parse_status, count in session.execute(stmt).all()
+        }
@@ -0,0 +1,6 @@
+"""
+Test doubles for tests, benchmarks and local development.
+
+Nothing in here is imported by production code; it only depends on the
+standard library so it stays usable without a running RAGFlow.
+"""
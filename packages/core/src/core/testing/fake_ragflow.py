@@ -0,0 +1,576 @@
+"""
+In-process stand-in for the RAGFlow HTTP API, for tests and benchmarks only.
+
+Implements the endpoints used by the ragflow SDK, RAGFlowClient and
+AsyncRAGFlowClient against in-memory state, so clients can be exercised
+without a live RAGFlow. Errors use the codes and messages of RAGFlow 0.22:
+
+  GET    /v1/system/healthz
+  GET    /api/v1/datasets
+  POST   /api/v1/datasets
+  GET    /api/v1/datasets/{dataset_id}/documents
+  POST   /api/v1/datasets/{dataset_id}/documents        (multipart upload)
+  PUT    /api/v1/datasets/{dataset_id}/documents/{id}   (metadata update)
+  PATCH  /api/v1/datasets/{dataset_id}/documents/{id}   (metadata update, newer SDKs)
+  DELETE /api/v1/datasets/{dataset_id}/documents
+  POST   /api/v1/datasets/{dataset_id}/chunks           (start parsing)
+  DELETE /api/v1/datasets/{dataset_id}/chunks           (cancel parsing)
+  POST   /api/v1/retrieval                              (one chunk per parsed document)
+
+Lookups of unknown documents fail with "You don't own the document {id}.",
+updates with "The dataset doesn't own the document.", deletes and parse starts
+name the unknown ids in "Documents not found: [...]" after handling the known
+ones, and stopping a parse that has not started or has finished fails with
+"Can't stop parsing document with progress at 0 or 1".
+
+Parsing completes `parse_seconds` after it was started. Network and server
+latency can be simulated per kind of request with SimulatedLatency, so that
+ingestion behaviour under a slow RAGFlow can be reproduced locally.
+
+Usage:
+  with FakeRAGFlowServer() as server:
+    client = RAGFlowClient(api_key=server.api_key, base_url=server.base_url)
+
+or from the command line:
+  python -m core.testing.fake_ragflow --port 9380 --upload-latency 0.2
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+_DOCUMENTS_PATH = re.compile(r"^/api/v1/datasets/([^/]+)/documents$")
+_DOCUMENT_PATH = re.compile(r"^/api/v1/datasets/([^/]+)/documents/([^/]+)$")
+_CHUNKS_PATH = re.compile(r"^/api/v1/datasets/([^/]+)/chunks$")
+
+
+@dataclass
+class SimulatedLatency:
+  """
+  Delays in seconds the fake server adds before handling a request.
+
+  `request` applies to every request; the per-kind delays are added on top of
+  it. A uniformly distributed random delay of up to `jitter` is added as well.
+  """
+
+  request: float = 0.0
+  upload: float = 0.0
+  upload_per_mb: float = 0.0  # 按上传体积计的延迟，每 MiB
+  metadata: float = 0.0
+  listing: float = 0.0  # 数据集和文档列表
+  parse: float = 0.0  # 开始或取消解析
+  retrieval: float = 0.0
+  jitter: float = 0.0
+
+  def delay(self, method: str, path: str, content_length: int = 0) -> float:
+    seconds = self.request
+    if _DOCUMENTS_PATH.match(path):
+      if method == "POST":
+        seconds += self.upload + self.upload_per_mb * content_length / (1024 * 1024)
+      elif method == "GET":
+        seconds += self.listing
+    elif _DOCUMENT_PATH.match(path) and method in ("PUT", "PATCH"):
+      seconds += self.metadata
+    elif _CHUNKS_PATH.match(path):
+      seconds += self.parse
+    elif path == "/api/v1/datasets" and method == "GET":
+      seconds += self.listing
+    elif path == "/api/v1/retrieval":
+      seconds += self.retrieval
+    if self.jitter > 0:
+      seconds += random.uniform(0, self.jitter)
+    return seconds
+
+
+class FakeRAGFlowState:
+  """In-memory datasets and documents of the fake server."""
+
+  def __init__(self, parse_seconds: float = 0.5, tokens_per_kb: int = 200):
+    self.parse_seconds = parse_seconds
+    self.tokens_per_kb = tokens_per_kb
+    self.lock = threading.Lock()
+    self.datasets: Dict[str, Dict[str, Any]] = {}
+    self.documents: Dict[str, Dict[str, Any]] = {}
+    self._parse_started: Dict[str, float] = {}
+
+  def create_dataset(self, name: str, permission: str = "me") -> Dict[str, Any]:
+    dataset = {
+      "id": uuid.uuid4().hex,
+      "name": name,
+      "permission": permission,
+      "chunk_method": "naive",
+      "document_count": 0,
+      "chunk_count": 0,
+    }
+    self.datasets[dataset["id"]] = dataset
+    return dataset
+
+  def add_document(self, dataset_id: str, name: str, blob: bytes) -> Dict[str, Any]:
+    doc = {
+      "id": uuid.uuid4().hex,
+      "dataset_id": dataset_id,
+      "name": name,
+      "size": len(blob),
+      "type": "pdf",
+      "run": "UNSTART",
+      "progress": 0.0,
+      "chunk_count": 0,
+      "token_count": 0,
+      "meta_fields": {},
+      "create_time": int(time.time() * 1000),
+    }
+    self.documents[doc["id"]] = doc
+    self.datasets[dataset_id]["document_count"] += 1
+    return doc
+
+  def refresh(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Advances a RUNNING document to DONE once its parse time has elapsed."""
+    started = self._parse_started.get(doc["id"])
+    if doc["run"] == "RUNNING" and started is not None:
+      elapsed = time.monotonic() - started
+      if elapsed >= self.parse_seconds:
+        doc["run"] = "DONE"
+        doc["progress"] = 1.0
+        doc["token_count"] = max(1, doc["size"] * self.tokens_per_kb // 1024)
+        doc["chunk_count"] = max(1, doc["token_count"] // 512)
+      else:
+        doc["progress"] = round(elapsed / self.parse_seconds, 2)
+    return doc
+
+  def start_parse(self, dataset_id: str, document_ids: List[str]) -> List[str]:
+    """Starts parsing the documents of the dataset. Returns the ids that were not found."""
+    not_found = []
+    for doc_id in document_ids:
+      doc = self.documents.get(doc_id)
+      if doc is None or doc["dataset_id"] != dataset_id:
+        not_found.append(doc_id)
+        continue
+      doc.update(run="RUNNING", progress=0.0, chunk_count=0, token_count=0)
+      self._parse_started[doc_id] = time.monotonic()
+    return not_found
+
+  def cancel_parse(self, dataset_id: str, document_ids: List[str]) -> Optional[str]:
+    """
+    Stops parsing the documents in order, like RAGFlow up to the first document
+    that cannot be stopped. Returns the error message for that document, if any.
+    """
+    for doc_id in document_ids:
+      doc = self.documents.get(doc_id)
+      if doc is None or doc["dataset_id"] != dataset_id:
+        return f"You don't own the document {doc_id}."
+      self.refresh(doc)
+      if doc["progress"] == 0 or doc["progress"] >= 1:
+        return "Can't stop parsing document with progress at 0 or 1"
+      doc["run"] = "CANCEL"
+      self._parse_started.pop(doc_id, None)
+    return None
+
+  def delete_documents(self, dataset_id: str, document_ids: List[str]) -> List[str]:
+    """Deletes the documents of the dataset. Returns the ids that were not found."""
+    not_found = []
+    for doc_id in document_ids:
+      doc = self.documents.get(doc_id)
+      if doc is None or doc["dataset_id"] != dataset_id:
+        not_found.append(doc_id)
+        continue
+      del self.documents[doc_id]
+      self._parse_started.pop(doc_id, None)
+      self.datasets[dataset_id]["document_count"] -= 1
+    return not_found
+
+  def retrieve(
+    self,
+    dataset_ids: List[str],
+    question: str,
+    metadata_condition: Optional[Dict[str, Any]] = None,
+    page_size: int = 30,
+  ) -> Dict[str, Any]:
+    """
+    Returns one synthetic chunk per parsed document matching the metadata
+    condition. Only the `is`/`=` and `is not`/`≠` operators are understood.
+    """
+    conditions = (metadata_condition or {}).get("conditions") or []
+    match_all = (metadata_condition or {}).get("logic", "and") == "and"
+
+    def matches(doc: Dict[str, Any]) -> bool:
+      results = []
+      for condition in conditions:
+        value = str(doc["meta_fields"].get(condition["name"], ""))
+        equal = value == str(condition.get("value", ""))
+        results.append(equal if condition.get("comparison_operator") in ("is", "=") else not equal)
+      return not results or (all(results) if match_all else any(results))
+
+    docs = [
+      self.refresh(doc)
+      for doc in self.documents.values()
+      if doc["dataset_id"] in dataset_ids
+    ]
+    docs = [doc for doc in docs if doc["run"] == "DONE" and matches(doc)]
+    chunks = [
+      {
+        "id": uuid.uuid5(uuid.NAMESPACE_OID, doc["id"] + question).hex,
+        "content": f"{doc['name']}: {question}",
+        "document_id": doc["id"],
+        "document_keyword": doc["name"],
+        "dataset_id": doc["dataset_id"],
+        "similarity": round(1.0 / (rank + 1), 4),
+      }
+      for rank, doc in enumerate(docs)
+    ]
+    return {
+      "chunks": chunks[:page_size],
+      "doc_aggs": [
+        {"doc_id": chunk["document_id"], "doc_name": chunk["document_keyword"], "count": 1}
+        for chunk in chunks[:page_size]
+      ],
+      "total": len(chunks),
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+  server: "_FakeHTTPServer"
+  protocol_version = "HTTP/1.1"
+
+  def log_message(self, format, *args):
+    pass
+
+  # --- helpers -------------------------------------------------------------
+
+  @property
+  def state(self) -> FakeRAGFlowState:
+    return self.server.state
+
+  def _send_json(self, body: Any, status: int = 200) -> None:
+    payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(payload)))
+    self.end_headers()
+    self.wfile.write(payload)
+
+  def _ok(self, data: Any = None) -> None:
+    self._send_json({"code": 0, "data": data})
+
+  def _error(self, message: str, code: int = 102) -> None:
+    self._send_json({"code": code, "message": message})
+
+  def _read_body(self) -> bytes:
+    length = int(self.headers.get("Content-Length") or 0)
+    return self.rfile.read(length) if length else b""
+
+  def _read_json(self) -> Dict[str, Any]:
+    body = self._read_body()
+    return json.loads(body) if body else {}
+
+  def _read_files(self) -> List[Tuple[str, bytes]]:
+    body = self._read_body()
+    message = BytesParser(policy=HTTP).parsebytes(
+      f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+    )
+    return [
+      (part.get_filename(), part.get_payload(decode=True))
+      for part in message.iter_parts()
+      if part.get_filename()
+    ]
+
+  def _query(self) -> Dict[str, str]:
+    return {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+
+  def _authorized(self) -> bool:
+    if self.headers.get("Authorization") != f"Bearer {self.server.api_key}":
+      self._error("Authentication error: API key is invalid!", code=109)
+      return False
+    return True
+
+  def _dataset(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+    dataset = self.state.datasets.get(dataset_id)
+    if dataset is None:
+      self._error(f"You don't own the dataset {dataset_id}.")
+    return dataset
+
+  def _dispatch(self, method: str) -> None:
+    path = urlparse(self.path).path
+    self.server.before_request(method, path, int(self.headers.get("Content-Length") or 0))
+    if path == "/v1/system/healthz":
+      self._send_json({k: "ok" for k in ["db", "redis", "doc_engine", "storage", "status"]})
+      return
+    if not self._authorized():
+      return
+    handler = getattr(self, f"_{method.lower()}", None)
+    with self.state.lock:
+      if handler is None or not handler(path):
+        self._send_json({"code": 100, "message": f"Not found: {method} {path}"}, 404)
+
+  # --- routes --------------------------------------------------------------
+
+  def _get(self, path: str) -> bool:
+    query = self._query()
+    if path == "/api/v1/datasets":
+      datasets = [
+        d
+        for d in self.state.datasets.values()
+        if ("id" not in query or d["id"] == query["id"])
+        and ("name" not in query or d["name"].lower() == query["name"].lower())
+      ]
+      self._ok(datasets)
+      return True
+
+    if match := _DOCUMENTS_PATH.match(path):
+      if self._dataset(match.group(1)) is None:
+        return True
+      # 与 RAGFlow 相同，按不存在的 id 或名称查询时返回错误而不是空列表
+      for field in ("id", "name"):
+        if field in query and not any(
+          d["dataset_id"] == match.group(1) and d[field] == query[field]
+          for d in self.state.documents.values()
+        ):
+          self._error(f"You don't own the document {query[field]}.")
+          return True
+      docs = [
+        self.state.refresh(d)
+        for d in self.state.documents.values()
+        if d["dataset_id"] == match.group(1)
+        and ("id" not in query or d["id"] == query["id"])
+        and ("name" not in query or d["name"] == query["name"])
+        and ("keywords" not in query or query["keywords"] in d["name"])
+      ]
+      docs.sort(key=lambda d: d["create_time"], reverse=True)
+      page = int(query.get("page", 1))
+      page_size = int(query.get("page_size", 30))
+      self._ok({"docs": docs[(page - 1) * page_size : page * page_size], "total": len(docs)})
+      return True
+    return False
+
+  def _post(self, path: str) -> bool:
+    if path == "/api/v1/retrieval":
+      body = self._read_json()
+      self._ok(
+        self.state.retrieve(
+          body.get("dataset_ids") or [],
+          body.get("question", ""),
+          body.get("metadata_condition"),
+          int(body.get("page_size", 30)),
+        )
+      )
+      return True
+
+    if path == "/api/v1/datasets":
+      body = self._read_json()
+      if any(d["name"].lower() == body["name"].lower() for d in self.state.datasets.values()):
+        self._error(f"Dataset name '{body['name']}' already exists")
+      else:
+        self._ok(self.state.create_dataset(body["name"], body.get("permission", "me")))
+      return True
+
+    if match := _DOCUMENTS_PATH.match(path):
+      if self._dataset(match.group(1)) is None:
+        return True
+      docs = [
+        self.state.add_document(match.group(1), name, blob)
+        for name, blob in self._read_files()
+      ]
+      self._ok(docs)
+      return True
+
+    if match := _CHUNKS_PATH.match(path):
+      if self._dataset(match.group(1)) is None:
+        return True
+      not_found = self.state.start_parse(match.group(1), self._read_json().get("document_ids", []))
+      if not_found:
+        self._error(f"Documents not found: {not_found}")
+      else:
+        self._ok()
+      return True
+    return False
+
+  def _put(self, path: str) -> bool:
+    if match := _DOCUMENT_PATH.match(path):
+      doc = self.state.documents.get(match.group(2))
+      if doc is None or doc["dataset_id"] != match.group(1):
+        self._error("The dataset doesn't own the document.")
+        return True
+      body = self._read_json()
+      if "meta_fields" in body:
+        doc["meta_fields"] = body["meta_fields"]
+      if "name" in body:
+        doc["name"] = body["name"]
+      self._ok(doc)
+      return True
+    return False
+
+  # ragflow-sdk 的 Document.update 通过 PATCH 发送，语义与 PUT 相同
+  _patch = _put
+
+  def _delete(self, path: str) -> bool:
+    if match := _DOCUMENTS_PATH.match(path):
+      if self._dataset(match.group(1)) is None:
+        return True
+      not_found = self.state.delete_documents(match.group(1), self._read_json().get("ids") or [])
+      if not_found:
+        self._error(f"Documents not found: {not_found}")
+      else:
+        self._ok()
+      return True
+
+    if match := _CHUNKS_PATH.match(path):
+      if self._dataset(match.group(1)) is None:
+        return True
+      error = self.state.cancel_parse(match.group(1), self._read_json().get("document_ids", []))
+      if error:
+        self._error(error)
+      else:
+        self._ok()
+      return True
+    return False
+
+  def do_GET(self):
+    self._dispatch("GET")
+
+  def do_POST(self):
+    self._dispatch("POST")
+
+  def do_PUT(self):
+    self._dispatch("PUT")
+
+  def do_PATCH(self):
+    self._dispatch("PATCH")
+
+  def do_DELETE(self):
+    self._dispatch("DELETE")
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+  daemon_threads = True
+
+  def __init__(
+    self,
+    address,
+    state: FakeRAGFlowState,
+    api_key: str,
+    latency: Optional[SimulatedLatency] = None,
+  ):
+    super().__init__(address, _Handler)
+    self.state = state
+    self.api_key = api_key
+    self.latency = latency
+
+  def before_request(self, method: str, path: str, content_length: int = 0) -> None:
+    """Hook called before every request is handled, outside the state lock."""
+    if self.latency is not None:
+      seconds = self.latency.delay(method, path, content_length)
+      if seconds > 0:
+        time.sleep(seconds)
+
+
+class FakeRAGFlowServer:
+  """Runs the fake RAGFlow API on a background thread."""
+
+  def __init__(
+    self,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    api_key: str = "ragflow-fake-key",
+    parse_seconds: float = 0.5,
+    latency: Optional[SimulatedLatency] = None,
+  ):
+    """
+    Args:
+      host: Interface to bind
+      port: Port to bind, 0 picks a free port
+      api_key: API key the server accepts
+      parse_seconds: Time a document takes to parse
+      latency: Optional delays added to requests
+    """
+    self.api_key = api_key
+    self.state = FakeRAGFlowState(parse_seconds=parse_seconds)
+    self.latency = latency
+    self._server = _FakeHTTPServer((host, port), self.state, api_key, latency)
+    self._thread: Optional[threading.Thread] = None
+
+  @property
+  def base_url(self) -> str:
+    host, port = self._server.server_address[:2]
+    return f"http://{host}:{port}"
+
+  def start(self) -> "FakeRAGFlowServer":
+    self._thread = threading.Thread(
+      target=self._server.serve_forever, name="fake-ragflow", daemon=True
+    )
+    self._thread.start()
+    return self
+
+  def stop(self) -> None:
+    self._server.shutdown()
+    self._server.server_close()
+
+  def __enter__(self) -> "FakeRAGFlowServer":
+    return self.start()
+
+  def __exit__(self, *exc) -> None:
+    self.stop()
+
+
+def add_latency_arguments(parser: argparse.ArgumentParser) -> None:
+  """Adds the simulated latency options read by latency_from_args."""
+  group = parser.add_argument_group("simulated latency (seconds)")
+  group.add_argument("--request-latency", type=float, default=0.0, help="Added to every request")
+  group.add_argument("--upload-latency", type=float, default=0.0, help="Added to every upload")
+  group.add_argument("--upload-latency-per-mb", type=float, default=0.0, help="Added per MiB uploaded")
+  group.add_argument("--metadata-latency", type=float, default=0.0, help="Added to metadata updates")
+  group.add_argument("--list-latency", type=float, default=0.0, help="Added to list requests")
+  group.add_argument("--parse-latency", type=float, default=0.0, help="Added to parse start/cancel")
+  group.add_argument("--retrieval-latency", type=float, default=0.0, help="Added to retrieval requests")
+  group.add_argument("--jitter", type=float, default=0.0, help="Random extra delay of up to this much")
+
+
+def latency_from_args(args: argparse.Namespace) -> Optional[SimulatedLatency]:
+  """Builds SimulatedLatency from the --*-latency and --jitter options, None if all are zero."""
+  latency = SimulatedLatency(
+    request=args.request_latency,
+    upload=args.upload_latency,
+    upload_per_mb=args.upload_latency_per_mb,
+    metadata=args.metadata_latency,
+    listing=args.list_latency,
+    parse=args.parse_latency,
+    retrieval=args.retrieval_latency,
+    jitter=args.jitter,
+  )
+  return latency if any(vars(latency).values()) else None
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description="Run a local stand-in for the RAGFlow API")
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=9380)
+  parser.add_argument("--api-key", default="ragflow-fake-key")
+  parser.add_argument("--parse-seconds", type=float, default=0.5)
+  add_latency_arguments(parser)
+  args = parser.parse_args()
+
+  server = FakeRAGFlowServer(
+    host=args.host,
+    port=args.port,
+    api_key=args.api_key,
+    parse_seconds=args.parse_seconds,
+    latency=latency_from_args(args),
+  )
+  print(f"Fake RAGFlow listening on {server.base_url} (api key: {server.api_key})")
+  server.start()
+  try:
+    server._thread.join()
+  except KeyboardInterrupt:
+    server.stop()
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,143 @@
+"""Drives the ragflow SDK (through RAGFlowClient) and AsyncRAGFlowClient against the in-process RAGFlow stand-in."""
+
+import asyncio
+from pathlib import Path
+import pytest
+from core.integration.ragflow.async_client import AsyncRAGFlowClient
+from core.integration.ragflow.client import AnnualReportUpload, RAGFlowClient
+from core.integration.ragflow.errors import is_document_not_found
+from core.testing.fake_ragflow import FakeRAGFlowServer
+from core.models.china_mainland_listed_company import (
+  AnnualReportFile,
+  ChinaMainlandListedCompany,
+)
+
+
+@pytest.fixture
+def server():
+  with FakeRAGFlowServer(parse_seconds=0.05) as server:
+    yield server
+
+
+@pytest.fixture
+def client(server):
+  client = RAGFlowClient(api_key=server.api_key, base_url=server.base_url)
+  yield client
+  client.close()
+
+
+def _upload(tmp_path: Path, code: str, year: str, name: str) -> AnnualReportUpload:
+  file_path = tmp_path / name
+  file_path.write_bytes(b"%PDF-1.4\n" + name.encode() + b"\n%%EOF")
+  return AnnualReportUpload(
+    company=ChinaMainlandListedCompany(code=code, full_name=f"公司{code}", short_name=f"简称{code}"),
+    report_file=AnnualReportFile(year=year, file_path=name),
+    file_path=str(file_path),
+  )
+
+
+def test_health_check_and_knowledge_base(client):
+  assert client.health_check()["status"] == "ok"
+  kb = client.ensure_knowledge_base("zhitou_kb")
+  assert client.ensure_knowledge_base("zhitou_kb").id == kb.id
+
+
+def test_batch_upload_attaches_metadata(server, client, tmp_path):
+  kb = client.ensure_knowledge_base("zhitou_kb")
+  uploads = [
+    _upload(tmp_path, "600000", "2023", "a.pdf"),
+    _upload(tmp_path, "600519", "2023", "b.pdf"),
+  ]
+
+  result = client.upload_annual_report_batch(kb.id, uploads)
+
+  assert not result.errors
+  for upload in uploads:
+    doc = result.documents[upload.file_path]
+    meta_fields = server.state.documents[doc.id]["meta_fields"]
+    assert meta_fields["stock_code"] == upload.company.code
+    assert meta_fields["year"] == upload.report_file.year
+
+
+def test_batch_upload_keeps_files_of_the_same_report_apart(server, client, tmp_path):
+  kb = client.ensure_knowledge_base("zhitou_kb")
+  uploads = [
+    _upload(tmp_path, "600000", "2023", "a.pdf"),
+    _upload(tmp_path, "600000", "2023", "a_revised.pdf"),
+  ]
+
+  result = client.upload_annual_report_batch(kb.id, uploads)
+
+  assert not result.errors
+  doc_ids = {result.documents[upload.file_path].id for upload in uploads}
+  assert len(doc_ids) == 2
+  assert all(server.state.documents[doc_id]["meta_fields"] for doc_id in doc_ids)
+
+
+def test_find_annual_report(client, tmp_path):
+  kb = client.ensure_knowledge_base("zhitou_kb")
+  upload = _upload(tmp_path, "600000", "2023", "a.pdf")
+  client.upload_annual_report_batch(kb.id, [upload])
+
+  assert client.find_annual_report(kb.id, "600000", "2023") is not None
+  assert client.check_annual_report_exists(kb.id, "600000", "2023")
+  assert not client.check_annual_report_exists(kb.id, "600000", "2022")
+
+
+def test_find_annual_report_does_not_match_other_years(client, tmp_path):
+  kb = client.ensure_knowledge_base("zhitou_kb")
+  upload = _upload(tmp_path, "002021", "2020", "a.pdf")
+  client.upload_annual_report_batch(kb.id, [upload])
+
+  assert client.find_annual_report(kb.id, "002021", "2020") is not None
+  assert client.find_annual_report(kb.id, "002021", "2021") is None
+
+
+def test_unknown_documents_fail_like_ragflow(server, client, tmp_path):
+  kb = client.ensure_knowledge_base("zhitou_kb")
+  upload = _upload(tmp_path, "600000", "2023", "a.pdf")
+  doc_id = client.upload_annual_report_batch(kb.id, [upload]).documents[upload.file_path].id
+
+  for call in (
+    lambda: kb.list_documents(id="missing"),
+    lambda: kb.async_parse_documents([doc_id, "missing"]),
+    lambda: kb.delete_documents(ids=[doc_id, "missing"]),
+  ):
+    with pytest.raises(Exception) as excinfo:
+      call()
+    assert is_document_not_found(excinfo.value)
+  # 已知的文档照常删除，只有未知的 id 报错
+  assert doc_id not in server.state.documents
+
+
+def test_stopping_a_finished_parse_fails(server, client, tmp_path):
+  kb = client.ensure_knowledge_base("zhitou_kb")
+  upload = _upload(tmp_path, "600000", "2023", "a.pdf")
+  doc_id = client.upload_annual_report_batch(kb.id, [upload]).documents[upload.file_path].id
+
+  with pytest.raises(Exception, match="progress at 0 or 1"):
+    kb.async_cancel_parse_documents([doc_id])
+
+
+async def _wait_for_parse(server, timeout):
+  async with AsyncRAGFlowClient(server.api_key, server.base_url) as client:
+    dataset = await client.ensure_knowledge_base("zhitou_kb")
+    docs = await client.upload_documents(dataset["id"], [("a.pdf", b"%PDF-1.4")])
+    await client.parse_documents(dataset["id"], [docs[0]["id"]])
+    return await client.wait_for_parse(
+      dataset["id"], [docs[0]["id"], "missing"], poll_interval=0.05, timeout=timeout
+    ), docs[0]["id"]
+
+
+def test_wait_for_parse_reports_missing_documents(server):
+  results, doc_id = asyncio.run(_wait_for_parse(server, timeout=10))
+  assert results[doc_id]["status"] == "success"
+  assert results["missing"]["status"] == "failed"
+  assert results["missing"]["error"] == "document not found"
+
+
+def test_wait_for_parse_times_out():
+  with FakeRAGFlowServer(parse_seconds=60) as server:
+    results, doc_id = asyncio.run(_wait_for_parse(server, timeout=0.3))
+  assert results[doc_id]["status"] == "failed"
+  assert "within" in results[doc_id]["error"]
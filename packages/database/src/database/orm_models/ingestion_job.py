@@ -0,0 +1,65 @@
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Any, Optional
+from .base import Base
+
+
+class IngestionJobOrm(Base):
+    """年报入库任务队列，多个 worker 通过 FOR UPDATE SKIP LOCKED 并发领取"""
+    __tablename__ = "ingestion_job"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    kind: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False,
+        comment="任务类型: upload, parse"
+    )
+    # 去重键，同一份报告/文档同时只会有一个未结束的任务
+    dedupe_key: Mapped[str] = mapped_column(String(300), nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False, default=dict)
+    result: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default="pending",
+        comment="任务状态: pending, running, succeeded, dead"
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=5)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # 重试退避：pending 任务在 run_after 之前不会被领取
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # 可见性超时：running 任务超过 locked_until 未完成，视为 worker 已失联，可被重新领取
+    locked_by: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    __table_args__ = (
+        # 领取任务时的扫描路径，只索引未结束的任务
+        Index(
+            'ix_ingestion_job_claim',
+            'kind',
+            'run_after',
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+        Index('ix_ingestion_job_status', 'status'),
+        # 去重只约束未结束的任务，已成功或进入死信的报告可以重新入队
+        Index(
+            'uq_ingestion_job_dedupe_key',
+            'dedupe_key',
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
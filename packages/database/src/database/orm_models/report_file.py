@@ -1,6 +1,6 @@
-from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, Index, Enum
+from sqlalchemy import String, Integer, ForeignKey, Date, DateTime, Numeric, Index, Enum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 from .base import Base
 from typing import TYPE_CHECKING
@@ -45,6 +45,19 @@ class ChinaCompanyAnnouncementFileOrm(Base):
     report_status: Mapped[str] = mapped_column(String(50), nullable=False, default="pending")
     publish_date: Mapped[date] = mapped_column(Date, nullable=True)
     
+    # RAGFlow 入库状态，由 worker 在上传和解析时写入
+    ragflow_document_id: Mapped[str] = mapped_column(String(64), nullable=True, index=True)
+    parse_status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=True,
+        index=True,
+        comment="RAGFlow 解析状态: unparsed, success, failed, cancelled"
+    )
+    chunk_count: Mapped[int] = mapped_column(Integer, nullable=True)
+    token_count: Mapped[int] = mapped_column(Integer, nullable=True)
+    uploaded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    parsed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    
     # 关系
     company: Mapped["ChinaCompanyOrm"] = relationship(back_populates="announcement_files")
     
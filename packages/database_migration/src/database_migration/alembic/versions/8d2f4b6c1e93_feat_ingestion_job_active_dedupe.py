@@ -0,0 +1,35 @@
+"""<feat: ingestion job active dedupe>
+
+Revision ID: 8d2f4b6c1e93
+Revises: 66a738f8b8a5
+Create Date: 2026-10-19 21:12:40.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4b6c1e93'
+down_revision: Union[str, Sequence[str], None] = '66a738f8b8a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint('ingestion_job_dedupe_key_key', 'ingestion_job', type_='unique')
+    op.create_index('uq_ingestion_job_dedupe_key', 'ingestion_job', ['dedupe_key'], unique=True, postgresql_where=sa.text("status IN ('pending', 'running')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # 只保留每个去重键最新的任务，否则无法恢复全局唯一约束
+    op.execute(
+        "DELETE FROM ingestion_job j USING ingestion_job newer "
+        "WHERE j.dedupe_key = newer.dedupe_key AND j.id < newer.id"
+    )
+    op.drop_index('uq_ingestion_job_dedupe_key', table_name='ingestion_job', postgresql_where=sa.text("status IN ('pending', 'running')"))
+    op.create_unique_constraint('ingestion_job_dedupe_key_key', 'ingestion_job', ['dedupe_key'])
@@ -0,0 +1,87 @@
+import argparse
+import signal
+from itertools import islice
+from loguru import logger
+from core.db_manager import DatabaseManager
+from core.integration.ragflow.client import RAGFlowClient
+from core.models.china_mainland_listed_company import StreamingAnnualReportList
+from core.repos.ingestion_job_repo import IngestionJobRepositoryImpl
+from worker.config import WorkerConfigLoader, WorkerConfig
+from worker.annual_report_queue.runner import IngestionQueueWorker, upload_job_dtos
+
+ENQUEUE_CHUNK_SIZE = 1000
+
+
+def enqueue_listing(db: DatabaseManager, config: WorkerConfig) -> int:
+  """Enqueues an upload job for every report of the configured listing, reading it incrementally."""
+  report_list = StreamingAnnualReportList(
+    file_path=config.china_annual_report_soures.listing_file_path,
+    base_path=config.china_annual_report_soures.base_path,
+  )
+  repo = IngestionJobRepositoryImpl()
+  dtos = upload_job_dtos(report_list, max_attempts=config.ingestion_queue.max_attempts)
+  enqueued = 0
+  while chunk := list(islice(dtos, ENQUEUE_CHUNK_SIZE)):
+    with db.get_session() as session, session.begin():
+      enqueued += repo.enqueue(session, chunk)
+  return enqueued
+
+
+def run_worker(db: DatabaseManager, config: WorkerConfig) -> None:
+  rag_client = RAGFlowClient(
+    api_key=config.ragflow.apikey,
+    base_url=config.ragflow.url,
+    http_config=config.ragflow.http,
+  )
+  try:
+    rag_client.health_check()
+    kb = rag_client.ensure_knowledge_base(config.ragflow.kb_name)
+    worker = IngestionQueueWorker(
+      db=db,
+      rag_client=rag_client,
+      kb=kb,
+      worker_config=config.annual_report_worker,
+      queue_config=config.ingestion_queue,
+    )
+
+    def handle_signal(signum, frame):
+      logger.info(f"Received signal {signum}, finishing current jobs")
+      worker.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+    worker.run()
+  finally:
+    rag_client.close()
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(
+    description="Distributed annual report ingestion through the Postgres job queue"
+  )
+  subparsers = parser.add_subparsers(dest="command", required=True)
+  subparsers.add_parser("enqueue", help="Enqueue upload jobs for the configured listing")
+  subparsers.add_parser("work", help="Claim and process jobs until interrupted")
+  subparsers.add_parser("status", help="Show job counts by kind and status")
+  requeue = subparsers.add_parser("requeue-dead", help="Move dead jobs back to pending")
+  requeue.add_argument("--kind", choices=["upload", "parse"])
+  args = parser.parse_args()
+
+  loader: WorkerConfigLoader = WorkerConfigLoader()
+  config: WorkerConfig = loader.load()
+  db = DatabaseManager()
+  db.init(config.database.url)
+  repo = IngestionJobRepositoryImpl()
+
+  if args.command == "enqueue":
+    print(f"Enqueued {enqueue_listing(db, config)} upload jobs")
+  elif args.command == "work":
+    run_worker(db, config)
+  elif args.command == "status":
+    with db.get_session() as session:
+      for kind in ["upload", "parse"]:
+        counts = repo.count_by_status(session, kind)
+        print(f"{kind:<8} " + "  ".join(f"{s}={counts.get(s, 0)}" for s in ["pending", "running", "succeeded", "dead"]))
+  elif args.command == "requeue-dead":
+    with db.get_session() as session, session.begin():
+      print(f"Requeued {repo.requeue_dead(session, args.kind)} dead jobs")
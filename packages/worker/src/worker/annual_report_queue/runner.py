@@ -0,0 +1,357 @@
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from loguru import logger
+from sqlalchemy.orm import Session
+from core.config.models import AnnualReportWorkerConfig, IngestionQueueConfig
+from core.db_manager import DatabaseManager
+from core.integration.ragflow.client import (
+  AnnualReportUpload,
+  RAGFlowClient,
+  group_upload_batches,
+)
+from core.integration.ragflow.errors import is_document_not_found
+from core.integration.ragflow.status import normalize_run_status
+from core.models.china_mainland_listed_company import (
+  AnnualReportFile,
+  ChinaAnnualReportList,
+  ChinaMainlandListedCompany,
+  StreamingAnnualReportList,
+)
+from core.models.report_file import AnnouncementType
+from core.models.ingestion_job import (
+  EnqueueIngestionJobDto,
+  IngestionJobKind,
+  IngestionJobModel,
+)
+from core.repos.ingestion_job_repo import IngestionJobRepository, IngestionJobRepositoryImpl
+from core.repos.report_file_repo import AnnouncementFileRepository, AnnouncementFileRepositoryImpl
+from worker.annual_report_worker.validation import validate_pdf
+
+
+def default_worker_id() -> str:
+  return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def upload_job_dtos(
+  report_list: ChinaAnnualReportList | StreamingAnnualReportList, max_attempts: int = 5
+) -> Iterator[EnqueueIngestionJobDto]:
+  """Upload jobs for every report of a listing, one per (stock_code, year)."""
+  for company in report_list.companies:
+    for file_info in company.files:
+      if report_list.base_path:
+        file_path = Path(report_list.base_path) / file_info.file_path
+      else:
+        file_path = Path(file_info.file_path)
+      yield EnqueueIngestionJobDto(
+        kind=IngestionJobKind.UPLOAD,
+        dedupe_key=f"upload:{company.code}:{file_info.year}",
+        payload={
+          "stock_code": company.code,
+          "full_name": company.full_name,
+          "short_name": company.short_name,
+          "year": file_info.year,
+          "file_path": str(file_path),
+        },
+        max_attempts=max_attempts,
+      )
+
+
+class IngestionQueueWorker:
+  """
+  Works off annual report upload and parse jobs from the Postgres job queue.
+
+  Each round claims a batch of upload jobs, uploads them in requests bounded by
+  `upload_batch_bytes` while extending their visibility timeout, and enqueues a parse job per uploaded document in the same transaction that
+  completes the upload job; then it claims a window of parse jobs, starts parsing
+  and polls them to a terminal state, extending their visibility timeout while
+  they run. Failed jobs are retried with exponential backoff and end up dead
+  after `max_attempts`. Any number of these workers can run against the same
+  queue, on any number of nodes. Document IDs and parse results are also written
+  to the matching announcement rows, in the transaction that completes the job.
+  """
+
+  def __init__(
+    self,
+    db: DatabaseManager,
+    rag_client: RAGFlowClient,
+    kb,
+    worker_config: AnnualReportWorkerConfig,
+    queue_config: IngestionQueueConfig,
+    repo: Optional[IngestionJobRepository] = None,
+    worker_id: Optional[str] = None,
+    announcement_repo: Optional[AnnouncementFileRepository] = None,
+  ):
+    """
+    Args:
+      db: Initialized database manager
+      rag_client: RAGFlowClient instance
+      kb: The knowledge base DataSet object
+      worker_config: Batch sizes, parse window and poll interval
+      queue_config: Visibility timeout, retry and polling settings
+      repo: Job queue repository
+      worker_id: Identity recorded on claimed jobs, defaults to host:pid
+      announcement_repo: Repository of the announcement rows to update
+    """
+    self.db = db
+    self.rag_client = rag_client
+    self.kb = kb
+    self.worker_config = worker_config
+    self.queue_config = queue_config
+    self.repo = repo or IngestionJobRepositoryImpl()
+    self.worker_id = worker_id or default_worker_id()
+    self.announcement_repo = announcement_repo or AnnouncementFileRepositoryImpl()
+    self.stop_event = threading.Event()
+
+  @contextmanager
+  def _transaction(self) -> Iterator[Session]:
+    session = self.db.get_session()
+    try:
+      with session.begin():
+        yield session
+    finally:
+      session.close()
+
+  def _retry_delay(self, attempts: int) -> float:
+    cap = min(
+      self.queue_config.retry_backoff_max,
+      self.queue_config.retry_backoff_base * (2 ** max(attempts - 1, 0)),
+    )
+    return random.uniform(cap / 2, cap)
+
+  def _fail(self, job: IngestionJobModel, error: str) -> None:
+    with self._transaction() as session:
+      status = self.repo.fail(
+        session, job.id, self.worker_id, error, self._retry_delay(job.attempts)
+      )
+    if status == "dead":
+      logger.error(f"Job {job.id} ({job.dedupe_key}) is dead after {job.attempts} attempts: {error}")
+    else:
+      logger.warning(f"Job {job.id} ({job.dedupe_key}) failed (attempt {job.attempts}): {error}")
+
+  def _claim(self, kind: IngestionJobKind, limit: int) -> List[IngestionJobModel]:
+    with self._transaction() as session:
+      return self.repo.claim(
+        session, kind.value, self.worker_id, limit, self.queue_config.visibility_timeout
+      )
+
+  def run(self) -> None:
+    """Processes jobs until `stop()` is called."""
+    logger.info(f"Ingestion queue worker {self.worker_id} started")
+    while not self.stop_event.is_set():
+      processed = self.process_uploads() + self.process_parses()
+      if not processed:
+        self.stop_event.wait(self.queue_config.poll_interval)
+    logger.info(f"Ingestion queue worker {self.worker_id} stopped")
+
+  def stop(self) -> None:
+    self.stop_event.set()
+
+  def process_uploads(self) -> int:
+    """Claims and runs one batch of upload jobs. Returns the number of jobs claimed."""
+    jobs = self._claim(IngestionJobKind.UPLOAD, self.worker_config.upload_batch_count)
+    if not jobs:
+      return 0
+
+    # 校验、查重和上传期间在后台续租，避免大文件超过可见性超时被其他 worker 重新领取
+    with self._keep_alive(jobs):
+      uploads = self._prepare_uploads(jobs)
+      # 按字节预算和文件数分组，每组一次上传请求
+      for batch in group_upload_batches(
+        (upload for _, upload in uploads.values()),
+        max_batch_bytes=self.worker_config.upload_batch_bytes,
+        max_batch_count=self.worker_config.upload_batch_count,
+      ):
+        self._upload_batch({upload.file_path: uploads[upload.file_path] for upload in batch})
+    return len(jobs)
+
+  def _prepare_uploads(
+    self, jobs: List[IngestionJobModel]
+  ) -> Dict[str, tuple[IngestionJobModel, AnnualReportUpload]]:
+    """Settles jobs that need no upload and returns the rest keyed by file path."""
+    uploads: Dict[str, tuple[IngestionJobModel, AnnualReportUpload]] = {}
+    for job in jobs:
+      payload = job.payload
+      if not Path(payload["file_path"]).is_file():
+        self._fail(job, f"file not found {payload['file_path']}")
+        continue
+      reason = validate_pdf(payload["file_path"]) if self.worker_config.pdf_validation else None
+      if reason is not None:
+        # 不合格的 PDF 重试也无济于事，直接结束任务并记录原因
+        logger.warning(f"Job {job.id} ({job.dedupe_key}) quarantined: {reason}")
+        with self._transaction() as session:
+          self.repo.complete(session, job.id, self.worker_id, {"quarantined": reason})
+        continue
+      try:
+        exists = self.rag_client.check_annual_report_exists(
+          self.kb.id, payload["stock_code"], payload["year"]
+        )
+      except Exception as e:
+        self._fail(job, f"existence check failed: {e}")
+        continue
+      if exists:
+        with self._transaction() as session:
+          self.repo.complete(session, job.id, self.worker_id, {"skipped": True})
+        continue
+      upload = AnnualReportUpload(
+        company=ChinaMainlandListedCompany(
+          code=payload["stock_code"],
+          full_name=payload["full_name"],
+          short_name=payload["short_name"],
+        ),
+        report_file=AnnualReportFile(year=payload["year"], file_path=payload["file_path"]),
+        file_path=payload["file_path"],
+      )
+      uploads[upload.file_path] = (job, upload)
+    return uploads
+
+  def _upload_batch(
+    self, uploads: Dict[str, tuple[IngestionJobModel, AnnualReportUpload]]
+  ) -> None:
+    """Uploads one batch in a single request and completes its jobs."""
+    try:
+      result = self.rag_client.upload_annual_report_batch(
+        dataset_id=self.kb.id, uploads=[upload for _, upload in uploads.values()]
+      )
+    except Exception as e:
+      for job, _ in uploads.values():
+        self._fail(job, f"upload failed: {e}")
+      return
+
+    for file_path, (job, upload) in uploads.items():
+      doc = result.documents.get(file_path)
+      if doc is None:
+        self._fail(job, str(result.errors.get(file_path)))
+        continue
+      # 上传任务完成与解析任务入队放在同一事务中
+      with self._transaction() as session:
+        if self.repo.complete(session, job.id, self.worker_id, {"document_id": doc.id}):
+          self.announcement_repo.record_ragflow_upload(
+            session,
+            upload.company.code,
+            int(upload.report_file.year),
+            AnnouncementType.ANNUAL_REPORT.value,
+            doc.id,
+          )
+          self.repo.enqueue(
+            session,
+            [
+              EnqueueIngestionJobDto(
+                kind=IngestionJobKind.PARSE,
+                dedupe_key=f"parse:{doc.id}",
+                payload={
+                  "document_id": doc.id,
+                  "stock_code": upload.company.code,
+                  "year": upload.report_file.year,
+                },
+                max_attempts=job.max_attempts,
+              )
+            ],
+          )
+    logger.info(f"Uploaded {len(result.documents)}/{len(uploads)} reports")
+
+  @contextmanager
+  def _keep_alive(self, jobs: List[IngestionJobModel]) -> Iterator[None]:
+    """Extends the visibility timeout of the jobs every third of it until the block exits."""
+    done = threading.Event()
+    job_ids = [job.id for job in jobs]
+
+    def extend() -> None:
+      while not done.wait(self.queue_config.visibility_timeout / 3):
+        try:
+          with self._transaction() as session:
+            self.repo.extend(session, job_ids, self.worker_id, self.queue_config.visibility_timeout)
+        except Exception as e:
+          logger.warning(f"Failed to extend the visibility timeout of {len(job_ids)} jobs: {e}")
+
+    thread = threading.Thread(target=extend, name="ingestion-job-keep-alive", daemon=True)
+    thread.start()
+    try:
+      yield
+    finally:
+      done.set()
+      thread.join()
+
+  def process_parses(self) -> int:
+    """Claims a window of parse jobs and parses them to completion. Returns the number claimed."""
+    jobs = self._claim(IngestionJobKind.PARSE, self.worker_config.parse_window)
+    if not jobs:
+      return 0
+
+    pending = {job.payload["document_id"]: job for job in jobs}
+    try:
+      self.kb.async_parse_documents(list(pending))
+    except Exception as e:
+      for job in jobs:
+        self._fail(job, f"starting parse failed: {e}")
+      return len(jobs)
+
+    # 每过 1/3 可见性超时续租一次，避免长时间解析被其他 worker 重新领取
+    extend_every = self.queue_config.visibility_timeout / 3
+    last_extended = time.monotonic()
+    while pending:
+      if self.stop_event.wait(self.worker_config.parse_poll_interval):
+        self._release_parses(pending)
+        break
+
+      if time.monotonic() - last_extended >= extend_every:
+        with self._transaction() as session:
+          self.repo.extend(
+            session,
+            [job.id for job in pending.values()],
+            self.worker_id,
+            self.queue_config.visibility_timeout,
+          )
+        last_extended = time.monotonic()
+
+      for doc_id in list(pending):
+        try:
+          docs = self.kb.list_documents(id=doc_id)
+        except Exception as e:
+          # RAGFlow 对已删除的文档返回 "You don't own the document"，不是空列表
+          if not is_document_not_found(e):
+            logger.debug(f"Failed to poll parse status of {doc_id}: {e}")
+            continue
+          docs = []
+        if not docs:
+          self._fail(pending.pop(doc_id), "document no longer exists")
+          continue
+        doc = docs[0]
+        status = normalize_run_status(doc.run, doc.progress)
+        if status is None:
+          continue
+        job = pending.pop(doc_id)
+        # 解析状态写回公告表；成功时与任务完成同一事务，任务已被其他 worker 接管则不写
+        with self._transaction() as session:
+          if status != "success" or self.repo.complete(
+            session,
+            job.id,
+            self.worker_id,
+            {
+              "document_id": doc_id,
+              "status": status,
+              "chunk_count": doc.chunk_count or 0,
+              "token_count": doc.token_count or 0,
+            },
+          ):
+            self.announcement_repo.record_ragflow_parse(
+              session, doc_id, status, doc.chunk_count or 0, doc.token_count or 0
+            )
+        if status != "success":
+          self._fail(job, f"parse {status}")
+    return len(jobs)
+
+  def _release_parses(self, pending: Dict[str, IngestionJobModel]) -> None:
+    """Cancels in-flight parses on shutdown and hands their jobs back to the queue."""
+    try:
+      self.kb.async_cancel_parse_documents(list(pending))
+    except Exception as e:
+      logger.warning(f"Failed to cancel in-flight parses: {e}")
+    with self._transaction() as session:
+      self.repo.release(session, [job.id for job in pending.values()], self.worker_id)
+    logger.info(f"Released {len(pending)} parse jobs back to the queue")
@@ -1,12 +1,43 @@
-from core.models.china_mainland_listed_company import ChinaAnnualReportList
+from core.config.models import AnnualReportWorkerConfig
+from core.models.china_mainland_listed_company import (
+  ChinaAnnualReportList,
+  StreamingAnnualReportList,
+)
 from ragflow_sdk import RAGFlow
 from worker.config import WorkerConfigLoader, WorkerConfig
-from core.integration.ragflow.client import RAGFlowClient
+from worker.annual_report_worker.dedupe import (
+  AliasFile,
+  BackgroundHasher,
+  DuplicateTracker,
+)
+from worker.annual_report_worker.concurrency import (
+  AIMDController,
+  create_concurrency_controllers,
+)
+from worker.annual_report_worker.announcement_status import (
+  AnnouncementStatusRecorder,
+  connect_announcement_status,
+)
+from worker.annual_report_worker.ledger import IngestionLedger, LedgerEntry
+from worker.annual_report_worker.metrics import IngestionMetrics
+from core.integration.ragflow.client import (
+  AnnualReportUpload,
+  RAGFlowClient,
+  group_upload_batches,
+)
 from core.integration.ragflow.errors import RAGFlowHealthCheckError
+from core.integration.ragflow.status import normalize_run_status
+from worker.annual_report_worker.parse_pipeline import SlidingWindowParser
+from worker.annual_report_worker.validation import BackgroundValidator
+from worker.metrics import MetricsServer
+import os
+import time
 import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from tqdm import tqdm
 from pathlib import Path
-from typing import Dict
+from typing import Any, Callable, Dict, Optional
 from loguru import logger
 
 def parse_documents_in_queue(
@@ -14,6 +45,8 @@ def parse_documents_in_queue(
   dataset_id: str,
   document_ids: list[str],
   batch_size: int = 10,
+  on_result: Optional[Callable[[str, Dict[str, int | str]], None]] = None,
+  concurrency: Optional[AIMDController] = None,
 ) -> Dict[str, Dict[str, int | str]]:
   """
   Parse documents in batches using RAGFlow's parse_documents API.
@@ -28,12 +61,18 @@ def parse_documents_in_queue(
     dataset_id: The dataset ID containing the documents
     document_ids: List of document IDs to parse
     batch_size: Number of documents to parse in each batch (default: 10)
+    on_result: Optional callback invoked with (document_id, result) for every
+      document that finished successfully or failed
+    concurrency: Optional adaptive limit; when given, each batch is as large as
+      its current limit instead of batch_size
 
   Returns:
     Dictionary mapping document_id to result dict with keys:
       - status: "success", "failed", or "cancelled"
       - chunk_count: Number of chunks created
       - token_count: Total tokens processed
+      - error: Failure reason, only present for failed documents when known
+      - elapsed: Seconds the document's batch took to parse, when it finished
   """
   if not document_ids:
     print("No documents to parse")
@@ -48,37 +87,54 @@ def parse_documents_in_queue(
 
   print("\nStarting document parsing:")
   print(f"  Total documents: {len(document_ids)}")
-  print(f"  Batch size: {batch_size}\n")
+  print(f"  Batch size: {concurrency.limit if concurrency else batch_size}\n")
 
   all_results: Dict[str, Dict[str, int | str]] = {}
 
   # Process documents in batches
   with tqdm(total=len(document_ids), desc="Parsing documents", unit="doc") as pbar:
-    for i in range(0, len(document_ids), batch_size):
-      batch = document_ids[i:i + batch_size]
-      batch_num = i // batch_size + 1
-      total_batches = (len(document_ids) + batch_size - 1) // batch_size
+    i = 0
+    batch_num = 0
+    while i < len(document_ids):
+      size = concurrency.limit if concurrency is not None else batch_size
+      batch = document_ids[i:i + size]
+      i += len(batch)
+      batch_num += 1
 
-      pbar.set_description(f"Parsing batch {batch_num}/{total_batches}")
+      pbar.set_description(f"Parsing batch {batch_num} ({len(batch)} docs)")
 
       try:
         # Use SDK's parse_documents which awaits completion
+        started = time.monotonic()
         finished = dataset.parse_documents(batch)
+        elapsed = time.monotonic() - started
 
         # Process results
-        for doc_id, status, chunk_count, token_count in finished:
+        for doc_id, run, chunk_count, token_count in finished:
+          status = normalize_run_status(run) or "failed"
           all_results[doc_id] = {
             "status": status,
             "chunk_count": chunk_count,
             "token_count": token_count,
+            "elapsed": elapsed,
           }
 
           # Log failures
           if status == "failed":
             pbar.write(f"Failed: {doc_id}")
 
+          # SDK 不返回失败原因，无法区分过载与文档本身的问题；请求异常在下方按 on_error 处理
+          if concurrency is not None and status == "success":
+            concurrency.on_success(elapsed)
+
+          if on_result is not None:
+            on_result(doc_id, all_results[doc_id])
+
           pbar.update(1)
 
+        if concurrency is not None:
+          pbar.set_postfix(batch_size=concurrency.limit)
+
       except KeyboardInterrupt:
         pbar.write("\nParsing interrupted by user. Pending tasks have been cancelled.")
         # Mark remaining documents as cancelled
@@ -92,6 +148,8 @@ def parse_documents_in_queue(
         break
 
       except Exception as e:
+        if concurrency is not None:
+          concurrency.on_error(e)
         pbar.write(f"\nError parsing batch {batch_num}: {e}")
         # Mark batch documents as failed
         for doc_id in batch:
@@ -100,10 +158,18 @@ def parse_documents_in_queue(
               "status": "failed",
               "chunk_count": 0,
               "token_count": 0,
+              "error": f"batch {batch_num} failed: {e}",
             }
+            if on_result is not None:
+              on_result(doc_id, all_results[doc_id])
         pbar.update(len(batch))
 
-  # Print summary
+  print_parse_summary(all_results)
+  return all_results
+
+
+def print_parse_summary(all_results: Dict[str, Dict[str, int | str]]) -> None:
+  """Print success/failed/cancelled counts and chunk/token totals of a parse run."""
   print("\nParsing complete:")
   success_count = sum(1 for r in all_results.values() if r["status"] == "success")
   fail_count = sum(1 for r in all_results.values() if r["status"] == "failed")
@@ -117,53 +183,170 @@ def parse_documents_in_queue(
   print(f"  Total chunks: {total_chunks}")
   print(f"  Total tokens: {total_tokens}")
 
-  return all_results
 
+def ingest_annual_reports(
+  rag_client: RAGFlowClient,
+  kb,
+  report_list: ChinaAnnualReportList | StreamingAnnualReportList,
+  worker_config: AnnualReportWorkerConfig,
+  ledger: Optional[IngestionLedger] = None,
+  upload_concurrency: Optional[AIMDController] = None,
+  parse_concurrency: Optional[AIMDController] = None,
+  metrics: Optional[IngestionMetrics] = None,
+  announcement_status: Optional[AnnouncementStatusRecorder] = None,
+) -> None:
+  """
+  Uploads the annual reports of a listing and parses the uploaded documents.
 
-def main() -> None:
-  loader: WorkerConfigLoader = WorkerConfigLoader()
-  config: WorkerConfig = loader.load()
+  With a ledger, files whose size and mtime match an uploaded ledger entry are
+  skipped without any network call, and documents a previous run uploaded but
+  did not finish parsing are parsed again. With dedupe enabled, files are hashed
+  on a background thread pool and byte-identical files are uploaded only once;
+  the other copies are recorded as aliases of the uploaded file. With
+  pdf_validation enabled, files are checked on a process pool before upload;
+  empty, truncated, encrypted, page-less or non-PDF files are quarantined in the
+  ledger with the reason and skipped until they change.
 
-  rag_client = RAGFlowClient(api_key=config.ragflow.apikey, base_url=config.ragflow.url)
-  try:
-    health_data = rag_client.health_check()
-    logger.info("RAGFlow health check passed:")
-    logger.info(health_data)
-  except RAGFlowHealthCheckError as e:
-    logger.error(f"RAGFlow health check failed: {e}")
-    return
-  except requests.exceptions.RequestException as e:
-    logger.error(f"Request error: {e}")
-    return
+  The listing is consumed as an iterator: at most hash_lookahead files are
+  checked and hashed ahead of the upload loop, so with a StreamingAnnualReportList
+  the first reports are uploading while the rest of the listing is still read.
 
-  try:
-    kb = rag_client.ensure_knowledge_base(config.ragflow.kb_name)
-    logger.info(f"Knowledge base '{config.ragflow.kb_name}' is ready (ID: {kb.id})")
-  except Exception as e:
-    logger.error(f"Failed to ensure knowledge base: {e}")
-    return
+  Upload requests run concurrently and the number in flight, like the parse
+  window, follows an AIMDController: it grows while RAGFlow answers quickly and
+  halves on timeouts, 429s and 5xx responses.
 
-  # Load annual report list
-  logger.info("Loading annual report list...")
-  report_list = ChinaAnnualReportList.from_file(
-    file_path=config.china_annual_report_soures.listing_file_path,
-    base_path=config.china_annual_report_soures.base_path,
-  )
-
-  # Calculate total number of files
-  total_files = sum(len(company.files) for company in report_list.companies)
-  print(
-    f"Found {len(report_list.companies)} companies with {total_files} annual reports"
-  )
+  Args:
+    rag_client: RAGFlowClient instance
+    kb: The knowledge base DataSet object
+    report_list: Annual report listing to ingest, loaded or streamed
+    worker_config: Worker tuning options
+    ledger: Optional local ingestion ledger
+    upload_concurrency: Controller of concurrent upload requests, created from
+      worker_config if omitted
+    parse_concurrency: Controller of the parse window, created from
+      worker_config if omitted
+    metrics: Collects per-stage latency and throughput, created if omitted
+    announcement_status: Optional recorder that writes document IDs and parse
+      results to the announcement table
+  """
+  # Calculate total number of files; a streamed listing is counted while it is read
+  total_files = None
+  if isinstance(report_list, ChinaAnnualReportList):
+    total_files = sum(len(company.files) for company in report_list.companies)
+    print(
+      f"Found {len(report_list.companies)} companies with {total_files} annual reports"
+    )
+  else:
+    print(f"Streaming annual report listing from {report_list.file_path}")
+
+  default_upload, default_parse = create_concurrency_controllers(worker_config)
+  upload_concurrency = upload_concurrency or default_upload
+  parse_concurrency = parse_concurrency or default_parse
+  metrics = metrics or IngestionMetrics()
+  metrics.watch_concurrency(upload_concurrency, parse_concurrency)
+
+  # 文件被检查的时间，用于统计从检查到解析完成的端到端延迟
+  checked_at: Dict[str, float] = {}
+  document_checked_at: Dict[str, float] = {}
+
+  def on_parse_result(doc_id: str, result: Dict[str, int | str]) -> None:
+    metrics.observe_parse(result)
+    started = document_checked_at.pop(doc_id, None)
+    if started is not None:
+      metrics.observe_file(time.monotonic() - started, result)
+    if ledger is not None:
+      ledger.record_parse_result(doc_id, result)
+    if announcement_status is not None:
+      announcement_status.record_parse(doc_id, result)
+
+  # 上次运行已上传但未完成解析的文档
+  resumed_doc_ids = ledger.unparsed_document_ids() if ledger is not None else []
+  if resumed_doc_ids:
+    print(f"Resuming {len(resumed_doc_ids)} documents uploaded but not parsed by a previous run")
 
   # Upload reports with progress bar
+  parser = None
+  if worker_config.pipelined:
+    # 流水线模式：上传完成的文档立即进入解析窗口
+    parser = SlidingWindowParser(
+      dataset=kb,
+      window_size=worker_config.parse_window,
+      poll_interval=worker_config.parse_poll_interval,
+      on_result=on_parse_result,
+      concurrency=parse_concurrency,
+      parse_timeout=worker_config.parse_timeout,
+    )
+    parser.start()
+    for doc_id in resumed_doc_ids:
+      parser.submit(doc_id)
+
   uploaded = 0
   skipped = 0
   failed = 0
-  uploaded_doc_ids = []  # Track uploaded document IDs for parsing
+  duplicates = 0
+  quarantined = 0
+  uploaded_doc_ids = list(resumed_doc_ids)  # Track uploaded document IDs for parsing
+  # 文件路径 -> (stat, content hash, 被替换的旧文档 ID)
+  upload_state: Dict[str, tuple[os.stat_result, Optional[str], Optional[str]]] = {}
+  # 本次运行已安排上传的 (stock_code, year)，同一年报的其他文件不再上传
+  planned_reports: Dict[tuple[str, str], str] = {}
+  tracker = DuplicateTracker()
+  hasher = BackgroundHasher(
+    max_workers=worker_config.hash_workers, on_hashed=metrics.observe_hash
+  )
+  need_hash = ledger is not None or worker_config.dedupe
+  validator = (
+    BackgroundValidator(
+      max_workers=worker_config.validation_workers,
+      on_validated=metrics.observe_validation,
+    )
+    if worker_config.pdf_validation
+    else None
+  )
 
-  with tqdm(total=total_files, desc="Uploading annual reports", unit="file") as pbar:
+  def parse_result_of(entry: Optional[LedgerEntry]) -> Optional[Dict[str, int | str]]:
+    """Parse result recorded in a ledger entry, None if its document has not finished parsing."""
+    if entry is None or entry.parse_status is None:
+      return None
+    return {
+      "status": entry.parse_status,
+      "chunk_count": entry.chunk_count,
+      "token_count": entry.token_count,
+    }
+
+  def record_aliases(aliases: list[AliasFile], document_id: str) -> None:
+    for alias in aliases:
+      logger.info(f"{alias.file_path} is identical to {alias.alias_of}, not uploaded again")
+      if announcement_status is not None:
+        # 原文件本次刚上传时尚无解析结果，之后按文档 ID 写回
+        canonical_entry = ledger.get(alias.alias_of) if ledger is not None else None
+        announcement_status.record_existing(
+          alias.stock_code,
+          alias.year,
+          document_id,
+          parse_result_of(canonical_entry)
+          if canonical_entry is not None and canonical_entry.document_id == document_id
+          else None,
+        )
+      if ledger is not None:
+        ledger.record_alias(
+          alias.file_path,
+          alias.stock_code,
+          alias.year,
+          alias.stat,
+          alias.content_hash,
+          document_id,
+          alias.alias_of,
+        )
+
+  def planned_files():
+    """Yields (company, file_info, file_path, stat, ledger entry) of the listing, in order."""
+    # 预读 hash_lookahead 个文件，提前把需要哈希的文件提交到后台线程池
+    lookahead = deque()
     for company in report_list.companies:
+      if total_files is None:
+        pbar.total += len(company.files)
+        pbar.refresh()
       for file_info in company.files:
         # Construct full file path
         if report_list.base_path:
@@ -171,37 +354,346 @@ def main() -> None:
         else:
           file_path = Path(file_info.file_path)
 
-        # Update progress bar description
-        pbar.set_description(f"Uploading {company.code} {file_info.year}")
-
         try:
-          result = rag_client.upload_annual_report(
-            dataset_id=kb.id,
-            company=company.company,
-            report_file=file_info,
+          stat = file_path.stat() if file_path.is_file() else None
+        except OSError as e:
+          logger.warning(f"Cannot stat {file_path}: {e}")
+          stat = None
+        if stat is None:
+          lookahead.append((company, file_info, file_path, None, None))
+        else:
+          entry = ledger.get(str(file_path)) if ledger is not None else None
+          if not (
+            entry is not None
+            and (entry.is_uploaded or entry.is_quarantined)
+            and entry.is_unchanged(stat)
+          ):
+            if validator is not None:
+              validator.submit(file_path)
+            if need_hash:
+              hasher.submit(file_path)
+          lookahead.append((company, file_info, file_path, stat, entry))
+
+        if len(lookahead) > worker_config.hash_lookahead:
+          yield lookahead.popleft()
+    while lookahead:
+      yield lookahead.popleft()
+
+  def hash_or_error(file_path: Path) -> str | OSError:
+    try:
+      return hasher.result(file_path)
+    except OSError as e:
+      return e
+
+  def find_existing_report(stock_code: str, year: str) -> Optional[Any]:
+    try:
+      return rag_client.find_annual_report(kb.id, stock_code, year)
+    except Exception as e:
+      logger.warning(f"Existence check of {stock_code} {year} failed, uploading: {e}")
+      return None
+
+  def pending_uploads():
+    """Yields reports that are not in the knowledge base yet."""
+    nonlocal skipped, failed, duplicates, quarantined
+
+    for company, file_info, file_path, stat, entry in planned_files():
+      pbar.set_description(f"Checking {company.code} {file_info.year}")
+      started = time.monotonic()
+
+      if stat is None:
+        failed += 1
+        pbar.write(f"\nError uploading {company.code} {file_info.year}: file not found {file_path}")
+      elif entry is not None and entry.is_uploaded and entry.is_unchanged(stat):
+        # 台账命中：文件未变化，无需任何网络请求
+        skipped += 1
+        if entry.content_hash is not None and entry.alias_of is None:
+          tracker.register(entry.content_hash, entry.file_path, entry.document_id)
+        if announcement_status is not None:
+          announcement_status.record_existing(
+            company.code, file_info.year, entry.document_id, parse_result_of(entry)
+          )
+      elif entry is not None and entry.is_quarantined and entry.is_unchanged(stat):
+        # 上次校验不合格且文件未变化
+        quarantined += 1
+      elif validator is not None and (reason := validator.result(file_path)) is not None:
+        quarantined += 1
+        pbar.write(f"\nQuarantined {company.code} {file_info.year} ({file_path}): {reason}")
+        if ledger is not None:
+          ledger.record_quarantine(str(file_path), company.code, file_info.year, stat, reason)
+      elif need_hash and isinstance(content_hash := hash_or_error(file_path), OSError):
+        # 文件在列出后变得不可读（被删除、权限变化等），记为上传失败，下次运行重试
+        failed += 1
+        pbar.write(f"\nError reading {company.code} {file_info.year} ({file_path}): {content_hash}")
+        if ledger is not None:
+          ledger.record_upload_failure(
+            str(file_path), company.code, file_info.year, stat, None, f"unreadable file: {content_hash}"
+          )
+      else:
+        content_hash = content_hash if need_hash else None
+        canonical_path = (
+          tracker.canonical_for(content_hash)
+          if worker_config.dedupe and content_hash is not None
+          else None
+        )
+        canonical_entry = (
+          ledger.find_uploaded_by_hash(content_hash)
+          if canonical_path is None and worker_config.dedupe and ledger is not None
+          else None
+        )
+        if canonical_entry is not None and canonical_entry.file_path == str(file_path):
+          canonical_entry = None
+
+        if entry is not None and entry.is_uploaded and entry.content_hash == content_hash:
+          # 只有 mtime 变化，内容相同
+          ledger.touch(str(file_path), stat)
+          skipped += 1
+        elif canonical_path is not None or canonical_entry is not None:
+          # 与已上传（或本次待上传）的文件内容完全相同，只记录别名
+          duplicates += 1
+          if canonical_entry is not None:
+            tracker.register(content_hash, canonical_entry.file_path, canonical_entry.document_id)
+          alias = AliasFile(
             file_path=str(file_path),
-            check_exists=True,
+            stock_code=company.code,
+            year=file_info.year,
+            stat=stat,
+            content_hash=content_hash,
+            alias_of=tracker.canonical_for(content_hash),
           )
-
-          if result is None:
-            skipped += 1
-            pbar.set_postfix(uploaded=uploaded, skipped=skipped, failed=failed)
-          else:
-            uploaded += 1
-            uploaded_doc_ids.append(result.id)  # Track document ID for parsing
-            pbar.set_postfix(uploaded=uploaded, skipped=skipped, failed=failed)
-
-        except Exception as e:
+          document_id = tracker.add_alias(alias)
+          if document_id is not None:
+            record_aliases([alias], document_id)
+        elif (company.code, file_info.year) in planned_reports:
+          skipped += 1
+          logger.warning(
+            f"{file_path} is another file for {company.code} {file_info.year}, "
+            f"already uploading {planned_reports[(company.code, file_info.year)]}; skipped"
+          )
+        elif entry is None and (
+          existing := find_existing_report(company.code, file_info.year)
+        ) is not None:
+          skipped += 1
+          existing_status = normalize_run_status(
+            getattr(existing, "run", None), getattr(existing, "progress", None)
+          )
+          chunk_count = getattr(existing, "chunk_count", 0) or 0
+          token_count = getattr(existing, "token_count", 0) or 0
+          if announcement_status is not None:
+            announcement_status.record_existing(
+              company.code,
+              file_info.year,
+              existing.id,
+              None
+              if existing_status is None
+              else {"status": existing_status, "chunk_count": chunk_count, "token_count": token_count},
+            )
+          # 记入台账，之后的运行不再向 RAGFlow 查询
+          if ledger is not None:
+            ledger.record_existing(
+              str(file_path),
+              company.code,
+              file_info.year,
+              stat,
+              content_hash,
+              existing.id,
+              existing_status,
+              chunk_count,
+              token_count,
+            )
+          if content_hash is not None:
+            tracker.register(content_hash, str(file_path), existing.id)
+        else:
+          if content_hash is not None:
+            tracker.register(content_hash, str(file_path))
+          planned_reports[(company.code, file_info.year)] = str(file_path)
+          upload_state[str(file_path)] = (
+            stat,
+            content_hash,
+            entry.document_id if entry is not None and entry.is_uploaded else None,
+          )
+          checked_at[str(file_path)] = started
+          yield AnnualReportUpload(
+            company=company.company, report_file=file_info, file_path=str(file_path)
+          )
+          continue
+
+      pbar.update(1)
+      show_progress()
+
+  def record_upload(upload: AnnualReportUpload, doc, error: Optional[Exception]):
+    nonlocal failed
+    stat, content_hash, replaced_doc_id = upload_state.pop(upload.file_path)
+    started = checked_at.pop(upload.file_path, None)
+    if doc is not None and started is not None:
+      document_checked_at[doc.id] = started
+    if content_hash is not None:
+      if doc is not None:
+        record_aliases(tracker.resolve(content_hash, doc.id), doc.id)
+      else:
+        # 原文件上传失败，等待它的别名也按失败处理，下次运行重试
+        for alias in tracker.fail(content_hash):
           failed += 1
-          pbar.set_postfix(uploaded=uploaded, skipped=skipped, failed=failed)
-          print(f"\nError uploading {company.code} {file_info.year}: {e}")
-
-        pbar.update(1)
+          if ledger is not None:
+            ledger.record_upload_failure(
+              alias.file_path, alias.stock_code, alias.year, alias.stat,
+              alias.content_hash, f"upload of identical file {alias.alias_of} failed",
+            )
+    stock_code, year = upload.key
+    if doc is not None and announcement_status is not None:
+      announcement_status.record_upload(stock_code, year, doc.id)
+    if ledger is None:
+      return
+    if doc is not None:
+      ledger.record_upload(upload.file_path, stock_code, year, stat, content_hash, doc.id)
+      if replaced_doc_id is not None:
+        # 文件内容已变化；旧版本仍有内容相同的别名文件时保留旧文档，改由别名承载
+        promoted = ledger.promote_alias(replaced_doc_id)
+        if promoted is not None:
+          logger.info(f"Keeping replaced document {replaced_doc_id}, still the content of {promoted}")
+          return
+        try:
+          kb.delete_documents(ids=[replaced_doc_id])
+        except Exception as e:
+          logger.warning(f"Failed to delete replaced document {replaced_doc_id}: {e}")
+    else:
+      ledger.record_upload_failure(
+        upload.file_path, stock_code, year, stat, content_hash, str(error)
+      )
+
+  def show_progress() -> None:
+    metrics.set_file_counts(
+      uploaded=uploaded,
+      skipped=skipped,
+      duplicates=duplicates,
+      quarantined=quarantined,
+      failed=failed,
+    )
+    pbar.set_postfix(
+      uploaded=uploaded,
+      skipped=skipped,
+      duplicates=duplicates,
+      quarantined=quarantined,
+      failed=failed,
+      concurrency=upload_concurrency.limit,
+    )
 
+  def upload_batch(batch: list[AnnualReportUpload]):
+    started = time.monotonic()
+    try:
+      result = rag_client.upload_annual_report_batch(dataset_id=kb.id, uploads=batch)
+    except Exception as e:
+      upload_concurrency.on_error(e)
+      metrics.observe_upload_error(batch, time.monotonic() - started)
+      raise
+    if result.documents:
+      # 只统计成功写入元数据的文档
+      upload_concurrency.on_success(time.monotonic() - started, items=len(result.documents))
+    elif result.errors and not all(isinstance(e, OSError) for e in result.errors.values()):
+      # 整批失败（例如元数据更新全部失败）视为过载信号，本地文件读取失败除外
+      upload_concurrency.on_overload()
+    metrics.observe_upload(batch, result)
+    return result
+
+  def finish_batch(future: Future) -> None:
+    nonlocal uploaded, failed
+    batch = in_flight.pop(future)
+    try:
+      result = future.result()
+    except Exception as e:
+      failed += len(batch)
+      pbar.write(f"\nError uploading batch of {len(batch)} reports: {e}")
+      for upload in batch:
+        record_upload(upload, None, e)
+      pbar.update(len(batch))
+      show_progress()
+      return
+
+    for upload in batch:
+      doc = result.documents.get(upload.file_path)
+      error = result.errors.get(upload.file_path)
+      record_upload(upload, doc, error)
+      if doc is not None:
+        uploaded += 1
+        uploaded_doc_ids.append(doc.id)  # Track document ID for parsing
+        if parser is not None:
+          parser.submit(doc.id)
+      else:
+        failed += 1
+        stock_code, year = upload.key
+        pbar.write(f"\nError uploading {stock_code} {year}: {error}")
+
+    pbar.update(len(batch))
+    show_progress()
+
+  def finish_some() -> None:
+    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+    for future in done:
+      finish_batch(future)
+
+  # 上传请求在线程池中并发执行，结果统一在当前线程处理
+  executor = ThreadPoolExecutor(
+    max_workers=upload_concurrency.maximum, thread_name_prefix="report-upload"
+  )
+  in_flight: Dict[Future, list[AnnualReportUpload]] = {}
+  try:
+    with tqdm(
+      total=total_files or 0, desc="Uploading annual reports", unit="file", position=0
+    ) as pbar:
+      # 按字节预算和文件数分组，每组一次上传请求
+      for batch in group_upload_batches(
+        pending_uploads(),
+        max_batch_bytes=worker_config.upload_batch_bytes,
+        max_batch_count=worker_config.upload_batch_count,
+      ):
+        while len(in_flight) >= upload_concurrency.limit:
+          finish_some()
+        pbar.set_description(f"Uploading batch of {len(batch)} reports")
+        in_flight[executor.submit(upload_batch, batch)] = batch
+
+      while in_flight:
+        finish_some()
+  except KeyboardInterrupt:
+    print("\nUpload interrupted by user.")
+    executor.shutdown(wait=False, cancel_futures=True)
+    if parser is not None:
+      parser.cancel()
+      print_parse_summary(parser.join())
+    return
+  except Exception:
+    # 不让解析线程在异常后继续运行
+    if parser is not None:
+      parser.cancel()
+      parser.join()
+    raise
+  finally:
+    executor.shutdown(wait=False, cancel_futures=True)
+    hasher.shutdown()
+    if validator is not None:
+      validator.shutdown()
+
+  metrics.set_file_counts(
+    uploaded=uploaded,
+    skipped=skipped,
+    duplicates=duplicates,
+    quarantined=quarantined,
+    failed=failed,
+  )
   print("\nUpload complete:")
   print(f"  Uploaded: {uploaded}")
   print(f"  Skipped (already exists): {skipped}")
+  print(f"  Duplicates (identical content, not uploaded): {duplicates}")
+  print(f"  Quarantined (invalid PDF, not uploaded): {quarantined}")
   print(f"  Failed: {failed}")
+  print(
+    f"  Upload concurrency: {upload_concurrency.limit} "
+    f"(overloads: {upload_concurrency.overloads}, "
+    f"{upload_concurrency.throughput:.2f} files/s)"
+  )
+
+  if parser is not None:
+    parser.close()
+    print_parse_summary(parser.join())
+    return
 
   # Parse uploaded documents in batches
   if uploaded_doc_ids:
@@ -211,6 +703,109 @@ def main() -> None:
       dataset_id=kb.id,
       document_ids=uploaded_doc_ids,
       batch_size=10,  # Process 10 documents per batch
+      on_result=on_parse_result,
+      concurrency=parse_concurrency,
     )
   else:
     print("\nNo newly uploaded documents to parse.")
+
+
+def connect_knowledge_base(config: WorkerConfig) -> Optional[tuple[RAGFlowClient, Any]]:
+  """
+  Creates a RAGFlowClient, checks RAGFlow health and ensures the knowledge base.
+
+  Returns:
+    (rag_client, kb), or None if RAGFlow is unhealthy or the knowledge base is
+    unavailable. The caller closes the client.
+  """
+  rag_client = RAGFlowClient(
+    api_key=config.ragflow.apikey,
+    base_url=config.ragflow.url,
+    http_config=config.ragflow.http,
+  )
+  try:
+    health_data = rag_client.health_check()
+    logger.info("RAGFlow health check passed:")
+    logger.info(health_data)
+  except RAGFlowHealthCheckError as e:
+    logger.error(f"RAGFlow health check failed: {e}")
+    rag_client.close()
+    return None
+  except requests.exceptions.RequestException as e:
+    logger.error(f"Request error: {e}")
+    rag_client.close()
+    return None
+
+  try:
+    kb = rag_client.ensure_knowledge_base(config.ragflow.kb_name)
+    logger.info(f"Knowledge base '{config.ragflow.kb_name}' is ready (ID: {kb.id})")
+  except Exception as e:
+    logger.error(f"Failed to ensure knowledge base: {e}")
+    rag_client.close()
+    return None
+  return rag_client, kb
+
+
+def sync_annual_reports(config: WorkerConfig) -> bool:
+  """
+  Runs one ingestion of the configured annual report listing.
+
+  With annual_report_worker.metrics_port set, the ingestion metrics are served in
+  Prometheus text format while the run is in progress; with metrics_report_path
+  set, they are written there as a JSON report when the run ends.
+
+  Returns:
+    False if RAGFlow is unhealthy or the knowledge base is unavailable, in which
+    case nothing was uploaded; True once the ingestion ran
+  """
+  connection = connect_knowledge_base(config)
+  if connection is None:
+    return False
+  rag_client, kb = connection
+
+  # Load annual report list
+  logger.info("Loading annual report list...")
+  report_list = StreamingAnnualReportList(
+    file_path=config.china_annual_report_soures.listing_file_path,
+    base_path=config.china_annual_report_soures.base_path,
+  )
+
+  worker_config = config.annual_report_worker
+  ledger = (
+    IngestionLedger(worker_config.ledger_path) if worker_config.ledger_path else None
+  )
+  announcement_status = connect_announcement_status(config)
+  metrics = IngestionMetrics()
+  metrics_server = None
+  if worker_config.metrics_port is not None:
+    metrics_server = MetricsServer(
+      metrics.registry, port=worker_config.metrics_port, host=worker_config.metrics_host
+    ).start()
+    logger.info(f"Serving ingestion metrics on {metrics_server.address}/metrics")
+  try:
+    ingest_annual_reports(
+      rag_client,
+      kb,
+      report_list,
+      worker_config,
+      ledger=ledger,
+      metrics=metrics,
+      announcement_status=announcement_status,
+    )
+  finally:
+    if ledger is not None:
+      ledger.close()
+    rag_client.close()
+    metrics.print_summary()
+    if worker_config.metrics_report_path:
+      metrics.write_report(worker_config.metrics_report_path)
+      logger.info(f"Ingestion metrics report written to {worker_config.metrics_report_path}")
+    if metrics_server is not None:
+      metrics_server.stop()
+  return True
+
+
+def main() -> None:
+  loader: WorkerConfigLoader = WorkerConfigLoader()
+  config: WorkerConfig = loader.load()
+  sync_annual_reports(config)
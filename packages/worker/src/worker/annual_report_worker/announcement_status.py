@@ -0,0 +1,127 @@
+from typing import Dict, Optional
+from loguru import logger
+from core.db_manager import DatabaseManager
+from core.models.report_file import AnnouncementType
+from core.repos.report_file_repo import AnnouncementFileRepository, AnnouncementFileRepositoryImpl
+from worker.config import WorkerConfig
+
+
+class AnnouncementStatusRecorder:
+  """
+  Mirrors annual report uploads and parse results into china_company_announcement_file.
+
+  The RAGFlow document ID is written when a report is uploaded, the parse
+  status, chunk and token counts when its parse finishes, and both are cleared
+  when the document is removed, so that coverage questions can be answered with
+  a database query instead of asking RAGFlow.
+  Reports without an announcement row are left alone.
+
+  Recording is best effort: the first database error disables the recorder with
+  a warning, the ingestion itself carries on.
+  """
+
+  def __init__(self, db: DatabaseManager, repo: Optional[AnnouncementFileRepository] = None):
+    self.db = db
+    self.repo = repo or AnnouncementFileRepositoryImpl()
+    self.enabled = True
+
+  def _disable(self, error: Exception) -> None:
+    self.enabled = False
+    logger.warning(f"Recording RAGFlow status in the database failed, disabled for this run: {error}")
+
+  def record_upload(self, stock_code: str, year: str, document_id: str) -> None:
+    if not self.enabled:
+      return
+    try:
+      with self.db.get_session() as session, session.begin():
+        announcement = self.repo.record_ragflow_upload(
+          session, stock_code, int(year), AnnouncementType.ANNUAL_REPORT.value, document_id
+        )
+      if announcement is None:
+        logger.debug(f"No announcement row for {stock_code} {year}, RAGFlow status not recorded")
+    except Exception as e:
+      self._disable(e)
+
+  def record_existing(
+    self,
+    stock_code: str,
+    year: str,
+    document_id: str,
+    result: Optional[Dict[str, int | str]] = None,
+  ) -> None:
+    """
+    Records a report that is already in the knowledge base and not uploaded again,
+    e.g. skipped by the ledger, found by the existence check or identical to an
+    uploaded file.
+
+    Args:
+      result: Parse result of the document, None if it has not finished parsing
+    """
+    if not self.enabled:
+      return
+    try:
+      with self.db.get_session() as session, session.begin():
+        announcement = self.repo.get_by_company_code_year_type(
+          session, stock_code, int(year), AnnouncementType.ANNUAL_REPORT.value
+        )
+        if announcement is None:
+          logger.debug(f"No announcement row for {stock_code} {year}, RAGFlow status not recorded")
+          return
+        # 已记录同一文档及解析状态的行不再写入，重复运行不改动上传时间
+        changed = announcement.ragflow_document_id != document_id
+        if changed:
+          self.repo.record_ragflow_upload(
+            session, stock_code, int(year), AnnouncementType.ANNUAL_REPORT.value, document_id
+          )
+        if result is not None and (changed or announcement.parse_status != result["status"]):
+          self.repo.record_ragflow_parse(
+            session,
+            document_id,
+            str(result["status"]),
+            int(result.get("chunk_count") or 0),
+            int(result.get("token_count") or 0),
+          )
+    except Exception as e:
+      self._disable(e)
+
+  def record_parse(self, document_id: str, result: Dict[str, int | str]) -> None:
+    if not self.enabled:
+      return
+    try:
+      with self.db.get_session() as session, session.begin():
+        self.repo.record_ragflow_parse(
+          session,
+          document_id,
+          str(result["status"]),
+          int(result.get("chunk_count") or 0),
+          int(result.get("token_count") or 0),
+        )
+    except Exception as e:
+      self._disable(e)
+
+  def record_removal(self, document_id: str) -> None:
+    """Clears the RAGFlow status of the announcement whose document was deleted."""
+    if not self.enabled:
+      return
+    try:
+      with self.db.get_session() as session, session.begin():
+        self.repo.clear_ragflow_document(session, document_id)
+    except Exception as e:
+      self._disable(e)
+
+
+
+def connect_announcement_status(config: WorkerConfig) -> Optional[AnnouncementStatusRecorder]:
+  """
+  Returns a recorder on the configured database, or None if recording is
+  disabled or the database is unreachable.
+  """
+  if not config.annual_report_worker.record_announcement_status:
+    return None
+  db = DatabaseManager()
+  try:
+    db.init(config.database.url)
+  except Exception as e:
+    logger.warning(f"Database unavailable, RAGFlow status of announcements will not be recorded: {e}")
+    return None
+  return AnnouncementStatusRecorder(db)
@@ -0,0 +1,287 @@
+"""
+Ingestion benchmark against the local RAGFlow stand-in.
+
+Generates synthetic annual report PDFs, runs ingest_annual_reports against a
+FakeRAGFlowServer with optional simulated latency and reports files per
+second, per-file latency (from being checked to parsed) and peak memory.
+
+Usage:
+  uv run --package worker annual_report_benchmark --files 500 --size-kb 512 --pipelined
+  uv run --package worker annual_report_benchmark --upload-latency 0.3 --json .worker/benchmark.json
+"""
+
+import argparse
+import json
+import math
+import random
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from pypdf import PdfWriter
+from core.config.models import AnnualReportWorkerConfig
+from core.integration.ragflow.client import RAGFlowClient
+from core.testing.fake_ragflow import (
+  FakeRAGFlowServer,
+  SimulatedLatency,
+  add_latency_arguments,
+  latency_from_args,
+)
+from core.models.china_mainland_listed_company import StreamingAnnualReportList
+from worker.annual_report_worker import ingest_annual_reports
+from worker.annual_report_worker.ledger import IngestionLedger
+from worker.annual_report_worker.metrics import IngestionMetrics
+
+
+class _RecordingMetrics(IngestionMetrics):
+  """IngestionMetrics that also keeps the latency of every successfully parsed file for exact percentiles."""
+
+  def __init__(self):
+    super().__init__()
+    self.file_latencies: List[float] = []
+
+  def observe_file(self, seconds: float, result: Dict[str, Any]) -> None:
+    super().observe_file(seconds, result)
+    if result.get("status") == "success":
+      self.file_latencies.append(seconds)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+  """Nearest-rank percentile, q in [0, 1]."""
+  if not values:
+    return None
+  ordered = sorted(values)
+  return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def generate_reports(
+  directory: str | Path, count: int, size_kb: int = 256, pages: int = 4, seed: int = 0
+) -> Path:
+  """
+  Writes `count` synthetic report PDFs and a listing of them.
+
+  Every file has `pages` blank pages and is padded to roughly `size_kb` with an
+  embedded attachment of random bytes, so no two files are identical and
+  deduplication does not shortcut the upload.
+
+  Returns:
+    Path of the listing JSON; file paths in it are relative to `directory`
+  """
+  directory = Path(directory)
+  rng = random.Random(seed)
+  listing = []
+  for i in range(count):
+    code = f"{600000 + i:06d}"
+    year = str(2015 + i % 10)
+    relative_path = f"{code}/{code}_{year}年年度报告.pdf"
+    file_path = directory / relative_path
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    writer = PdfWriter()
+    for _ in range(max(pages, 1)):
+      writer.add_blank_page(width=595, height=842)
+    writer.add_metadata({"/Title": f"{code} {year} 年度报告"})
+    writer.add_attachment("padding.bin", rng.randbytes(size_kb * 1024))
+    with file_path.open("wb") as f:
+      writer.write(f)
+
+    listing.append({
+      "code": code,
+      "full_name": f"基准测试公司{i}",
+      "short_name": f"基准{i}",
+      "files": [{"year": year, "file_path": relative_path}],
+    })
+
+  listing_path = directory / "listing.json"
+  listing_path.write_text(json.dumps(listing, ensure_ascii=False))
+  return listing_path
+
+
+def run_benchmark(
+  files: int,
+  worker_config: AnnualReportWorkerConfig,
+  size_kb: int = 256,
+  pages: int = 4,
+  parse_seconds: float = 0.2,
+  latency: Optional[SimulatedLatency] = None,
+  work_dir: Optional[str | Path] = None,
+  trace_memory: bool = False,
+) -> Dict[str, Any]:
+  """
+  Runs one ingestion of synthetic reports against a fake RAGFlow.
+
+  Args:
+    files: Number of report files to generate and ingest
+    worker_config: Tuning options of the ingestion
+    size_kb: Approximate size of each file
+    pages: Pages per file
+    parse_seconds: Time the fake server takes to parse a document
+    latency: Optional simulated request latency
+    work_dir: Directory for the files and the ledger, a temporary one if omitted
+    trace_memory: Also measure the peak of Python allocations with tracemalloc,
+      which slows the run down
+
+  Returns:
+    JSON-ready dict with the parameters, files/s, per-file latency percentiles,
+    peak memory and the full ingestion metrics summary. Only files whose
+    document was parsed successfully count as parsed
+  """
+  temporary = work_dir is None
+  work_dir = Path(work_dir or tempfile.mkdtemp(prefix="zhitou-benchmark-"))
+  try:
+    generate_started = time.monotonic()
+    listing_path = generate_reports(work_dir / "reports", files, size_kb, pages)
+    generate_seconds = time.monotonic() - generate_started
+
+    metrics = _RecordingMetrics()
+    ledger = IngestionLedger(work_dir / "ledger.sqlite3") if worker_config.ledger_path else None
+    with FakeRAGFlowServer(parse_seconds=parse_seconds, latency=latency) as server:
+      rag_client = RAGFlowClient(api_key=server.api_key, base_url=server.base_url)
+      try:
+        kb = rag_client.ensure_knowledge_base("benchmark")
+        if trace_memory:
+          tracemalloc.start()
+        started = time.monotonic()
+        ingest_annual_reports(
+          rag_client,
+          kb,
+          StreamingAnnualReportList(listing_path, base_path=str(work_dir / "reports")),
+          worker_config,
+          ledger=ledger,
+          metrics=metrics,
+        )
+        elapsed = time.monotonic() - started
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+      finally:
+        if trace_memory:
+          tracemalloc.stop()
+        rag_client.close()
+        if ledger is not None:
+          ledger.close()
+
+    latencies = metrics.file_latencies
+    summary = metrics.summary()
+    return {
+      "parameters": {
+        "files": files,
+        "size_kb": size_kb,
+        "pages": pages,
+        "parse_seconds": parse_seconds,
+        "latency": vars(latency) if latency is not None else None,
+        "worker": worker_config.model_dump(),
+      },
+      "generate_seconds": generate_seconds,
+      "elapsed_seconds": elapsed,
+      "files_parsed": len(latencies),
+      "files_failed": files - len(latencies),
+      "files_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+      "file_latency_seconds": {
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "max": max(latencies) if latencies else None,
+      },
+      # Linux 上 ru_maxrss 的单位是 KiB，统计的是整个进程生命周期的峰值
+      "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+      "peak_traced_mb": traced_peak / 1024 / 1024 if traced_peak is not None else None,
+      "metrics": summary,
+    }
+  finally:
+    if temporary:
+      shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def print_benchmark(result: Dict[str, Any]) -> None:
+  parameters = result["parameters"]
+  latency = result["file_latency_seconds"]
+
+  def seconds(value: Optional[float]) -> str:
+    return f"{value:.3f}s" if value is not None else "-"
+
+  print("\nIngestion benchmark:")
+  print(
+    f"  Files: {parameters['files']} x ~{parameters['size_kb']} KiB, "
+    f"{parameters['pages']} pages (generated in {result['generate_seconds']:.1f}s)"
+  )
+  print(f"  Pipelined: {parameters['worker']['pipelined']}, fake parse time: {parameters['parse_seconds']}s")
+  print(
+    f"  Parsed: {result['files_parsed']} files in {result['elapsed_seconds']:.2f}s "
+    f"({result['files_failed']} not parsed)"
+  )
+  print(f"  Throughput: {result['files_per_second']:.2f} files/s")
+  print(
+    f"  Per-file latency: p50={seconds(latency['p50'])} p99={seconds(latency['p99'])} "
+    f"max={seconds(latency['max'])}"
+  )
+  print(f"  Peak RSS: {result['peak_rss_mb']:.1f} MiB")
+  if result["peak_traced_mb"] is not None:
+    print(f"  Peak Python allocations: {result['peak_traced_mb']:.1f} MiB")
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(
+    description="Benchmark annual report ingestion against a local RAGFlow stand-in"
+  )
+  parser.add_argument("--files", type=int, default=200, help="Number of synthetic reports")
+  parser.add_argument("--size-kb", type=int, default=256, help="Approximate size of each report")
+  parser.add_argument("--pages", type=int, default=4, help="Pages per report")
+  parser.add_argument("--parse-seconds", type=float, default=0.2, help="Fake parse time per document")
+  parser.add_argument(
+    "--pipelined", action=argparse.BooleanOptionalAction, default=True,
+    help="Parse while uploading (default) or after all uploads",
+  )
+  parser.add_argument("--upload-concurrency", type=int, help="Initial concurrent upload requests")
+  parser.add_argument("--max-upload-concurrency", type=int, help="Upper bound of concurrent upload requests")
+  parser.add_argument("--parse-window", type=int, help="Initial parse window")
+  parser.add_argument("--poll-interval", type=float, default=0.2, help="Parse status poll interval")
+  parser.add_argument("--no-ledger", action="store_true", help="Run without the ingestion ledger")
+  parser.add_argument("--no-validation", action="store_true", help="Skip PDF validation")
+  parser.add_argument("--trace-memory", action="store_true", help="Also measure Python allocations (slower)")
+  parser.add_argument("--work-dir", help="Keep the generated files and ledger here instead of a temp dir")
+  parser.add_argument("--json", help="Write the result as JSON to this path")
+  add_latency_arguments(parser)
+  args = parser.parse_args()
+
+  overrides: Dict[str, Any] = {
+    "pipelined": args.pipelined,
+    "parse_poll_interval": args.poll_interval,
+    "pdf_validation": not args.no_validation,
+    "record_announcement_status": False,
+  }
+  if args.no_ledger:
+    overrides["ledger_path"] = None
+  if args.upload_concurrency:
+    overrides["upload_concurrency"] = args.upload_concurrency
+  if args.max_upload_concurrency:
+    overrides["max_upload_concurrency"] = args.max_upload_concurrency
+  if args.parse_window:
+    overrides["parse_window"] = args.parse_window
+  worker_config = AnnualReportWorkerConfig(**overrides)
+
+  result = run_benchmark(
+    files=args.files,
+    worker_config=worker_config,
+    size_kb=args.size_kb,
+    pages=args.pages,
+    parse_seconds=args.parse_seconds,
+    latency=latency_from_args(args),
+    work_dir=args.work_dir,
+    trace_memory=args.trace_memory,
+  )
+  print_benchmark(result)
+  if args.json:
+    path = Path(args.json)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2, ensure_ascii=False, default=str))
+    print(f"  Result written to {path}")
+  if result["files_failed"]:
+    # 有文件未上传或解析失败时结果没有意义，以非零状态退出
+    raise SystemExit(
+      f"Benchmark failed: only {result['files_parsed']} of {args.files} files were parsed successfully"
+    )
+
+
+if __name__ == "__main__":
+  main()
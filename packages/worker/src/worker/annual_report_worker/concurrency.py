@@ -0,0 +1,214 @@
+import json
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+import requests
+from core.config.models import AnnualReportWorkerConfig
+from core.integration.ragflow.transport import RETRYABLE_STATUS_CODES
+
+
+def is_overload_error(error: BaseException) -> bool:
+  """
+  True if an error means RAGFlow is overloaded rather than the request being bad.
+
+  Timeouts, connection errors and 429/5xx responses count as overload. The SDK
+  parses every response as JSON, so the HTML error page of a gateway returning
+  429 or 5xx surfaces as a JSON decode error and counts as overload as well.
+  """
+  if isinstance(
+    error,
+    (
+      requests.exceptions.Timeout,
+      requests.exceptions.ConnectionError,
+      requests.exceptions.JSONDecodeError,
+      json.JSONDecodeError,
+      TimeoutError,
+    ),
+  ):
+    return True
+  if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+    return error.response.status_code in RETRYABLE_STATUS_CODES
+  return False
+
+
+# RAGFlow 解析失败时 progress_msg 中表示后端过载的内容：超时、连接错误、限流和 5xx
+_OVERLOAD_MESSAGE = re.compile(
+  r"\b(429|50[234])\b|timed? ?out|too many requests|rate limit|connection (error|refused|reset)",
+  re.IGNORECASE,
+)
+
+
+def is_overload_message(message: Optional[str]) -> bool:
+  """
+  True if the progress message of a failed parse means RAGFlow or its model
+  backend was overloaded, rather than the document being unparseable.
+  """
+  return bool(message) and _OVERLOAD_MESSAGE.search(message) is not None
+
+
+class AIMDController:
+  """
+  Additive-increase / multiplicative-decrease concurrency limit.
+
+  Every successful request adds `1 / limit` to the limit, so the limit grows by
+  about one per round of requests while RAGFlow stays healthy. An overload
+  signal (timeout, 429, 5xx, or a success slower than `latency_target`)
+  multiplies the limit by `decrease_factor`. Decreases are applied at most once
+  per `decrease_cooldown` seconds, so a burst of failures from the same round
+  backs off once instead of collapsing the limit to the minimum.
+
+  With `adaptive=False` the limit stays at `initial` and only the counters are
+  kept, so the same progress output and metrics work with a fixed concurrency.
+
+  Thread-safe: the upload loop and the parse thread each own a controller, but
+  `snapshot()` may be called from anywhere.
+  """
+
+  def __init__(
+    self,
+    name: str,
+    initial: int,
+    minimum: int = 1,
+    maximum: int = 32,
+    decrease_factor: float = 0.5,
+    latency_target: Optional[float] = None,
+    decrease_cooldown: float = 5.0,
+    adaptive: bool = True,
+    throughput_window: float = 60.0,
+  ):
+    """
+    Args:
+      name: Name used in logs and metrics, e.g. "upload" or "parse"
+      initial: Starting limit
+      minimum: Lower bound of the limit
+      maximum: Upper bound of the limit
+      decrease_factor: Factor applied to the limit on overload
+      latency_target: Successes slower than this many seconds count as overload,
+        None disables the latency check
+      decrease_cooldown: Minimum seconds between two decreases
+      adaptive: False keeps the limit fixed at `initial`
+      throughput_window: Seconds of completions used for the throughput rate
+    """
+    self.name = name
+    self.minimum = max(1, minimum)
+    self.maximum = max(self.minimum, maximum)
+    self.decrease_factor = decrease_factor
+    self.latency_target = latency_target
+    self.decrease_cooldown = decrease_cooldown
+    self.adaptive = adaptive
+    self.throughput_window = throughput_window
+
+    self._lock = threading.Lock()
+    self._limit = float(min(self.maximum, max(self.minimum, initial)))
+    self._last_decrease = 0.0
+    self._completions: "deque[tuple[float, int]]" = deque()
+    self.successes = 0
+    self.overloads = 0
+    self.items = 0
+
+  @property
+  def limit(self) -> int:
+    with self._lock:
+      return int(self._limit)
+
+  def on_success(self, latency: Optional[float] = None, items: int = 1) -> None:
+    """
+    Records a successful request.
+
+    Args:
+      latency: Seconds the request took
+      items: Number of files or documents the request completed
+    """
+    if latency is not None and self.latency_target is not None and latency > self.latency_target:
+      self._record_completion(items)
+      self.on_overload()
+      return
+
+    with self._lock:
+      self.successes += 1
+      if self.adaptive:
+        self._limit = min(self.maximum, self._limit + 1 / self._limit)
+    self._record_completion(items)
+
+  def on_overload(self) -> None:
+    """Records an overload signal and backs off multiplicatively."""
+    now = time.monotonic()
+    with self._lock:
+      self.overloads += 1
+      if not self.adaptive or now - self._last_decrease < self.decrease_cooldown:
+        return
+      self._last_decrease = now
+      self._limit = max(
+        self.minimum, math.floor(self._limit * self.decrease_factor)
+      )
+
+  def on_error(self, error: BaseException) -> None:
+    """Backs off if the error is an overload signal, otherwise ignores it."""
+    if is_overload_error(error):
+      self.on_overload()
+
+  def _record_completion(self, items: int) -> None:
+    now = time.monotonic()
+    with self._lock:
+      self.items += items
+      self._completions.append((now, items))
+      while self._completions and now - self._completions[0][0] > self.throughput_window:
+        self._completions.popleft()
+
+  @property
+  def throughput(self) -> float:
+    """Completed items per second over the throughput window."""
+    now = time.monotonic()
+    with self._lock:
+      while self._completions and now - self._completions[0][0] > self.throughput_window:
+        self._completions.popleft()
+      if not self._completions:
+        return 0.0
+      elapsed = max(now - self._completions[0][0], 1.0)
+      return sum(items for _, items in self._completions) / elapsed
+
+  def snapshot(self) -> Dict[str, Any]:
+    """Current limit, counters and throughput, for progress output and metrics."""
+    throughput = self.throughput
+    with self._lock:
+      return {
+        "name": self.name,
+        "limit": int(self._limit),
+        "minimum": self.minimum,
+        "maximum": self.maximum,
+        "successes": self.successes,
+        "overloads": self.overloads,
+        "items": self.items,
+        "throughput": round(throughput, 3),
+      }
+
+
+def create_concurrency_controllers(
+  worker_config: AnnualReportWorkerConfig,
+) -> tuple[AIMDController, AIMDController]:
+  """
+  Creates the upload and parse concurrency controllers of the annual report worker.
+
+  Returns:
+    (upload, parse) controllers. The upload limit counts concurrent upload
+    requests, the parse limit is the parse window (or batch size)
+  """
+  upload = AIMDController(
+    name="upload",
+    initial=worker_config.upload_concurrency,
+    maximum=worker_config.max_upload_concurrency,
+    decrease_factor=worker_config.concurrency_decrease_factor,
+    latency_target=worker_config.upload_latency_target,
+    adaptive=worker_config.adaptive_concurrency,
+  )
+  parse = AIMDController(
+    name="parse",
+    initial=worker_config.parse_window,
+    maximum=worker_config.max_parse_window,
+    decrease_factor=worker_config.concurrency_decrease_factor,
+    adaptive=worker_config.adaptive_concurrency,
+  )
+  return upload, parse
@@ -0,0 +1,132 @@
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from worker.annual_report_worker.hashing import hash_file
+
+
+@dataclass(slots=True)
+class AliasFile:
+  """A report file whose content is byte-identical to another report file."""
+
+  file_path: str
+  stock_code: str
+  year: str
+  stat: os.stat_result
+  content_hash: str
+  alias_of: str
+
+
+class BackgroundHasher:
+  """
+  Hashes files on a thread pool so hashing runs ahead of the upload loop.
+
+  Files are submitted up front; `result()` blocks only if the hash of that file
+  is not ready yet. hashlib releases the GIL for large buffers, so threads give
+  real parallelism here.
+
+  Usage:
+    with BackgroundHasher(max_workers=4) as hasher:
+      hasher.submit(path)
+      ...
+      content_hash = hasher.result(path)
+  """
+
+  def __init__(
+    self,
+    max_workers: int = 4,
+    on_hashed: Optional[Callable[[str, float], None]] = None,
+  ):
+    """
+    Args:
+      max_workers: Number of hashing threads
+      on_hashed: Optional callback invoked from the hashing thread with
+        (file_path, seconds) after every hashed file
+    """
+    self._executor = ThreadPoolExecutor(
+      max_workers=max_workers, thread_name_prefix="report-hasher"
+    )
+    self._futures: Dict[str, Future] = {}
+    self.on_hashed = on_hashed
+
+  def __enter__(self) -> "BackgroundHasher":
+    return self
+
+  def __exit__(self, *exc) -> None:
+    self.shutdown()
+
+  def submit(self, file_path: str | Path) -> None:
+    key = str(file_path)
+    if key not in self._futures:
+      self._futures[key] = self._executor.submit(self._hash, key)
+
+  def _hash(self, file_path: str) -> str:
+    started = time.perf_counter()
+    content_hash = hash_file(file_path)
+    if self.on_hashed is not None:
+      self.on_hashed(file_path, time.perf_counter() - started)
+    return content_hash
+
+  def result(self, file_path: str | Path) -> str:
+    """Returns the content hash of a submitted file, hashing it now if it was not submitted."""
+    key = str(file_path)
+    self.submit(key)
+    return self._futures.pop(key).result()
+
+  def shutdown(self) -> None:
+    self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class DuplicateTracker:
+  """
+  Detects byte-identical report files across a listing by content hash.
+
+  The first file seen with a given hash is the canonical file and is uploaded;
+  every later file with the same hash becomes an alias of it. Aliases found
+  before the canonical upload finished are held until its document ID is known.
+  """
+
+  def __init__(self):
+    self._canonical: Dict[str, str] = {}  # content hash -> canonical file path
+    self._document_ids: Dict[str, str] = {}  # content hash -> canonical document id
+    self._pending: Dict[str, List[AliasFile]] = defaultdict(list)
+    self.alias_count = 0
+
+  def canonical_for(self, content_hash: str) -> Optional[str]:
+    """Returns the canonical file path for a hash seen earlier in this run."""
+    return self._canonical.get(content_hash)
+
+  def register(
+    self, content_hash: str, file_path: str, document_id: Optional[str] = None
+  ) -> None:
+    """Registers a file as the canonical file for its content hash."""
+    self._canonical.setdefault(content_hash, file_path)
+    if document_id is not None:
+      self._document_ids.setdefault(content_hash, document_id)
+
+  def add_alias(self, alias: AliasFile) -> Optional[str]:
+    """
+    Adds an alias of a canonical file.
+
+    Returns:
+      The canonical document ID if it is already known, otherwise None and the
+      alias is kept until `resolve` or `fail` is called for its hash
+    """
+    self.alias_count += 1
+    document_id = self._document_ids.get(alias.content_hash)
+    if document_id is None:
+      self._pending[alias.content_hash].append(alias)
+    return document_id
+
+  def resolve(self, content_hash: str, document_id: str) -> List[AliasFile]:
+    """Marks the canonical file as uploaded and returns the aliases waiting for it."""
+    self._document_ids[content_hash] = document_id
+    return self._pending.pop(content_hash, [])
+
+  def fail(self, content_hash: str) -> List[AliasFile]:
+    """Drops the canonical file after a failed upload and returns its waiting aliases."""
+    self._canonical.pop(content_hash, None)
+    return self._pending.pop(content_hash, [])
@@ -0,0 +1,21 @@
+import hashlib
+from pathlib import Path
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str | Path) -> str:
+  """
+  Computes the SHA-256 content hash of a file, reading it in 1 MiB chunks.
+
+  Args:
+    file_path: Path to the file
+
+  Returns:
+    Hex digest of the file content
+  """
+  digest = hashlib.sha256()
+  with open(file_path, "rb") as f:
+    while chunk := f.read(_CHUNK_SIZE):
+      digest.update(chunk)
+  return digest.hexdigest()
@@ -0,0 +1,489 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_ledger (
+  file_path TEXT PRIMARY KEY,
+  stock_code TEXT NOT NULL,
+  year TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  mtime_ns INTEGER NOT NULL,
+  content_hash TEXT,
+  document_id TEXT,
+  upload_status TEXT NOT NULL,
+  parse_status TEXT,
+  chunk_count INTEGER NOT NULL DEFAULT 0,
+  token_count INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  alias_of TEXT,
+  parse_attempts INTEGER NOT NULL DEFAULT 0,
+  parse_error TEXT,
+  last_parse_at REAL,
+  updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS parse_attempt (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  document_id TEXT NOT NULL,
+  status TEXT NOT NULL,
+  error TEXT,
+  chunk_count INTEGER NOT NULL DEFAULT 0,
+  token_count INTEGER NOT NULL DEFAULT 0,
+  recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_parse_attempt_document_id ON parse_attempt (document_id, recorded_at);
+CREATE INDEX IF NOT EXISTS ix_ingestion_ledger_document_id ON ingestion_ledger (document_id);
+CREATE INDEX IF NOT EXISTS ix_ingestion_ledger_content_hash ON ingestion_ledger (content_hash);
+"""
+
+# 旧版本台账缺少的列: (列名, 列定义)
+_ADDED_COLUMNS = [
+  ("alias_of", "TEXT"),
+  ("parse_attempts", "INTEGER NOT NULL DEFAULT 0"),
+  ("parse_error", "TEXT"),
+  ("last_parse_at", "REAL"),
+]
+
+
+@dataclass(slots=True)
+class LedgerEntry:
+  """One row of the ingestion ledger, i.e. the last known state of a local file."""
+
+  file_path: str
+  stock_code: str
+  year: str
+  size: int
+  mtime_ns: int
+  content_hash: Optional[str]
+  document_id: Optional[str]
+  upload_status: str  # "uploaded" | "failed" | "quarantined"
+  parse_status: Optional[str]  # None (not finished) | "success" | "failed" | "cancelled"
+  chunk_count: int
+  token_count: int
+  error: Optional[str]
+  alias_of: Optional[str]  # 内容相同的已上传文件路径，本文件未单独上传
+  parse_attempts: int
+  parse_error: Optional[str]
+  last_parse_at: Optional[float]  # 最近一次记录解析结果的时间，重试退避从此开始计算
+  updated_at: float
+
+  def is_unchanged(self, stat: os.stat_result) -> bool:
+    """True if size and mtime still match the recorded ones."""
+    return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+  @property
+  def is_uploaded(self) -> bool:
+    return self.upload_status == "uploaded" and self.document_id is not None
+
+  @property
+  def is_quarantined(self) -> bool:
+    """True if the file failed validation; `error` holds the reason."""
+    return self.upload_status == "quarantined"
+
+
+@dataclass(slots=True)
+class ParseAttempt:
+  """One recorded parse outcome of a document."""
+
+  id: int
+  document_id: str
+  status: str  # "success" | "failed" | "cancelled"
+  error: Optional[str]
+  chunk_count: int
+  token_count: int
+  recorded_at: float
+
+
+class IngestionLedger:
+  """
+  Local SQLite ledger of the annual report ingestion.
+
+  Records, per local file, its size, mtime, content hash, RAGFlow document ID and
+  parse status. A file whose size and mtime match an uploaded entry is skipped
+  without any network call, and an interrupted run resumes where it stopped:
+  uploaded files are not uploaded again and documents whose parsing never
+  finished or was cancelled are parsed again. Failed and cancelled parses keep
+  their error and a per-document history of attempts, which the parse retry
+  command works off.
+
+  The connection is shared between the upload loop and the parse thread, so all
+  access is serialized with a lock.
+  """
+
+  def __init__(self, db_path: str | Path):
+    """
+    Args:
+      db_path: Path of the SQLite file, created with its parent directory if missing
+    """
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    self.db_path = str(db_path)
+    self._lock = threading.Lock()
+    self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+    self._conn.row_factory = sqlite3.Row
+    with self._lock, self._conn:
+      self._conn.execute("PRAGMA journal_mode=WAL")
+      self._conn.executescript(_SCHEMA)
+      existing = {
+        row["name"] for row in self._conn.execute("PRAGMA table_info(ingestion_ledger)")
+      }
+      for name, definition in _ADDED_COLUMNS:
+        if name not in existing:
+          self._conn.execute(f"ALTER TABLE ingestion_ledger ADD COLUMN {name} {definition}")
+
+  def close(self) -> None:
+    with self._lock:
+      self._conn.close()
+
+  def get(self, file_path: str) -> Optional[LedgerEntry]:
+    """Returns the entry of a file, or None if the file was never seen."""
+    with self._lock:
+      row = self._conn.execute(
+        "SELECT * FROM ingestion_ledger WHERE file_path = ?", (file_path,)
+      ).fetchone()
+    return None if row is None else LedgerEntry(**dict(row))
+
+  def record_upload(
+    self,
+    file_path: str,
+    stock_code: str,
+    year: str,
+    stat: os.stat_result,
+    content_hash: Optional[str],
+    document_id: str,
+  ) -> None:
+    """Records a successful upload. The parse status is reset until parsing finishes."""
+    self._upsert(
+      file_path=file_path,
+      stock_code=stock_code,
+      year=year,
+      size=stat.st_size,
+      mtime_ns=stat.st_mtime_ns,
+      content_hash=content_hash,
+      document_id=document_id,
+      upload_status="uploaded",
+      parse_status=None,
+      chunk_count=0,
+      token_count=0,
+      error=None,
+      alias_of=None,
+      parse_attempts=0,
+      last_parse_at=None,
+      parse_error=None,
+    )
+
+  def record_alias(
+    self,
+    file_path: str,
+    stock_code: str,
+    year: str,
+    stat: os.stat_result,
+    content_hash: str,
+    document_id: str,
+    alias_of: str,
+  ) -> None:
+    """
+    Records a file that is byte-identical to an already uploaded file.
+
+    The alias shares the document ID of the uploaded file, so later parse results
+    of that document are reflected on the alias as well.
+    """
+    self._upsert(
+      file_path=file_path,
+      stock_code=stock_code,
+      year=year,
+      size=stat.st_size,
+      mtime_ns=stat.st_mtime_ns,
+      content_hash=content_hash,
+      document_id=document_id,
+      upload_status="uploaded",
+      parse_status=None,
+      chunk_count=0,
+      token_count=0,
+      error=None,
+      alias_of=alias_of,
+      parse_attempts=0,
+      last_parse_at=None,
+      parse_error=None,
+    )
+
+  def record_existing(
+    self,
+    file_path: str,
+    stock_code: str,
+    year: str,
+    stat: os.stat_result,
+    content_hash: Optional[str],
+    document_id: str,
+    parse_status: Optional[str],
+    chunk_count: int = 0,
+    token_count: int = 0,
+  ) -> None:
+    """
+    Records a file whose report was already in the knowledge base, e.g. uploaded
+    by another machine, so later runs skip it without checking RAGFlow again.
+
+    Args:
+      parse_status: Parse status of the existing document; None if it has not
+        finished parsing, so it is resumed like an interrupted upload
+      chunk_count: Chunk count of the existing document
+      token_count: Token count of the existing document
+    """
+    self._upsert(
+      file_path=file_path,
+      stock_code=stock_code,
+      year=year,
+      size=stat.st_size,
+      mtime_ns=stat.st_mtime_ns,
+      content_hash=content_hash,
+      document_id=document_id,
+      upload_status="uploaded",
+      parse_status=parse_status,
+      chunk_count=chunk_count,
+      token_count=token_count,
+      error=None,
+      alias_of=None,
+      parse_attempts=0,
+      last_parse_at=None,
+      parse_error=None,
+    )
+
+  def record_upload_failure(
+    self,
+    file_path: str,
+    stock_code: str,
+    year: str,
+    stat: os.stat_result,
+    content_hash: Optional[str],
+    error: str,
+  ) -> None:
+    """Records a failed upload, so the file is retried on the next run."""
+    self._upsert(
+      file_path=file_path,
+      stock_code=stock_code,
+      year=year,
+      size=stat.st_size,
+      mtime_ns=stat.st_mtime_ns,
+      content_hash=content_hash,
+      document_id=None,
+      upload_status="failed",
+      parse_status=None,
+      chunk_count=0,
+      token_count=0,
+      error=error,
+      alias_of=None,
+      parse_attempts=0,
+      last_parse_at=None,
+      parse_error=None,
+    )
+
+  def record_quarantine(
+    self,
+    file_path: str,
+    stock_code: str,
+    year: str,
+    stat: os.stat_result,
+    reason: str,
+  ) -> None:
+    """Records a file that failed PDF validation. It is not validated again until it changes."""
+    self._upsert(
+      file_path=file_path,
+      stock_code=stock_code,
+      year=year,
+      size=stat.st_size,
+      mtime_ns=stat.st_mtime_ns,
+      content_hash=None,
+      document_id=None,
+      upload_status="quarantined",
+      parse_status=None,
+      chunk_count=0,
+      token_count=0,
+      error=reason,
+      alias_of=None,
+      parse_attempts=0,
+      last_parse_at=None,
+      parse_error=None,
+    )
+
+  def quarantined(self) -> List[LedgerEntry]:
+    """Entries of files that failed PDF validation."""
+    with self._lock:
+      rows = self._conn.execute(
+        "SELECT * FROM ingestion_ledger WHERE upload_status = 'quarantined' ORDER BY file_path"
+      ).fetchall()
+    return [LedgerEntry(**dict(row)) for row in rows]
+
+  def failed_uploads(self) -> List[LedgerEntry]:
+    """Entries of files whose last upload failed; the next ingestion uploads them again."""
+    with self._lock:
+      rows = self._conn.execute(
+        "SELECT * FROM ingestion_ledger WHERE upload_status = 'failed' ORDER BY file_path"
+      ).fetchall()
+    return [LedgerEntry(**dict(row)) for row in rows]
+
+  def delete(self, file_path: str) -> bool:
+    """Forgets a file, e.g. one removed from the report directory. Returns whether it had an entry."""
+    with self._lock, self._conn:
+      cursor = self._conn.execute("DELETE FROM ingestion_ledger WHERE file_path = ?", (file_path,))
+    return cursor.rowcount > 0
+
+  def touch(self, file_path: str, stat: os.stat_result) -> None:
+    """Updates size and mtime of a file whose content did not change."""
+    with self._lock, self._conn:
+      self._conn.execute(
+        "UPDATE ingestion_ledger SET size = ?, mtime_ns = ?, updated_at = ? WHERE file_path = ?",
+        (stat.st_size, stat.st_mtime_ns, time.time(), file_path),
+      )
+
+  def record_parse_result(
+    self, document_id: str, result: Dict[str, int | str]
+  ) -> None:
+    """
+    Records the parse result of a document and appends it to its parse history.
+
+    Args:
+      document_id: RAGFlow document ID
+      result: Result dict as produced by the parse stage
+        (status, chunk_count, token_count and, for failures, an optional error)
+    """
+    now = time.time()
+    status = result["status"]
+    error = result.get("error") if status != "success" else None
+    with self._lock, self._conn:
+      self._conn.execute(
+        """
+        UPDATE ingestion_ledger
+        SET parse_status = ?, chunk_count = ?, token_count = ?, parse_error = ?,
+          parse_attempts = parse_attempts + 1, last_parse_at = ?, updated_at = ?
+        WHERE document_id = ?
+        """,
+        (
+          status,
+          result.get("chunk_count", 0),
+          result.get("token_count", 0),
+          error,
+          now,
+          now,
+          document_id,
+        ),
+      )
+      self._conn.execute(
+        """
+        INSERT INTO parse_attempt (document_id, status, error, chunk_count, token_count, recorded_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (
+          document_id,
+          status,
+          error,
+          result.get("chunk_count", 0),
+          result.get("token_count", 0),
+          now,
+        ),
+      )
+
+  def find_uploaded_by_hash(self, content_hash: str) -> Optional[LedgerEntry]:
+    """Returns an uploaded, non-alias entry with the given content hash, if any."""
+    with self._lock:
+      row = self._conn.execute(
+        """
+        SELECT * FROM ingestion_ledger
+        WHERE content_hash = ? AND upload_status = 'uploaded'
+          AND document_id IS NOT NULL AND alias_of IS NULL
+        LIMIT 1
+        """,
+        (content_hash,),
+      ).fetchone()
+    return None if row is None else LedgerEntry(**dict(row))
+
+  def promote_alias(self, document_id: str) -> Optional[str]:
+    """
+    Makes one alias of a document its uploaded file, e.g. when the file the
+    document was uploaded from changed and was uploaded again.
+
+    The aliases still hold the content of the document, so the document stays in
+    the knowledge base and the other aliases are re-pointed to the promoted file.
+
+    Returns:
+      File path of the promoted alias, or None if the document has no aliases
+    """
+    with self._lock, self._conn:
+      rows = self._conn.execute(
+        """
+        SELECT file_path FROM ingestion_ledger
+        WHERE document_id = ? AND alias_of IS NOT NULL AND upload_status = 'uploaded'
+        ORDER BY file_path
+        """,
+        (document_id,),
+      ).fetchall()
+      if not rows:
+        return None
+      promoted = rows[0]["file_path"]
+      now = time.time()
+      self._conn.execute(
+        "UPDATE ingestion_ledger SET alias_of = NULL, updated_at = ? WHERE file_path = ?",
+        (now, promoted),
+      )
+      self._conn.execute(
+        """
+        UPDATE ingestion_ledger SET alias_of = ?, updated_at = ?
+        WHERE document_id = ? AND alias_of IS NOT NULL
+        """,
+        (promoted, now, document_id),
+      )
+    return promoted
+
+  def unparsed_document_ids(self) -> List[str]:
+    """Document IDs that were uploaded but not parsed yet, or whose parsing was cancelled."""
+    with self._lock:
+      rows = self._conn.execute(
+        """
+        SELECT document_id FROM ingestion_ledger
+        WHERE upload_status = 'uploaded' AND document_id IS NOT NULL AND alias_of IS NULL
+          AND (parse_status IS NULL OR parse_status = 'cancelled')
+        ORDER BY updated_at
+        """
+      ).fetchall()
+    return [row["document_id"] for row in rows]
+
+  def failed_parses(self) -> List[LedgerEntry]:
+    """Uploaded, non-alias entries whose last parse failed or was cancelled."""
+    with self._lock:
+      rows = self._conn.execute(
+        """
+        SELECT * FROM ingestion_ledger
+        WHERE upload_status = 'uploaded' AND document_id IS NOT NULL AND alias_of IS NULL
+          AND parse_status IN ('failed', 'cancelled')
+        ORDER BY updated_at
+        """
+      ).fetchall()
+    return [LedgerEntry(**dict(row)) for row in rows]
+
+  def parse_history(self, document_id: Optional[str] = None) -> List[ParseAttempt]:
+    """Parse attempts of one document, or of all documents, oldest first."""
+    with self._lock:
+      if document_id is None:
+        rows = self._conn.execute(
+          "SELECT * FROM parse_attempt ORDER BY document_id, recorded_at"
+        ).fetchall()
+      else:
+        rows = self._conn.execute(
+          "SELECT * FROM parse_attempt WHERE document_id = ? ORDER BY recorded_at",
+          (document_id,),
+        ).fetchall()
+    return [ParseAttempt(**dict(row)) for row in rows]
+
+  def _upsert(self, **values) -> None:
+    values["updated_at"] = time.time()
+    columns = ", ".join(values)
+    placeholders = ", ".join(f":{k}" for k in values)
+    updates = ", ".join(f"{k} = excluded.{k}" for k in values if k != "file_path")
+    with self._lock, self._conn:
+      self._conn.execute(
+        f"INSERT INTO ingestion_ledger ({columns}) VALUES ({placeholders}) "
+        f"ON CONFLICT(file_path) DO UPDATE SET {updates}",
+        values,
+      )
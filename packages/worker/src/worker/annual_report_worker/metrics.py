@@ -0,0 +1,202 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from core.integration.ragflow.client import AnnualReportUpload, BatchUploadResult
+from worker.annual_report_worker.concurrency import AIMDController
+from worker.metrics import MetricsRegistry
+
+STAGES = ("validate", "hash", "upload", "metadata", "parse")
+
+
+class IngestionMetrics:
+  """
+  Throughput and latency metrics of an annual report ingestion run.
+
+  Every stage (validate, hash, upload, metadata, parse) records a latency
+  histogram and ok/error operation counts; uploaded bytes, parsed documents,
+  chunks and tokens are counted so that rates per second can be derived. The registry can be
+  scraped while the run is in progress through a MetricsServer, and `report()`
+  gives the same data plus the derived rates as a JSON-ready dict at the end.
+
+  Histogram observations are:
+    validate: one file checked for being a usable PDF
+    hash: one file hashed
+    upload: one upload request (a batch of files)
+    metadata: one metadata update of an uploaded document
+    parse: one document, from parse start to terminal state
+
+  `file_seconds` observes every uploaded file end to end, from being checked
+  by the upload loop until its document reached a terminal parse state.
+  """
+
+  def __init__(self, registry: Optional[MetricsRegistry] = None):
+    self.registry = registry or MetricsRegistry(namespace="zhitou_ingestion")
+    self._controllers: List[AIMDController] = []
+
+    self.stage_seconds = self.registry.histogram(
+      "stage_seconds", "Duration of one operation per ingestion stage", ["stage"]
+    )
+    self.file_seconds = self.registry.histogram(
+      "file_seconds", "Time from a report file being checked until its document is parsed"
+    )
+    self.operations = self.registry.counter(
+      "operations_total", "Operations per ingestion stage by result", ["stage", "result"]
+    )
+    self.bytes = self.registry.counter(
+      "bytes_total", "Bytes hashed and uploaded", ["stage"]
+    )
+    self.files = self.registry.gauge(
+      "files", "Report files of the current run by outcome", ["outcome"]
+    )
+    self.documents_parsed = self.registry.counter(
+      "parsed_documents_total", "Documents that reached a terminal parse state", ["status"]
+    )
+    self.chunks = self.registry.counter("chunks_total", "Chunks created by successful parses")
+    self.tokens = self.registry.counter("tokens_total", "Tokens processed by successful parses")
+    self.registry.gauge(
+      "concurrency_limit",
+      "Current limit of the adaptive concurrency controllers",
+      ["stage"],
+      callback=lambda: [((c.name,), c.limit) for c in self._controllers],
+    )
+    self.registry.gauge(
+      "concurrency_throughput",
+      "Items per second completed by the adaptive concurrency controllers",
+      ["stage"],
+      callback=lambda: [((c.name,), c.throughput) for c in self._controllers],
+    )
+
+  def watch_concurrency(self, *controllers: AIMDController) -> None:
+    """Exposes the limit and throughput of the given controllers as gauges."""
+    for controller in controllers:
+      if controller not in self._controllers:
+        self._controllers.append(controller)
+
+  def observe_validation(self, file_path: str, reason: Optional[str], seconds: float) -> None:
+    self.stage_seconds.observe(seconds, stage="validate")
+    self.operations.inc(stage="validate", result="ok" if reason is None else "error")
+
+  def observe_hash(self, file_path: str, seconds: float) -> None:
+    self.stage_seconds.observe(seconds, stage="hash")
+    self.operations.inc(stage="hash", result="ok")
+    try:
+      self.bytes.inc(os.path.getsize(file_path), stage="hash")
+    except OSError:
+      pass
+
+  def observe_upload(self, batch: List[AnnualReportUpload], result: BatchUploadResult) -> None:
+    """Records an upload request that returned, including its metadata updates."""
+    self.stage_seconds.observe(result.upload_seconds, stage="upload")
+    self.bytes.inc(result.uploaded_bytes, stage="upload")
+    for upload in batch:
+      if upload.file_path in result.metadata_seconds:
+        self.stage_seconds.observe(result.metadata_seconds[upload.file_path], stage="metadata")
+        ok = upload.file_path in result.documents
+        self.operations.inc(stage="metadata", result="ok" if ok else "error")
+        # 元数据失败的文档已被删除，视为上传失败
+        self.operations.inc(stage="upload", result="ok" if ok else "error")
+      else:
+        self.operations.inc(stage="upload", result="error")
+
+  def observe_upload_error(self, batch: List[AnnualReportUpload], seconds: float) -> None:
+    """Records an upload request that raised."""
+    self.stage_seconds.observe(seconds, stage="upload")
+    self.operations.inc(len(batch), stage="upload", result="error")
+
+  def observe_parse(self, result: Dict[str, Any]) -> None:
+    """Records a parse result as produced by SlidingWindowParser or parse_documents_in_queue."""
+    status = str(result["status"])
+    self.documents_parsed.inc(status=status)
+    if result.get("elapsed") is not None:
+      self.stage_seconds.observe(result["elapsed"], stage="parse")
+    if status == "success":
+      self.operations.inc(stage="parse", result="ok")
+      self.chunks.inc(result.get("chunk_count") or 0)
+      self.tokens.inc(result.get("token_count") or 0)
+    elif status == "failed":
+      self.operations.inc(stage="parse", result="error")
+
+  def observe_file(self, seconds: float, result: Dict[str, Any]) -> None:
+    """Records the end-to-end latency of a file whose document reached a terminal parse state."""
+    self.file_seconds.observe(seconds)
+
+  def set_file_counts(self, **counts: int) -> None:
+    """Sets the per-outcome file counts of the run, e.g. uploaded=3, skipped=10."""
+    for outcome, count in counts.items():
+      self.files.set(count, outcome=outcome)
+
+  def summary(self) -> Dict[str, Any]:
+    """Per-stage latency and error rate plus throughput over the run so far."""
+    elapsed = max(time.time() - self.registry.started_at, 1e-9)
+    operations = self.operations.samples()
+    stages = {}
+    for stage in STAGES:
+      ok = operations.get((stage, "ok"), 0.0)
+      errors = operations.get((stage, "error"), 0.0)
+      series = {s["labels"]["stage"]: s for s in self.stage_seconds.to_dict()}.get(stage, {})
+      stages[stage] = {
+        "count": series.get("count", 0),
+        "mean_seconds": series.get("mean"),
+        "p50_seconds": series.get("p50"),
+        "p99_seconds": series.get("p99"),
+        "ok": int(ok),
+        "errors": int(errors),
+        "error_rate": errors / (ok + errors) if ok + errors else 0.0,
+      }
+    files = self.files.samples()
+    file_series = next(iter(self.file_seconds.to_dict()), {})
+    return {
+      "elapsed_seconds": elapsed,
+      "stages": stages,
+      "file_latency": {
+        "count": file_series.get("count", 0),
+        "mean_seconds": file_series.get("mean"),
+        "p50_seconds": file_series.get("p50"),
+        "p99_seconds": file_series.get("p99"),
+      },
+      "throughput": {
+        "uploaded_bytes_per_second": self.bytes.value(stage="upload") / elapsed,
+        "hashed_bytes_per_second": self.bytes.value(stage="hash") / elapsed,
+        "uploaded_files_per_second": files.get(("uploaded",), 0) / elapsed,
+        "parsed_documents_per_second": self.documents_parsed.value(status="success") / elapsed,
+        "chunks_per_second": self.chunks.value() / elapsed,
+        "tokens_per_second": self.tokens.value() / elapsed,
+      },
+      "concurrency": [c.snapshot() for c in self._controllers],
+    }
+
+  def report(self) -> Dict[str, Any]:
+    return {"summary": self.summary(), **self.registry.to_dict()}
+
+  def write_report(self, path: str | Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(self.report(), indent=2, ensure_ascii=False, default=str))
+
+  def print_summary(self) -> None:
+    summary = self.summary()
+    throughput = summary["throughput"]
+    print(f"\nIngestion metrics ({summary['elapsed_seconds']:.1f}s):")
+    for stage, stats in summary["stages"].items():
+      if not stats["count"] and not stats["ok"] and not stats["errors"]:
+        continue
+      mean = stats["mean_seconds"] or 0.0
+      print(
+        f"  {stage:<8} n={stats['count']} mean={mean:.3f}s p50={stats['p50_seconds']}s "
+        f"p99={stats['p99_seconds']}s errors={stats['errors']} ({stats['error_rate']:.1%})"
+      )
+    file_latency = summary["file_latency"]
+    if file_latency["count"]:
+      print(
+        f"  {'file':<8} n={file_latency['count']} mean={file_latency['mean_seconds']:.3f}s "
+        f"p50={file_latency['p50_seconds']}s p99={file_latency['p99_seconds']}s (checked to parsed)"
+      )
+    print(
+      f"  Throughput: {throughput['uploaded_bytes_per_second'] / 1024 / 1024:.2f} MiB/s uploaded, "
+      f"{throughput['uploaded_files_per_second']:.2f} files/s, "
+      f"{throughput['parsed_documents_per_second']:.2f} docs/s parsed, "
+      f"{throughput['chunks_per_second']:.1f} chunks/s, "
+      f"{throughput['tokens_per_second']:.0f} tokens/s"
+    )
@@ -0,0 +1,267 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+from loguru import logger
+from tqdm import tqdm
+from core.integration.ragflow.errors import is_document_not_found
+from core.integration.ragflow.status import normalize_run_status
+from worker.annual_report_worker.concurrency import AIMDController, is_overload_message
+
+
+class SlidingWindowParser:
+  """
+  Parses documents in a background thread, keeping up to `window_size`
+  documents in flight on RAGFlow at all times.
+
+  Document IDs are fed with `submit()` while uploads are still running. Each time
+  a document reaches a terminal state its slot is refilled from the queue, so the
+  parser never waits for a whole batch to drain.
+
+  With an AIMDController the window size follows its limit: finished documents
+  widen the window, failed documents and overload errors shrink it.
+
+  A document that no longer exists is retired as failed, and so is one still
+  parsing after `parse_timeout` seconds (its parsing is cancelled), so that a
+  lost document never holds its slot or keeps join() waiting.
+
+  Usage:
+    parser = SlidingWindowParser(dataset, window_size=10)
+    parser.start()
+    parser.submit(doc.id)
+    ...
+    parser.close()
+    results = parser.join()
+  """
+
+  def __init__(
+    self,
+    dataset,
+    window_size: int = 10,
+    poll_interval: float = 2.0,
+    position: int = 1,
+    on_result: Optional[Callable[[str, Dict[str, int | str]], None]] = None,
+    concurrency: Optional[AIMDController] = None,
+    parse_timeout: Optional[float] = None,
+  ):
+    """
+    Args:
+      dataset: RAGFlow DataSet object containing the documents
+      window_size: Maximum number of documents parsing at the same time
+      poll_interval: Seconds between two status polls of in-flight documents
+      position: tqdm position of the parsing progress bar
+      on_result: Optional callback invoked from the parse thread with
+        (document_id, result) as soon as a document is finished
+      concurrency: Optional adaptive limit that replaces the fixed window_size
+      parse_timeout: Seconds after which a document still parsing is cancelled
+        and recorded as failed; no limit if None
+    """
+    self.dataset = dataset
+    self.on_result = on_result
+    self.concurrency = concurrency
+    self._window_size = window_size
+    self.poll_interval = poll_interval
+    self.parse_timeout = parse_timeout
+    self.results: Dict[str, Dict[str, int | str]] = {}
+
+    self._queue: "queue.Queue[str]" = queue.Queue()
+    self._in_flight: Dict[str, float] = {}
+    self._closed = threading.Event()
+    self._cancelled = threading.Event()
+    self._submitted = 0
+    self._thread = threading.Thread(
+      target=self._run, name="ragflow-parse-window", daemon=True
+    )
+    self._pbar = tqdm(total=0, desc="Parsing documents", unit="doc", position=position)
+
+  @property
+  def window_size(self) -> int:
+    if self.concurrency is not None:
+      return self.concurrency.limit
+    return self._window_size
+
+  def start(self) -> None:
+    self._thread.start()
+
+  def submit(self, document_id: str) -> None:
+    """Queue an uploaded document for parsing."""
+    if self._closed.is_set():
+      raise RuntimeError("SlidingWindowParser is closed")
+    self._submitted += 1
+    self._pbar.total = self._submitted
+    self._pbar.refresh()
+    self._queue.put(document_id)
+
+  def close(self) -> None:
+    """Signal that no more documents will be submitted."""
+    self._closed.set()
+
+  def cancel(self) -> None:
+    """Stop refilling the window and cancel documents that are still parsing."""
+    self._closed.set()
+    self._cancelled.set()
+
+  def join(self) -> Dict[str, Dict[str, int | str]]:
+    """
+    Wait until every submitted document is finished (or cancelled).
+
+    Ctrl+C while waiting cancels the in-flight documents before returning.
+
+    Returns:
+      Dictionary mapping document_id to result dict, same shape as
+      `parse_documents_in_queue`
+    """
+    try:
+      while self._thread.is_alive():
+        self._thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+      self._pbar.write("\nParsing interrupted by user. Cancelling in-flight documents...")
+      self.cancel()
+      self._thread.join()
+    self._pbar.close()
+    return self.results
+
+  def _record(
+    self,
+    doc_id: str,
+    status: str,
+    chunk_count: int = 0,
+    token_count: int = 0,
+    error: Optional[str] = None,
+  ):
+    started = self._in_flight.pop(doc_id, None)
+    elapsed = time.monotonic() - started if started is not None else None
+    if self.concurrency is not None and elapsed is not None:
+      if status == "success":
+        self.concurrency.on_success(elapsed)
+      elif status == "failed" and is_overload_message(error):
+        # 只有过载导致的失败才收缩窗口，文档本身无法解析不算
+        self.concurrency.on_overload()
+    self.results[doc_id] = {
+      "status": status,
+      "chunk_count": chunk_count or 0,
+      "token_count": token_count or 0,
+    }
+    if error:
+      self.results[doc_id]["error"] = error
+    if elapsed is not None:
+      self.results[doc_id]["elapsed"] = elapsed
+    if status == "failed":
+      self._pbar.write(f"Failed: {doc_id}")
+    self._pbar.update(1)
+    if self.on_result is not None:
+      try:
+        self.on_result(doc_id, self.results[doc_id])
+      except Exception as e:
+        logger.warning(f"Parse result callback failed for {doc_id}: {e}")
+
+  def _refill(self) -> None:
+    batch = []
+    while len(self._in_flight) + len(batch) < self.window_size:
+      try:
+        batch.append(self._queue.get_nowait())
+      except queue.Empty:
+        break
+    if not batch:
+      return
+
+    try:
+      self.dataset.async_parse_documents(batch)
+    except Exception as e:
+      if self.concurrency is not None:
+        self.concurrency.on_error(e)
+      self._pbar.write(f"\nError submitting {len(batch)} documents for parsing: {e}")
+      for doc_id in batch:
+        self._record(doc_id, "failed", error=f"submitting parse failed: {e}")
+      return
+
+    now = time.monotonic()
+    for doc_id in batch:
+      self._in_flight[doc_id] = now
+
+  def _poll(self) -> None:
+    for doc_id in list(self._in_flight):
+      try:
+        docs = self.dataset.list_documents(id=doc_id)
+      except Exception as e:
+        if is_document_not_found(e):
+          docs = []
+        else:
+          if self.concurrency is not None:
+            self.concurrency.on_error(e)
+          logger.debug(f"Failed to poll parse status of {doc_id}: {e}")
+          self._check_timeout(doc_id)
+          continue
+      if not docs:
+        # 文档已被删除或不存在，释放窗口中的位置
+        self._record(doc_id, "failed", error="document not found")
+        continue
+
+      doc = docs[0]
+      status = normalize_run_status(doc.run, doc.progress)
+      if status is not None:
+        self._record(
+          doc_id,
+          status,
+          doc.chunk_count,
+          doc.token_count,
+          error=getattr(doc, "progress_msg", None) if status == "failed" else None,
+        )
+      else:
+        self._check_timeout(doc_id)
+
+  def _check_timeout(self, doc_id: str) -> None:
+    started = self._in_flight.get(doc_id)
+    if self.parse_timeout is None or started is None:
+      return
+    if time.monotonic() - started < self.parse_timeout:
+      return
+    try:
+      self.dataset.async_cancel_parse_documents([doc_id])
+    except Exception as e:
+      logger.debug(f"Failed to cancel timed out parse of {doc_id}: {e}")
+    self._record(
+      doc_id, "failed", error=f"parsing did not finish within {self.parse_timeout:g}s"
+    )
+
+  def _cancel_pending(self) -> None:
+    if self._in_flight:
+      try:
+        self.dataset.async_cancel_parse_documents(list(self._in_flight))
+      except Exception as e:
+        self._pbar.write(f"\nError cancelling in-flight documents: {e}")
+      for doc_id in list(self._in_flight):
+        self._record(doc_id, "cancelled")
+
+    while True:
+      try:
+        self._record(self._queue.get_nowait(), "cancelled")
+      except queue.Empty:
+        break
+
+  def _run(self) -> None:
+    while not self._cancelled.is_set():
+      self._refill()
+      self._pbar.set_postfix(
+        in_flight=len(self._in_flight),
+        window=self.window_size,
+        queued=self._queue.qsize(),
+      )
+
+      if not self._in_flight:
+        if self._closed.is_set() and self._queue.empty():
+          return
+        # 窗口为空时阻塞等待新文档，避免空转
+        try:
+          doc_id = self._queue.get(timeout=self.poll_interval)
+        except queue.Empty:
+          continue
+        self._queue.put(doc_id)
+        continue
+
+      self._cancelled.wait(self.poll_interval)
+      if self._cancelled.is_set():
+        break
+      self._poll()
+
+    self._cancel_pending()
@@ -0,0 +1,212 @@
+import argparse
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from loguru import logger
+from core.config.models import AnnualReportWorkerConfig
+from worker.config import WorkerConfigLoader, WorkerConfig
+from worker.annual_report_worker import connect_knowledge_base, print_parse_summary
+from worker.annual_report_worker.announcement_status import (
+  AnnouncementStatusRecorder,
+  connect_announcement_status,
+)
+from worker.annual_report_worker.concurrency import create_concurrency_controllers
+from worker.annual_report_worker.ledger import IngestionLedger, LedgerEntry
+from worker.annual_report_worker.parse_pipeline import SlidingWindowParser
+
+
+def retry_delay(attempts: int, backoff: float) -> float:
+  """Seconds to wait after the `attempts`-th failed parse before the next one."""
+  return backoff * (2 ** max(attempts - 1, 0))
+
+
+def _last_parse_at(entry: LedgerEntry) -> float:
+  return entry.last_parse_at if entry.last_parse_at is not None else entry.updated_at
+
+
+def select_retries(
+  entries: List[LedgerEntry],
+  max_attempts: int,
+  backoff: float,
+  now: Optional[float] = None,
+) -> tuple[List[LedgerEntry], List[LedgerEntry], List[LedgerEntry]]:
+  """
+  Splits failed parses into due, waiting (backoff not elapsed) and exhausted.
+
+  The backoff runs from the last recorded parse result; entries without one
+  (e.g. found already failed in RAGFlow) fall back to their last update.
+
+  Returns:
+    (due, waiting, exhausted) ledger entries
+  """
+  now = time.time() if now is None else now
+  due, waiting, exhausted = [], [], []
+  for entry in entries:
+    if entry.parse_attempts >= max_attempts:
+      exhausted.append(entry)
+    elif _last_parse_at(entry) + retry_delay(entry.parse_attempts, backoff) <= now:
+      due.append(entry)
+    else:
+      waiting.append(entry)
+  return due, waiting, exhausted
+
+
+def retry_failed_parses(
+  kb,
+  ledger: IngestionLedger,
+  worker_config: AnnualReportWorkerConfig,
+  max_attempts: Optional[int] = None,
+  announcement_status: Optional[AnnouncementStatusRecorder] = None,
+) -> Dict[str, Dict[str, int | str]]:
+  """
+  Re-submits documents whose last parse failed or was cancelled.
+
+  Only documents with fewer than `max_attempts` recorded parse attempts whose
+  backoff (parse_retry_backoff doubled per attempt) has elapsed are re-parsed.
+  Results are written back to the ledger and appended to each document's history.
+
+  Args:
+    kb: The knowledge base DataSet object
+    ledger: Ingestion ledger holding the failed parses
+    worker_config: Retry limits, parse window and poll interval
+    max_attempts: Overrides worker_config.max_parse_attempts
+    announcement_status: Optional recorder that writes the new parse results to
+      the announcement table
+
+  Returns:
+    Dictionary mapping document_id to result dict of the retried documents
+  """
+  max_attempts = max_attempts or worker_config.max_parse_attempts
+  due, waiting, exhausted = select_retries(
+    ledger.failed_parses(), max_attempts, worker_config.parse_retry_backoff
+  )
+  print(
+    f"Failed parses: {len(due)} due for retry, {len(waiting)} waiting for backoff, "
+    f"{len(exhausted)} out of attempts (max {max_attempts})"
+  )
+  if not due:
+    return {}
+
+  _, parse_concurrency = create_concurrency_controllers(worker_config)
+
+  def on_result(doc_id: str, result: Dict[str, int | str]) -> None:
+    ledger.record_parse_result(doc_id, result)
+    if announcement_status is not None:
+      announcement_status.record_parse(doc_id, result)
+
+  parser = SlidingWindowParser(
+    dataset=kb,
+    window_size=worker_config.parse_window,
+    poll_interval=worker_config.parse_poll_interval,
+    position=0,
+    on_result=on_result,
+    concurrency=parse_concurrency,
+    parse_timeout=worker_config.parse_timeout,
+  )
+  parser.start()
+  for entry in due:
+    parser.submit(entry.document_id)
+  parser.close()
+  results = parser.join()
+
+  print_parse_summary(results)
+  print("\nRetried documents:")
+  for entry in due:
+    result = results.get(entry.document_id, {"status": "cancelled"})
+    line = (
+      f"  {entry.stock_code} {entry.year} {entry.document_id}: {result['status']} "
+      f"(attempt {entry.parse_attempts + 1}/{max_attempts})"
+    )
+    if result.get("error"):
+      line += f" - {result['error']}"
+    print(line)
+  return results
+
+
+def print_parse_history(ledger: IngestionLedger, document_id: Optional[str] = None) -> None:
+  """Prints the parse attempts per document, for one document or every document that ever failed."""
+  attempts = ledger.parse_history(document_id)
+  by_document: Dict[str, list] = {}
+  for attempt in attempts:
+    by_document.setdefault(attempt.document_id, []).append(attempt)
+
+  if document_id is None:
+    # 只展示出现过失败或取消的文档
+    by_document = {
+      doc_id: history
+      for doc_id, history in by_document.items()
+      if any(a.status != "success" for a in history)
+    }
+  if not by_document:
+    print("No parse history found")
+    return
+
+  for doc_id, history in by_document.items():
+    print(f"{doc_id} ({len(history)} attempts, last: {history[-1].status})")
+    for attempt in history:
+      recorded = datetime.fromtimestamp(attempt.recorded_at).strftime("%Y-%m-%d %H:%M:%S")
+      line = f"  {recorded} {attempt.status:<9} chunks={attempt.chunk_count} tokens={attempt.token_count}"
+      if attempt.error:
+        line += f" - {attempt.error}"
+      print(line)
+
+
+def run_parse_retry(config: WorkerConfig, max_attempts: Optional[int] = None) -> bool:
+  """
+  Connects to RAGFlow and retries the failed parses recorded in the ledger.
+
+  Returns:
+    False if RAGFlow or the knowledge base is unavailable, True otherwise
+  """
+  worker_config = config.annual_report_worker
+  if not worker_config.ledger_path:
+    logger.error("Parse retry needs the ingestion ledger, annual_report_worker.ledger_path is not set")
+    return False
+
+  connection = connect_knowledge_base(config)
+  if connection is None:
+    return False
+  rag_client, kb = connection
+  ledger = IngestionLedger(worker_config.ledger_path)
+  try:
+    retry_failed_parses(
+      kb,
+      ledger,
+      worker_config,
+      max_attempts=max_attempts,
+      announcement_status=connect_announcement_status(config),
+    )
+  finally:
+    ledger.close()
+    rag_client.close()
+  return True
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(
+    description="Re-parse annual report documents whose parsing failed or was cancelled"
+  )
+  parser.add_argument(
+    "--history",
+    nargs="?",
+    const="",
+    metavar="DOCUMENT_ID",
+    help="Show parse history of one document, or of all documents with failures",
+  )
+  parser.add_argument("--max-attempts", type=int, help="Override max_parse_attempts")
+  args = parser.parse_args()
+
+  loader: WorkerConfigLoader = WorkerConfigLoader()
+  config: WorkerConfig = loader.load()
+
+  if args.history is not None:
+    if not config.annual_report_worker.ledger_path:
+      parser.error("annual_report_worker.ledger_path is not set")
+    ledger = IngestionLedger(config.annual_report_worker.ledger_path)
+    try:
+      print_parse_history(ledger, args.history or None)
+    finally:
+      ledger.close()
+    return
+
+  run_parse_retry(config, max_attempts=args.max_attempts)
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from loguru import logger
+from core.integration.ragflow.errors import is_document_not_found
+from worker.config import WorkerConfig
+from worker.annual_report_worker import connect_knowledge_base
+from worker.annual_report_worker.announcement_status import (
+  AnnouncementStatusRecorder,
+  connect_announcement_status,
+)
+from worker.annual_report_worker.ledger import IngestionLedger
+
+
+@dataclass(slots=True)
+class RemovalSummary:
+  """What removing a set of files did."""
+
+  deleted_documents: int = 0
+  kept_documents: int = 0  # 仍有内容相同的别名文件，文档改由别名承载
+  forgotten: int = 0  # 删除的台账记录
+  unknown: int = 0  # 台账中没有记录的文件
+  failed: int = 0
+
+
+def remove_reports(
+  kb,
+  ledger: IngestionLedger,
+  file_paths: Iterable[str],
+  announcement_status: Optional[AnnouncementStatusRecorder] = None,
+) -> RemovalSummary:
+  """
+  Removes the traces of report files that were deleted from the report directory.
+
+  For every file the ledger knows: an uploaded file's RAGFlow document is deleted
+  and its announcement row cleared, unless an identical alias file still exists,
+  which then takes the document over; the ledger entry is dropped. A document
+  whose deletion fails keeps its ledger entry, so the removal can be retried.
+
+  Args:
+    kb: The knowledge base DataSet object
+    ledger: Ingestion ledger the files were recorded in
+    file_paths: Paths of the removed files, as recorded in the ledger
+    announcement_status: Optional recorder that clears the announcement rows
+
+  Returns:
+    RemovalSummary with the counts of what was done
+  """
+  summary = RemovalSummary()
+  for file_path in file_paths:
+    entry = ledger.get(file_path)
+    if entry is None:
+      summary.unknown += 1
+      continue
+    if entry.is_uploaded and entry.alias_of is None and entry.document_id is not None:
+      promoted = ledger.promote_alias(entry.document_id)
+      if promoted is not None:
+        logger.info(f"{file_path} removed, document {entry.document_id} kept for {promoted}")
+        summary.kept_documents += 1
+      else:
+        try:
+          kb.delete_documents(ids=[entry.document_id])
+        except Exception as e:
+          if not is_document_not_found(e):
+            logger.warning(f"Failed to delete document {entry.document_id} of removed {file_path}: {e}")
+            summary.failed += 1
+            continue
+        if announcement_status is not None:
+          announcement_status.record_removal(entry.document_id)
+        logger.info(f"{file_path} removed, document {entry.document_id} deleted")
+        summary.deleted_documents += 1
+    ledger.delete(file_path)
+    summary.forgotten += 1
+  return summary
+
+
+def run_removal(config: WorkerConfig, file_paths: list[str]) -> bool:
+  """
+  Connects to RAGFlow and removes the given files with `remove_reports`.
+
+  Returns:
+    False if the ledger is not configured, RAGFlow is unavailable or a document
+    could not be deleted; True otherwise
+  """
+  worker_config = config.annual_report_worker
+  if not worker_config.ledger_path:
+    logger.error("Removing reports needs the ingestion ledger, annual_report_worker.ledger_path is not set")
+    return False
+
+  connection = connect_knowledge_base(config)
+  if connection is None:
+    return False
+  rag_client, kb = connection
+  ledger = IngestionLedger(worker_config.ledger_path)
+  try:
+    summary = remove_reports(
+      kb, ledger, file_paths, announcement_status=connect_announcement_status(config)
+    )
+  finally:
+    ledger.close()
+    rag_client.close()
+
+  print(f"Removed {len(file_paths)} files:")
+  print(f"  Documents deleted: {summary.deleted_documents}")
+  print(f"  Documents kept for identical files: {summary.kept_documents}")
+  print(f"  Ledger entries dropped: {summary.forgotten}")
+  print(f"  Not in ledger: {summary.unknown}")
+  print(f"  Failed: {summary.failed}")
+  return summary.failed == 0
@@ -0,0 +1,112 @@
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from pypdf import PasswordType, PdfReader
+
+HEADER_SCAN_BYTES = 1024
+TRAILER_SCAN_BYTES = 4096
+
+
+def validate_pdf(file_path: str | Path) -> Optional[str]:
+  """
+  Checks that a file is a PDF RAGFlow can parse.
+
+  Rejects empty files, files without a %PDF- header in their first KiB (HTML
+  error pages saved as .pdf included), truncated files without an %%EOF marker,
+  files pypdf cannot open, encrypted files that need a password and files
+  without pages.
+
+  Returns:
+    None if the file looks fine, otherwise the reason it was rejected
+  """
+  try:
+    size = os.path.getsize(file_path)
+    if size == 0:
+      return "empty file"
+    with open(file_path, "rb") as f:
+      head = f.read(HEADER_SCAN_BYTES)
+      f.seek(max(size - TRAILER_SCAN_BYTES, 0))
+      tail = f.read()
+  except OSError as e:
+    return f"unreadable file: {e}"
+
+  if b"%PDF-" not in head:
+    lowered = head.lstrip().lower()
+    if lowered.startswith((b"<!doctype html", b"<html", b"<?xml", b"<")):
+      return "not a PDF: markup (HTML/XML) content"
+    return "not a PDF: missing %PDF- header"
+  if b"%%EOF" not in tail:
+    return "truncated PDF: missing %%EOF marker"
+
+  try:
+    reader = PdfReader(str(file_path), strict=False)
+    if reader.is_encrypted and reader.decrypt("") == PasswordType.NOT_DECRYPTED:
+      return "encrypted PDF: password required"
+    pages = len(reader.pages)
+  except Exception as e:
+    return f"unreadable PDF: {type(e).__name__}: {e}"
+  if pages == 0:
+    return "PDF has no pages"
+  return None
+
+
+def _timed_validate(file_path: str) -> Tuple[Optional[str], float]:
+  started = time.perf_counter()
+  reason = validate_pdf(file_path)
+  return reason, time.perf_counter() - started
+
+
+class BackgroundValidator:
+  """
+  Validates PDFs on a process pool so validation runs ahead of the upload loop.
+
+  PDF parsing is CPU bound pure Python, so unlike hashing it needs processes to
+  run in parallel. Files are submitted up front; `result()` blocks only if the
+  validation of that file is not finished yet.
+
+  Usage:
+    with BackgroundValidator(max_workers=2) as validator:
+      validator.submit(path)
+      ...
+      reason = validator.result(path)  # None if the file is a valid PDF
+  """
+
+  def __init__(
+    self,
+    max_workers: int = 2,
+    on_validated: Optional[Callable[[str, Optional[str], float], None]] = None,
+  ):
+    """
+    Args:
+      max_workers: Number of validation processes
+      on_validated: Optional callback invoked with (file_path, reason, seconds)
+        when the result of a file is collected
+    """
+    self._executor = ProcessPoolExecutor(max_workers=max_workers)
+    self._futures: Dict[str, Future] = {}
+    self.on_validated = on_validated
+
+  def __enter__(self) -> "BackgroundValidator":
+    return self
+
+  def __exit__(self, *exc) -> None:
+    self.shutdown()
+
+  def submit(self, file_path: str | Path) -> None:
+    key = str(file_path)
+    if key not in self._futures:
+      self._futures[key] = self._executor.submit(_timed_validate, key)
+
+  def result(self, file_path: str | Path) -> Optional[str]:
+    """Returns the rejection reason of a submitted file (None if valid), validating it now if it was not submitted."""
+    key = str(file_path)
+    self.submit(key)
+    reason, seconds = self._futures.pop(key).result()
+    if self.on_validated is not None:
+      self.on_validated(key, reason, seconds)
+    return reason
+
+  def shutdown(self) -> None:
+    self._executor.shutdown(wait=False, cancel_futures=True)
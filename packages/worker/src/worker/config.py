@@ -1,12 +1,23 @@
-
 from confz import BaseConfig
 from core.config.config_loader import ConfigLoader
-from core.config.models import ChinaAnnualReportSoures, DatabaseConfig, RAGFlowConfig
+from core.config.models import (
+  AnnualReportWorkerConfig,
+  ChinaAnnualReportSoures,
+  DatabaseConfig,
+  IngestionQueueConfig,
+  RAGFlowConfig,
+  ReportDiscoveryConfig,
+  SchedulerConfig,
+)
 
 class WorkerConfig(BaseConfig):
   database: DatabaseConfig
   ragflow: RAGFlowConfig
   china_annual_report_soures: ChinaAnnualReportSoures
+  annual_report_worker: AnnualReportWorkerConfig = AnnualReportWorkerConfig()
+  ingestion_queue: IngestionQueueConfig = IngestionQueueConfig()
+  report_discovery: ReportDiscoveryConfig = ReportDiscoveryConfig()
+  scheduler: SchedulerConfig = SchedulerConfig()
   
 
 class WorkerConfigLoader(ConfigLoader):
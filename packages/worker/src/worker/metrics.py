@@ -0,0 +1,356 @@
+"""
+Minimal in-process metrics for the worker: counters, gauges and histograms with
+labels, rendered as Prometheus text exposition format or as a JSON-ready dict.
+
+Usage:
+  registry = MetricsRegistry()
+  uploads = registry.counter("uploads_total", "Uploaded files", ["result"])
+  uploads.inc(result="ok")
+  server = MetricsServer(registry, port=9108).start()  # GET /metrics, /metrics.json
+"""
+
+import json
+import math
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 秒级延迟的默认分桶，覆盖毫秒级哈希到十分钟级解析
+DEFAULT_BUCKETS = (
+  0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+  if math.isinf(value):
+    return "+Inf" if value > 0 else "-Inf"
+  if float(value).is_integer():
+    return str(int(value))
+  return repr(float(value))
+
+
+def _escape(value: str) -> str:
+  return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+  pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+  if extra:
+    pairs.append(extra)
+  return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+  type_name = ""
+
+  def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+    self.name = name
+    self.help = help
+    self.labelnames = tuple(labelnames)
+    self._lock = threading.Lock()
+
+  def _key(self, labels: Dict[str, str]) -> LabelValues:
+    if set(labels) != set(self.labelnames):
+      raise ValueError(f"{self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in self.labelnames)
+
+  def render(self) -> List[str]:
+    return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class _SampleMetric(_Metric):
+  """Metric with one value per label set."""
+
+  def samples(self) -> Dict[LabelValues, float]:
+    raise NotImplementedError
+
+  def render(self) -> List[str]:
+    lines = super().render()
+    for key, value in sorted(self.samples().items()):
+      lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+    return lines
+
+  def to_dict(self) -> Any:
+    return [
+      {"labels": dict(zip(self.labelnames, key)), "value": value}
+      for key, value in sorted(self.samples().items())
+    ]
+
+
+class Counter(_SampleMetric):
+  """Monotonically increasing value per label set."""
+
+  type_name = "counter"
+
+  def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+    super().__init__(name, help, labelnames)
+    self._values: Dict[LabelValues, float] = {}
+
+  def inc(self, amount: float = 1.0, **labels: str) -> None:
+    if amount < 0:
+      raise ValueError("Counter can only increase")
+    key = self._key(labels)
+    with self._lock:
+      self._values[key] = self._values.get(key, 0.0) + amount
+
+  def value(self, **labels: str) -> float:
+    with self._lock:
+      return self._values.get(self._key(labels), 0.0)
+
+  def samples(self) -> Dict[LabelValues, float]:
+    with self._lock:
+      return dict(self._values)
+
+
+class Gauge(_SampleMetric):
+  """
+  Value that can go up and down. A gauge created with `callback` reads its samples
+  from the callback at render time, e.g. the current limit of a concurrency
+  controller.
+  """
+
+  type_name = "gauge"
+
+  def __init__(
+    self,
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    callback: Optional[Callable[[], Iterable[Tuple[LabelValues, float]]]] = None,
+  ):
+    super().__init__(name, help, labelnames)
+    self._values: Dict[LabelValues, float] = {}
+    self._callback = callback
+
+  def set(self, value: float, **labels: str) -> None:
+    key = self._key(labels)
+    with self._lock:
+      self._values[key] = value
+
+  def samples(self) -> Dict[LabelValues, float]:
+    if self._callback is not None:
+      return {tuple(key): value for key, value in self._callback()}
+    with self._lock:
+      return dict(self._values)
+
+
+class Histogram(_Metric):
+  """Cumulative bucket counts, sum and count of observed values per label set."""
+
+  type_name = "histogram"
+
+  def __init__(
+    self,
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+  ):
+    super().__init__(name, help, labelnames)
+    self.buckets = tuple(sorted(buckets))
+    # label values -> (per-bucket counts incl. +Inf, sum, count)
+    self._series: Dict[LabelValues, List[Any]] = {}
+
+  def observe(self, value: float, **labels: str) -> None:
+    key = self._key(labels)
+    index = bisect_left(self.buckets, value)
+    with self._lock:
+      series = self._series.get(key)
+      if series is None:
+        series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+      series[0][index] += 1
+      series[1] += value
+      series[2] += 1
+
+  def time(self, **labels: str) -> "_Timer":
+    """Context manager observing the duration of its block."""
+    return _Timer(self, labels)
+
+  def _snapshot(self) -> Dict[LabelValues, Tuple[List[int], float, int]]:
+    with self._lock:
+      return {key: (list(s[0]), s[1], s[2]) for key, s in self._series.items()}
+
+  def quantile(self, q: float, **labels: str) -> Optional[float]:
+    """Estimates a quantile from the buckets (upper bound of the bucket holding it)."""
+    snapshot = self._snapshot().get(self._key(labels))
+    if snapshot is None or snapshot[2] == 0:
+      return None
+    counts, _, count = snapshot
+    rank = q * count
+    cumulative = 0
+    for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+      cumulative += bucket_count
+      if cumulative >= rank:
+        return bound
+    return math.inf
+
+  def render(self) -> List[str]:
+    lines = super().render()
+    for key, (counts, total, count) in sorted(self._snapshot().items()):
+      cumulative = 0
+      for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+        cumulative += bucket_count
+        le = f'le="{_format_value(bound)}"'
+        lines.append(
+          f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+        )
+      labels = _format_labels(self.labelnames, key)
+      lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+      lines.append(f"{self.name}_count{labels} {count}")
+    return lines
+
+  def to_dict(self) -> Any:
+    def bound(q: float, labels: Dict[str, str]) -> Any:
+      # 超出最大分桶时 JSON 中记为 "+Inf"，保证输出是合法 JSON
+      value = self.quantile(q, **labels)
+      return "+Inf" if value is not None and math.isinf(value) else value
+
+    series = []
+    for key, (_, total, count) in sorted(self._snapshot().items()):
+      labels = dict(zip(self.labelnames, key))
+      series.append(
+        {
+          "labels": labels,
+          "count": count,
+          "sum": total,
+          "mean": total / count if count else None,
+          "p50": bound(0.5, labels),
+          "p90": bound(0.9, labels),
+          "p99": bound(0.99, labels),
+        }
+      )
+    return series
+
+
+class _Timer:
+  def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+    self.histogram = histogram
+    self.labels = labels
+
+  def __enter__(self) -> "_Timer":
+    self.started = time.perf_counter()
+    return self
+
+  def __exit__(self, *exc) -> None:
+    self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class MetricsRegistry:
+  """Holds the metrics of a process and renders them together."""
+
+  def __init__(self, namespace: str = ""):
+    self.namespace = namespace
+    self.started_at = time.time()
+    self._metrics: Dict[str, _Metric] = {}
+    self._lock = threading.Lock()
+
+  def _register(self, metric: _Metric) -> Any:
+    with self._lock:
+      if metric.name in self._metrics:
+        raise ValueError(f"Metric {metric.name} already registered")
+      self._metrics[metric.name] = metric
+    return metric
+
+  def _name(self, name: str) -> str:
+    return f"{self.namespace}_{name}" if self.namespace else name
+
+  def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return self._register(Counter(self._name(name), help, labelnames))
+
+  def gauge(
+    self,
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    callback: Optional[Callable[[], Iterable[Tuple[LabelValues, float]]]] = None,
+  ) -> Gauge:
+    return self._register(Gauge(self._name(name), help, labelnames, callback))
+
+  def histogram(
+    self,
+    name: str,
+    help: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+  ) -> Histogram:
+    return self._register(Histogram(self._name(name), help, labelnames, buckets))
+
+  def render_prometheus(self) -> str:
+    with self._lock:
+      metrics = list(self._metrics.values())
+    lines: List[str] = []
+    for metric in metrics:
+      lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+  def to_dict(self) -> Dict[str, Any]:
+    with self._lock:
+      metrics = list(self._metrics.values())
+    return {
+      "started_at": self.started_at,
+      "elapsed_seconds": time.time() - self.started_at,
+      "metrics": {
+        metric.name: {"type": metric.type_name, "help": metric.help, "series": metric.to_dict()}
+        for metric in metrics
+      },
+    }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+  server: "_MetricsHTTPServer"
+
+  def log_message(self, format, *args):
+    pass
+
+  def do_GET(self):
+    path = self.path.split("?", 1)[0]
+    if path == "/metrics":
+      body = self.server.registry.render_prometheus().encode("utf-8")
+      content_type = "text/plain; version=0.0.4; charset=utf-8"
+    elif path == "/metrics.json":
+      body = json.dumps(self.server.registry.to_dict(), default=str).encode("utf-8")
+      content_type = "application/json"
+    else:
+      self.send_error(404)
+      return
+    self.send_response(200)
+    self.send_header("Content-Type", content_type)
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+
+class _MetricsHTTPServer(ThreadingHTTPServer):
+  daemon_threads = True
+
+  def __init__(self, address, registry: MetricsRegistry):
+    super().__init__(address, _MetricsHandler)
+    self.registry = registry
+
+
+class MetricsServer:
+  """Serves a registry on /metrics (Prometheus text) and /metrics.json from a background thread."""
+
+  def __init__(self, registry: MetricsRegistry, port: int, host: str = "127.0.0.1"):
+    self._server = _MetricsHTTPServer((host, port), registry)
+    self._thread: Optional[threading.Thread] = None
+
+  @property
+  def address(self) -> str:
+    host, port = self._server.server_address[:2]
+    return f"http://{host}:{port}"
+
+  def start(self) -> "MetricsServer":
+    self._thread = threading.Thread(
+      target=self._server.serve_forever, name="metrics-http", daemon=True
+    )
+    self._thread.start()
+    return self
+
+  def stop(self) -> None:
+    self._server.shutdown()
+    self._server.server_close()
@@ -0,0 +1,117 @@
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from loguru import logger
+from core.models.china_mainland_listed_company import StreamingAnnualReportList
+from worker.config import WorkerConfigLoader, WorkerConfig
+from worker.annual_report_worker.removal import run_removal
+from worker.report_discovery.scanner import (
+  DiscoveryDelta,
+  build_listing,
+  diff_reports,
+  discover_reports,
+  load_snapshot,
+  save_snapshot,
+  write_delta,
+  write_listing,
+)
+
+
+def listing_names(listing_file_path: str) -> Dict[str, Tuple[str, str]]:
+  """Stock code -> (full_name, short_name) from the current listing, if there is one."""
+  if not listing_file_path or not Path(listing_file_path).is_file():
+    return {}
+  try:
+    return {
+      company.code: (company.full_name, company.short_name)
+      for company in StreamingAnnualReportList(listing_file_path).companies
+    }
+  except Exception as e:
+    logger.warning(f"Could not read company names from {listing_file_path}: {e}")
+    return {}
+
+
+def run_discovery(config: WorkerConfig, dry_run: bool = False) -> Optional[DiscoveryDelta]:
+  """
+  Scans the report directory and records what changed since the previous scan.
+
+  The rewritten listing is the interface to ingestion: if anything changed and
+  write_listing is enabled, the listing at
+  china_annual_report_soures.listing_file_path is rewritten from the scan, and
+  the incremental sync uploads the added and changed files found in it. The
+  listing cannot express removals, so with remove_deleted enabled the removed
+  files are handled here: their RAGFlow documents, ledger entries and
+  announcement statuses are removed (see `remove_reports`). The delta (added,
+  changed and removed files) is written to report_discovery.delta_path as a
+  record of the scan, and the scan becomes the new snapshot; when removing
+  files fails the snapshot is kept, so the next scan reports them again.
+
+  Args:
+    config: Worker configuration
+    dry_run: Only print the delta, write nothing
+
+  Returns:
+    The delta, or None if base_path is not configured
+  """
+  sources = config.china_annual_report_soures
+  discovery = config.report_discovery
+  if not sources.base_path or not Path(sources.base_path).is_dir():
+    logger.error(f"china_annual_report_soures.base_path is not a directory: {sources.base_path!r}")
+    return None
+
+  started = time.monotonic()
+  reports, unrecognized = discover_reports(sources.base_path, discovery.scan_workers)
+  previous = load_snapshot(discovery.snapshot_path)
+  delta = diff_reports(previous, reports)
+  elapsed = time.monotonic() - started
+
+  print(f"Scanned {len(reports)} report files in {elapsed:.1f}s ({discovery.scan_workers} threads)")
+  print(f"  Added: {len(delta.added)}")
+  print(f"  Changed: {len(delta.changed)}")
+  print(f"  Removed: {len(delta.removed)}")
+  if unrecognized:
+    print(f"  Unrecognized file names: {len(unrecognized)}")
+    for relative_path in unrecognized[:10]:
+      print(f"    {relative_path}")
+
+  if dry_run:
+    return delta
+
+  write_delta(discovery.delta_path, sources.base_path, delta)
+  removed = True
+  if delta.removed and discovery.remove_deleted:
+    removed = run_removal(
+      config, [str(Path(sources.base_path) / report.file_path) for report in delta.removed]
+    )
+  if not delta.is_empty and discovery.write_listing and sources.listing_file_path:
+    listing = build_listing(
+      reports.values(),
+      discovery.announcement_types,
+      names=listing_names(sources.listing_file_path),
+    )
+    write_listing(sources.listing_file_path, listing)
+    logger.info(
+      f"Listing {sources.listing_file_path} rewritten with "
+      f"{sum(len(company['files']) for company in listing)} reports"
+    )
+  if removed:
+    save_snapshot(discovery.snapshot_path, sources.base_path, reports)
+  else:
+    logger.error("Removing deleted reports failed, the snapshot is kept to retry on the next scan")
+  return delta
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(
+    description="Scan the annual report directory and emit the delta against the previous scan"
+  )
+  parser.add_argument("--dry-run", action="store_true", help="Print the delta without writing anything")
+  parser.add_argument("--workers", type=int, help="Override report_discovery.scan_workers")
+  args = parser.parse_args()
+
+  loader: WorkerConfigLoader = WorkerConfigLoader()
+  config: WorkerConfig = loader.load()
+  if args.workers:
+    config.report_discovery.scan_workers = args.workers
+  run_discovery(config, dry_run=args.dry_run)
@@ -0,0 +1,284 @@
+import json
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from core.models.report_file import AnnouncementType
+
+_CODE = re.compile(r"(?<!\d)(\d{6})(?!\d)")
+_YEAR_WITH_SUFFIX = re.compile(r"((?:19|20)\d{2})\s*年")
+_YEAR = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+
+# 按顺序匹配，摘要和季度报告要在年度报告之前判断
+_TYPE_KEYWORDS: List[Tuple[AnnouncementType, Tuple[str, ...]]] = [
+  (AnnouncementType.Q1_REPORT, ("第一季度", "一季度报告", "一季报")),
+  (AnnouncementType.Q3_REPORT, ("第三季度", "三季度报告", "三季报")),
+  (AnnouncementType.INTERIM_SUMMARY, ("半年度报告摘要", "半年报摘要")),
+  (AnnouncementType.INTERIM_REPORT, ("半年度报告", "半年报", "中期报告")),
+  (AnnouncementType.ANNUAL_SUMMARY, ("年度报告摘要", "年报摘要")),
+  (AnnouncementType.ANNUAL_REPORT, ("年度报告", "年报")),
+]
+# 英文版与正式报告内容重复，不纳入清单
+_EXCLUDED_KEYWORDS = ("英文", "english")
+
+
+@dataclass(slots=True, frozen=True)
+class DiscoveredReport:
+  """A report file found under the base path, with what its name says about it."""
+
+  file_path: str  # 相对 base_path 的路径
+  code: str
+  year: str
+  announcement_type: str
+  short_name: Optional[str]
+  size: int
+  mtime_ns: int
+
+  @property
+  def key(self) -> Tuple[str, str, str]:
+    return (self.code, self.year, self.announcement_type)
+
+  def is_unchanged(self, other: "DiscoveredReport") -> bool:
+    return self.size == other.size and self.mtime_ns == other.mtime_ns
+
+
+@dataclass(slots=True)
+class DiscoveryDelta:
+  """Difference between two scans, keyed by relative file path."""
+
+  added: List[DiscoveredReport] = field(default_factory=list)
+  changed: List[DiscoveredReport] = field(default_factory=list)
+  removed: List[DiscoveredReport] = field(default_factory=list)
+
+  @property
+  def is_empty(self) -> bool:
+    return not (self.added or self.changed or self.removed)
+
+
+def _short_name(stem: str, code: str, year: str) -> Optional[str]:
+  # 600018_上港集团_2021年年度报告 / 2021_600018_上港集团_年度报告 / 上港集团：2021年年度报告
+  for separator in ("：", ":"):
+    if separator in stem:
+      candidate = stem.split(separator, 1)[0].replace(code, "").strip(" _-")
+      if candidate and not candidate.isdigit():
+        return candidate
+  for part in re.split(r"[_\s]+", stem):
+    if not part or part in (code, year) or part.isdigit() or "报" in part or year in part:
+      continue
+    return part
+  return None
+
+
+def infer_report(relative_path: str) -> Optional[Tuple[str, str, str, Optional[str]]]:
+  """
+  Infers stock code, report year, announcement type and short name from a path.
+
+  The file name is searched first and the parent directories after it, so both
+  `600018_2021年年度报告.pdf` and `600018/2021/年度报告.pdf` are recognized.
+  The year prefers a four-digit number followed by 年.
+
+  Returns:
+    (code, year, announcement_type, short_name), or None if the code, the year
+    or the announcement type cannot be inferred or the file is an English version
+  """
+  path = Path(relative_path)
+  stem = path.stem
+  if any(keyword in stem.lower() for keyword in _EXCLUDED_KEYWORDS):
+    return None
+
+  texts = [stem] + [part for part in reversed(path.parent.parts)]
+  code = next((m.group(1) for text in texts if (m := _CODE.search(text))), None)
+  year = next(
+    (m.group(1) for text in texts if (m := _YEAR_WITH_SUFFIX.search(text))),
+    None,
+  ) or next(
+    (m.group(1) for text in texts if (m := _YEAR.search(text.replace(code or "", "")))),
+    None,
+  )
+  announcement_type = next(
+    (
+      announcement_type.value
+      for announcement_type, keywords in _TYPE_KEYWORDS
+      if any(keyword in text for text in texts for keyword in keywords)
+    ),
+    None,
+  )
+  if code is None or year is None or announcement_type is None:
+    return None
+  return code, year, announcement_type, _short_name(stem, code, year)
+
+
+def _scan_one(directory: str) -> Tuple[List[str], List[Tuple[str, int, int]]]:
+  subdirectories, files = [], []
+  with os.scandir(directory) as entries:
+    for entry in entries:
+      try:
+        if entry.is_dir():
+          subdirectories.append(entry.path)
+        elif entry.is_file() and entry.name.lower().endswith(".pdf"):
+          stat = entry.stat()
+          files.append((entry.path, stat.st_size, stat.st_mtime_ns))
+      except OSError:
+        continue
+  return subdirectories, files
+
+
+def scan_pdf_files(base_path: str | Path, max_workers: int = 8) -> Iterator[Tuple[str, int, int]]:
+  """
+  Walks base_path with os.scandir on a thread pool, one task per directory.
+
+  Yields:
+    (absolute path, size, mtime_ns) of every PDF file, in no particular order
+  """
+  with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-scan") as executor:
+    pending: Dict[Future, str] = {executor.submit(_scan_one, str(base_path)): str(base_path)}
+    while pending:
+      done, _ = wait(pending, return_when=FIRST_COMPLETED)
+      for future in done:
+        pending.pop(future)
+        subdirectories, files = future.result()
+        for subdirectory in subdirectories:
+          pending[executor.submit(_scan_one, subdirectory)] = subdirectory
+        yield from files
+
+
+def discover_reports(
+  base_path: str | Path, max_workers: int = 8
+) -> Tuple[Dict[str, DiscoveredReport], List[str]]:
+  """
+  Scans base_path for report PDFs and infers what each one is from its path.
+
+  Returns:
+    (reports keyed by path relative to base_path, relative paths that could not
+    be recognized)
+  """
+  reports: Dict[str, DiscoveredReport] = {}
+  unrecognized: List[str] = []
+  for file_path, size, mtime_ns in scan_pdf_files(base_path, max_workers):
+    relative_path = os.path.relpath(file_path, base_path)
+    inferred = infer_report(relative_path)
+    if inferred is None:
+      unrecognized.append(relative_path)
+      continue
+    code, year, announcement_type, short_name = inferred
+    reports[relative_path] = DiscoveredReport(
+      file_path=relative_path,
+      code=code,
+      year=year,
+      announcement_type=announcement_type,
+      short_name=short_name,
+      size=size,
+      mtime_ns=mtime_ns,
+    )
+  return reports, sorted(unrecognized)
+
+
+def diff_reports(
+  previous: Dict[str, DiscoveredReport], current: Dict[str, DiscoveredReport]
+) -> DiscoveryDelta:
+  """Compares two scans by path, size and mtime."""
+  delta = DiscoveryDelta()
+  for file_path, report in current.items():
+    before = previous.get(file_path)
+    if before is None:
+      delta.added.append(report)
+    elif not report.is_unchanged(before):
+      delta.changed.append(report)
+  delta.removed = [report for file_path, report in previous.items() if file_path not in current]
+  for reports in (delta.added, delta.changed, delta.removed):
+    reports.sort(key=lambda r: (r.code, r.year, r.file_path))
+  return delta
+
+
+def load_snapshot(path: str | Path) -> Dict[str, DiscoveredReport]:
+  """Loads the reports of the previous scan; an absent snapshot is an empty scan."""
+  path = Path(path)
+  if not path.is_file():
+    return {}
+  with path.open("r", encoding="utf-8") as f:
+    data = json.load(f)
+  return {item["file_path"]: DiscoveredReport(**item) for item in data["reports"]}
+
+
+def _write_json(path: str | Path, data) -> None:
+  # 先写临时文件再替换，读取方不会看到写了一半的文件
+  path = Path(path)
+  path.parent.mkdir(parents=True, exist_ok=True)
+  temp_path = path.with_name(path.name + ".tmp")
+  with temp_path.open("w", encoding="utf-8") as f:
+    json.dump(data, f, ensure_ascii=False, indent=2)
+  os.replace(temp_path, path)
+
+
+def save_snapshot(path: str | Path, base_path: str | Path, reports: Dict[str, DiscoveredReport]) -> None:
+  _write_json(
+    path,
+    {
+      "base_path": str(base_path),
+      "reports": [asdict(report) for _, report in sorted(reports.items())],
+    },
+  )
+
+
+def build_listing(
+  reports: Iterable[DiscoveredReport],
+  announcement_types: Iterable[str],
+  names: Optional[Dict[str, Tuple[str, str]]] = None,
+) -> List[dict]:
+  """
+  Builds annual report listing entries (the listing JSON format) from reports.
+
+  When several files map to the same (code, year, type), e.g. a corrected
+  version next to the original, the most recently modified one is listed.
+
+  Args:
+    reports: Discovered reports
+    announcement_types: Announcement types to include
+    names: Optional stock code -> (full_name, short_name) from an earlier
+      listing; otherwise the short name from the file name is used for both
+
+  Returns:
+    List of company dicts with code, full_name, short_name and files
+  """
+  names = names or {}
+  announcement_types = set(announcement_types)
+  latest: Dict[Tuple[str, str, str], DiscoveredReport] = {}
+  for report in reports:
+    if report.announcement_type not in announcement_types:
+      continue
+    current = latest.get(report.key)
+    if current is None or report.mtime_ns > current.mtime_ns:
+      latest[report.key] = report
+
+  companies: Dict[str, dict] = {}
+  for report in sorted(latest.values(), key=lambda r: (r.code, r.year)):
+    company = companies.get(report.code)
+    if company is None:
+      full_name, short_name = names.get(report.code, (None, None))
+      short_name = short_name or report.short_name or report.code
+      company = companies[report.code] = {
+        "code": report.code,
+        "full_name": full_name or short_name,
+        "short_name": short_name,
+        "files": [],
+      }
+    company["files"].append({"year": report.year, "file_path": report.file_path})
+  return list(companies.values())
+
+
+def write_delta(path: str | Path, base_path: str | Path, delta: DiscoveryDelta) -> None:
+  _write_json(
+    path,
+    {
+      "base_path": str(base_path),
+      "added": [asdict(report) for report in delta.added],
+      "changed": [asdict(report) for report in delta.changed],
+      "removed": [asdict(report) for report in delta.removed],
+    },
+  )
+
+
+def write_listing(path: str | Path, listing: List[dict]) -> None:
+  _write_json(path, listing)
@@ -0,0 +1,50 @@
+import argparse
+import signal
+from datetime import datetime
+from loguru import logger
+from worker.config import WorkerConfigLoader, WorkerConfig
+from worker.scheduler.daemon import Scheduler
+from worker.scheduler.jobs import JOBS
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description="Run the worker's scheduled jobs")
+  group = parser.add_mutually_exclusive_group()
+  group.add_argument("--run", metavar="JOB", help="Run one job now and exit")
+  group.add_argument("--list", action="store_true", help="List jobs and their next run")
+  group.add_argument("--status", action="store_true", help="Show recent job runs")
+  args = parser.parse_args()
+
+  loader: WorkerConfigLoader = WorkerConfigLoader()
+  config: WorkerConfig = loader.load()
+  scheduler = Scheduler(config, JOBS)
+
+  if args.list:
+    for job in scheduler.upcoming():
+      print(f"{job.name:<24} {job.cron:<16} next run: {job.next_run:%Y-%m-%d %H:%M %Z}")
+    return
+
+  if args.status:
+    for run in scheduler.store.recent_runs():
+      started = datetime.fromtimestamp(run.started_at, scheduler.timezone)
+      duration = "" if run.finished_at is None else f"{run.finished_at - run.started_at:.0f}s"
+      print(
+        f"{started:%Y-%m-%d %H:%M:%S} {run.job_name:<24} {run.status:<8} {duration:>6}"
+        f" {run.error or ''}"
+      )
+    return
+
+  if args.run:
+    if args.run not in scheduler.jobs:
+      parser.error(f"Unknown or disabled job '{args.run}'. Enabled jobs: {sorted(scheduler.jobs)}")
+    scheduler.trigger(args.run, wait=True)
+    scheduler.store.close()
+    return
+
+  def handle_signal(signum, frame):
+    logger.info(f"Received signal {signum}, stopping scheduler")
+    scheduler.stop()
+
+  signal.signal(signal.SIGINT, handle_signal)
+  signal.signal(signal.SIGTERM, handle_signal)
+  scheduler.run_forever()
@@ -0,0 +1,206 @@
+import fcntl
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+from croniter import croniter
+from loguru import logger
+from worker.config import WorkerConfig
+from worker.scheduler.state import JobStateStore
+
+
+@dataclass
+class JobContext:
+  """What a job function gets to work with during one run."""
+
+  name: str
+  config: WorkerConfig
+  store: JobStateStore
+  stop_event: threading.Event
+  watermark: Optional[str] = None
+
+  def set_watermark(self, watermark: str) -> None:
+    """Persists the watermark the next run starts from."""
+    self.watermark = watermark
+    self.store.set_watermark(self.name, watermark)
+
+
+JobFunc = Callable[[JobContext], None]
+
+
+class JobLock:
+  """
+  Run slots of a job, backed by `flock` on one lock file per slot.
+
+  A job with max_concurrency N has N slots. A run takes a free slot without
+  blocking; if every slot is taken (a previous run is still going, in this
+  process or in another scheduler process on the same host) the run is skipped.
+  flock locks are released by the OS when the process dies, so a crashed run
+  never leaves a stale lock behind.
+  """
+
+  def __init__(self, lock_dir: str | Path, job_name: str, max_concurrency: int = 1):
+    Path(lock_dir).mkdir(parents=True, exist_ok=True)
+    self.paths = [
+      Path(lock_dir) / f"{job_name}.{slot}.lock" for slot in range(max_concurrency)
+    ]
+
+  def try_acquire(self) -> Optional[int]:
+    """Takes a free slot and returns its file descriptor, or None if all are taken."""
+    for path in self.paths:
+      fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+      try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+      except BlockingIOError:
+        os.close(fd)
+        continue
+      return fd
+    return None
+
+  @staticmethod
+  def release(fd: int) -> None:
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+@dataclass
+class ScheduledJob:
+  name: str
+  func: JobFunc
+  cron: str
+  lock: JobLock
+  next_run: Optional[datetime] = field(default=None)
+
+  def schedule_after(self, moment: datetime) -> datetime:
+    self.next_run = croniter(self.cron, moment).get_next(datetime)
+    return self.next_run
+
+
+class Scheduler:
+  """
+  Long-running cron scheduler of the worker.
+
+  Every enabled job in `config.scheduler.jobs` runs on its cron schedule in a
+  shared thread pool. Runs that would exceed the job's max_concurrency are
+  skipped and recorded instead of piling up, and schedules missed while the
+  daemon was busy or asleep are coalesced into a single run. Run history and job
+  watermarks are kept in a JobStateStore.
+
+  Usage:
+    scheduler = Scheduler(config, JOBS)
+    scheduler.run_forever()  # until stop() or SIGINT/SIGTERM
+  """
+
+  def __init__(self, config: WorkerConfig, registry: Dict[str, JobFunc]):
+    """
+    Args:
+      config: Worker configuration, passed on to the jobs
+      registry: Job functions by name; jobs configured without a function raise
+        ValueError
+    """
+    self.config = config
+    self.timezone = ZoneInfo(config.scheduler.timezone)
+    self.store = JobStateStore(config.scheduler.state_path)
+    self.stop_event = threading.Event()
+    self._executor = ThreadPoolExecutor(
+      max_workers=config.scheduler.max_workers, thread_name_prefix="scheduled-job"
+    )
+
+    self.jobs: Dict[str, ScheduledJob] = {}
+    for name, job_config in config.scheduler.jobs.items():
+      if not job_config.enabled:
+        continue
+      if name not in registry:
+        raise ValueError(f"Unknown scheduled job '{name}'. Known jobs: {sorted(registry)}")
+      if not croniter.is_valid(job_config.cron):
+        raise ValueError(f"Invalid cron expression '{job_config.cron}' for job '{name}'")
+      self.jobs[name] = ScheduledJob(
+        name=name,
+        func=registry[name],
+        cron=job_config.cron,
+        lock=JobLock(config.scheduler.lock_dir, name, job_config.max_concurrency),
+      )
+
+  def now(self) -> datetime:
+    return datetime.now(self.timezone)
+
+  def upcoming(self) -> List[ScheduledJob]:
+    """Jobs with their next run time, soonest first."""
+    now = self.now()
+    for job in self.jobs.values():
+      if job.next_run is None:
+        job.schedule_after(now)
+    return sorted(self.jobs.values(), key=lambda job: job.next_run)
+
+  def run_forever(self) -> None:
+    for job in self.upcoming():
+      logger.info(f"Scheduled job '{job.name}' ({job.cron}), next run at {job.next_run}")
+
+    try:
+      while not self.stop_event.is_set():
+        now = self.now()
+        for job in self.jobs.values():
+          if job.next_run <= now:
+            self.trigger(job.name)
+            # 从当前时间计算下一次，错过的多次调度只补跑一次
+            job.schedule_after(now)
+
+        next_run = min((job.next_run for job in self.jobs.values()), default=None)
+        timeout = 60.0 if next_run is None else (next_run - self.now()).total_seconds()
+        self.stop_event.wait(min(max(timeout, 0.0), 60.0))
+    finally:
+      logger.info("Scheduler stopping, waiting for running jobs to finish...")
+      self._executor.shutdown(wait=True)
+      self.store.close()
+
+  def stop(self) -> None:
+    self.stop_event.set()
+
+  def trigger(self, name: str, wait: bool = False) -> bool:
+    """
+    Starts a run of a job now, unless all of its run slots are taken.
+
+    Args:
+      name: Job name
+      wait: Block until the run is finished
+
+    Returns:
+      False if the run was skipped because earlier runs are still going
+    """
+    job = self.jobs[name]
+    fd = job.lock.try_acquire()
+    if fd is None:
+      reason = "previous run still in progress"
+      logger.warning(f"Skipping scheduled job '{name}': {reason}")
+      self.store.record_skipped(name, reason)
+      return False
+
+    future = self._executor.submit(self._execute, job, fd)
+    if wait:
+      future.result()
+    return True
+
+  def _execute(self, job: ScheduledJob, fd: int) -> None:
+    run_id = self.store.start_run(job.name)
+    context = JobContext(
+      name=job.name,
+      config=self.config,
+      store=self.store,
+      stop_event=self.stop_event,
+      watermark=self.store.get_watermark(job.name),
+    )
+    logger.info(f"Job '{job.name}' started (watermark: {context.watermark})")
+    try:
+      job.func(context)
+    except Exception as e:
+      logger.exception(f"Job '{job.name}' failed: {e}")
+      self.store.finish_run(run_id, "failed", str(e))
+    else:
+      logger.info(f"Job '{job.name}' finished")
+      self.store.finish_run(run_id, "success")
+    finally:
+      JobLock.release(fd)
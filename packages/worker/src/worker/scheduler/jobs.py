@@ -0,0 +1,63 @@
+from pathlib import Path
+from typing import Dict
+from loguru import logger
+from worker.annual_report_worker import sync_annual_reports
+from worker.annual_report_worker.ledger import IngestionLedger
+from worker.annual_report_worker.parse_retry import run_parse_retry
+from worker.report_discovery import run_discovery
+from worker.scheduler.daemon import JobContext, JobFunc
+
+
+def annual_report_sync(context: JobContext) -> None:
+  """
+  Incremental sync of the annual report listing into RAGFlow.
+
+  The watermark is the mtime of the listing file at the last successful run. If
+  the listing has not changed since and the ledger has no document waiting to be
+  parsed and no file whose upload failed, the run ends without touching RAGFlow. Otherwise the regular ingestion
+  runs, and the ledger keeps it incremental: unchanged files are skipped by size
+  and mtime and only new or changed reports are uploaded.
+  """
+  config = context.config
+  worker_config = config.annual_report_worker
+  listing_mtime = Path(config.china_annual_report_soures.listing_file_path).stat().st_mtime_ns
+
+  if context.watermark is not None and int(context.watermark) >= listing_mtime:
+    unparsed = failed_uploads = 0
+    if worker_config.ledger_path:
+      ledger = IngestionLedger(worker_config.ledger_path)
+      try:
+        unparsed = len(ledger.unparsed_document_ids())
+        failed_uploads = len(ledger.failed_uploads())
+      finally:
+        ledger.close()
+    if not unparsed and not failed_uploads:
+      logger.info("Annual report listing unchanged since last sync, nothing to do")
+      return
+
+  if not sync_annual_reports(config):
+    raise RuntimeError("RAGFlow is unavailable, annual report sync not run")
+  context.set_watermark(str(listing_mtime))
+
+
+def annual_report_parse_retry(context: JobContext) -> None:
+  """Re-parses documents whose parse failed or was cancelled, within the retry limits."""
+  if not run_parse_retry(context.config):
+    raise RuntimeError("RAGFlow or the ingestion ledger is unavailable, parse retry not run")
+
+
+def annual_report_discovery(context: JobContext) -> None:
+  """
+  Scans the report directory and rewrites the listing when files were added,
+  changed or removed; the next annual_report_sync then sees a newer listing.
+  """
+  if run_discovery(context.config) is None:
+    raise RuntimeError("Report directory is not configured, discovery not run")
+
+
+# 可调度的任务，键与配置中 scheduler.jobs 的名称对应
+JOBS: Dict[str, JobFunc] = {
+  "annual_report_sync": annual_report_sync,
+  "annual_report_parse_retry": annual_report_parse_retry,
+  "annual_report_discovery": annual_report_discovery,
+}
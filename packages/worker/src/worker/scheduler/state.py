@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_state (
+  job_name TEXT PRIMARY KEY,
+  watermark TEXT,
+  last_started_at REAL,
+  last_finished_at REAL,
+  last_status TEXT,
+  last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS job_run (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  job_name TEXT NOT NULL,
+  started_at REAL NOT NULL,
+  finished_at REAL,
+  status TEXT NOT NULL,
+  error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_job_run_job_name ON job_run (job_name, started_at);
+"""
+
+
+@dataclass(slots=True)
+class JobRun:
+  """One run of a scheduled job."""
+
+  id: int
+  job_name: str
+  started_at: float
+  finished_at: Optional[float]
+  status: str  # "running" | "success" | "failed" | "skipped"
+  error: Optional[str]
+
+
+class JobStateStore:
+  """
+  Local SQLite store of scheduled job state.
+
+  Keeps, per job, the watermark of the last successful run (an opaque string the
+  job interprets, e.g. the mtime of its input) and a history of runs, so jobs can
+  do incremental work and `--status` can show what ran when.
+  """
+
+  def __init__(self, db_path: str | Path):
+    """
+    Args:
+      db_path: Path of the SQLite file, created with its parent directory if missing
+    """
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    self.db_path = str(db_path)
+    self._lock = threading.Lock()
+    self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+    self._conn.row_factory = sqlite3.Row
+    with self._lock, self._conn:
+      self._conn.execute("PRAGMA journal_mode=WAL")
+      self._conn.executescript(_SCHEMA)
+
+  def close(self) -> None:
+    with self._lock:
+      self._conn.close()
+
+  def get_watermark(self, job_name: str) -> Optional[str]:
+    with self._lock:
+      row = self._conn.execute(
+        "SELECT watermark FROM job_state WHERE job_name = ?", (job_name,)
+      ).fetchone()
+    return None if row is None else row["watermark"]
+
+  def set_watermark(self, job_name: str, watermark: Optional[str]) -> None:
+    with self._lock, self._conn:
+      self._conn.execute(
+        "INSERT INTO job_state (job_name, watermark) VALUES (?, ?) "
+        "ON CONFLICT(job_name) DO UPDATE SET watermark = excluded.watermark",
+        (job_name, watermark),
+      )
+
+  def start_run(self, job_name: str) -> int:
+    """Records the start of a run and returns its ID."""
+    now = time.time()
+    with self._lock, self._conn:
+      cursor = self._conn.execute(
+        "INSERT INTO job_run (job_name, started_at, status) VALUES (?, ?, 'running')",
+        (job_name, now),
+      )
+      self._conn.execute(
+        "INSERT INTO job_state (job_name, last_started_at) VALUES (?, ?) "
+        "ON CONFLICT(job_name) DO UPDATE SET last_started_at = excluded.last_started_at",
+        (job_name, now),
+      )
+    return cursor.lastrowid
+
+  def finish_run(self, run_id: int, status: str, error: Optional[str] = None) -> None:
+    """Records the end of a run started with `start_run`."""
+    now = time.time()
+    with self._lock, self._conn:
+      self._conn.execute(
+        "UPDATE job_run SET finished_at = ?, status = ?, error = ? WHERE id = ?",
+        (now, status, error, run_id),
+      )
+      self._conn.execute(
+        """
+        UPDATE job_state SET last_finished_at = ?, last_status = ?, last_error = ?
+        WHERE job_name = (SELECT job_name FROM job_run WHERE id = ?)
+        """,
+        (now, status, error, run_id),
+      )
+
+  def record_skipped(self, job_name: str, reason: str) -> None:
+    """Records a run that was not started, e.g. because the previous one is still running."""
+    now = time.time()
+    with self._lock, self._conn:
+      self._conn.execute(
+        "INSERT INTO job_run (job_name, started_at, finished_at, status, error) "
+        "VALUES (?, ?, ?, 'skipped', ?)",
+        (job_name, now, now, reason),
+      )
+
+  def recent_runs(self, job_name: Optional[str] = None, limit: int = 20) -> List[JobRun]:
+    with self._lock:
+      if job_name is None:
+        rows = self._conn.execute(
+          "SELECT * FROM job_run ORDER BY started_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+      else:
+        rows = self._conn.execute(
+          "SELECT * FROM job_run WHERE job_name = ? ORDER BY started_at DESC LIMIT ?",
+          (job_name, limit),
+        ).fetchall()
+    return [JobRun(**dict(row)) for row in rows]
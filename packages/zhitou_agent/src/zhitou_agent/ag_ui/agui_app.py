@@ -18,6 +18,11 @@ def create_agui_agno_app(session_id, user_id):
     bocha=config.bocha,
     dashscpope=config.dashscpope,
     postgres=config.database,
+    tool_output=config.tool_output,
+    ragflow=config.ragflow,
+    report_retrieval=config.report_retrieval,
+    history=config.history,
+    session_summary=config.session_summary,
   )
   agui_interface = AGUI(agent=agent)
   app = FastAPI()
@@ -1,8 +1,21 @@
 from typing import Optional
 from agno.agent import Agent
-from core.config.models import BochaConfig, DashsopeConfig, DatabaseConfig
+from core.config.models import (
+  BochaConfig,
+  DashsopeConfig,
+  DatabaseConfig,
+  HistoryConfig,
+  RAGFlowConfig,
+  ReportRetrievalConfig,
+  SessionSummaryConfig,
+  ToolOutputConfig,
+)
 from zhitou_agent.config import ZhitouAgentConfig
+from zhitou_agent.memory.history_window import HistoryWindow
+from zhitou_agent.tools.annual_report_retrieval import AnnualReportRetrievalTools
 from zhitou_agent.tools.bocha_web_search import BoChaTools
+from zhitou_agent.tools.http_client import close_http_client, configure_http_client
+from zhitou_agent.tools.search_cache import shared_search_cache
 from zhitou_agent.prompt.system import system_prompt
 from agno.models.dashscope import DashScope
 from agno.tools.reasoning import ReasoningTools
@@ -12,11 +25,17 @@ from agno.agent import RunEvent
 
 
 async def run_ango_agent(config: ZhitouAgentConfig):
+  configure_http_client(config.tool_http)
   agent = create_agno_zhitou_agent(
     bocha=config.bocha,
     dashscpope=config.dashscpope,
     session_id="test1",
     postgres=config.database,
+    tool_output=config.tool_output,
+    ragflow=config.ragflow,
+    report_retrieval=config.report_retrieval,
+    history=config.history,
+    session_summary=config.session_summary,
   )
 
   print("Agent initialized. Type 'quit' or 'exit' to stop.")
@@ -55,6 +74,8 @@ async def run_ango_agent(config: ZhitouAgentConfig):
       print(f"\n[ERROR] {e}")
       print("Continuing...")
 
+  await close_http_client()
+
 
 def create_agent_db(db: DatabaseConfig, schema="agno"):
   return PostgresDb(db.url, db_schema=schema)
@@ -93,8 +114,47 @@ def create_agno_zhitou_agent(
   postgres: DatabaseConfig,
   session_id: str,
   user_id: Optional[str] = None,
+  tool_output: Optional[ToolOutputConfig] = None,
+  ragflow: Optional[RAGFlowConfig] = None,
+  report_retrieval: Optional[ReportRetrievalConfig] = None,
+  history: Optional[HistoryConfig] = None,
+  session_summary: Optional[SessionSummaryConfig] = None,
 ):
-  bocha_tools = BoChaTools(apikey=bocha.apikey)
+  """
+  Creates the agent for one run of a session.
+
+  The number of replayed history runs is chosen per call by HistoryWindow, so
+  that the history fits history.token_budget. With session summaries enabled
+  the summary written by SessionSummarizer is added to the context and only
+  the runs after it are replayed.
+  """
+  history = history or HistoryConfig()
+  use_summary = (session_summary or SessionSummaryConfig()).enabled
+  db = create_agent_db(postgres)
+  num_history_runs = HistoryWindow(db, history, use_summary=use_summary).num_history_runs(session_id)
+
+  bocha_tools = BoChaTools(
+    apikey=bocha.apikey,
+    cache=shared_search_cache(bocha.cache),
+    max_concurrency=bocha.max_concurrent_searches,
+    max_queries=bocha.max_queries_per_call,
+    output=tool_output,
+  )
+  tools = [
+    bocha_tools.web_search,
+    bocha_tools.multi_web_search,
+    ReasoningTools(add_instructions=True),
+  ]
+  report_retrieval = report_retrieval or ReportRetrievalConfig()
+  if ragflow is not None and ragflow.apikey and report_retrieval.enabled:
+    # 已入库的年报优先于网页搜索
+    retrieval_tools = AnnualReportRetrievalTools(
+      ragflow=ragflow,
+      config=report_retrieval,
+      cache=shared_search_cache(report_retrieval.cache, name="report_retrieval"),
+      output=tool_output,
+    )
+    tools.insert(0, retrieval_tools.search_annual_reports)
 
   agent = Agent(
     name="zhitou_agent",
@@ -103,12 +163,14 @@ def create_agno_zhitou_agent(
       api_key=dashscpope.apikey,
       id="qwen3-max-preview",
     ),
-    tools=[bocha_tools.web_search, ReasoningTools(add_instructions=True)],
+    tools=tools,
     instructions=system_prompt,
-    max_tool_calls_from_history=3,
-    db=create_agent_db(postgres),
-    num_history_runs=15,
+    max_tool_calls_from_history=history.max_tool_calls_from_history,
+    db=db,
+    num_history_runs=num_history_runs,
     add_history_to_context=True,
+    # 摘要由后台任务生成，agent 只读取
+    add_session_summary_to_context=use_summary,
     add_datetime_to_context=True,
     timezone_identifier="Asia/Shanghai",
     markdown=True,
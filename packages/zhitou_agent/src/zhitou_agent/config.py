@@ -1,10 +1,19 @@
 import os
 import pathlib
 import sys
+from typing import Optional
 from confz import BaseConfig
+from pydantic import Field
 from core.config.config_loader import ConfigLoader
-from core.config import DashsopeConfig, BochaConfig
-from core.config.models import DatabaseConfig, LoggingConfig
+from core.config import DashsopeConfig, BochaConfig, ToolHttpConfig, ToolOutputConfig
+from core.config.models import (
+  DatabaseConfig,
+  HistoryConfig,
+  LoggingConfig,
+  RAGFlowConfig,
+  ReportRetrievalConfig,
+  SessionSummaryConfig,
+)
 from loguru import logger
 
 
@@ -13,6 +22,12 @@ class ZhitouAgentConfig(BaseConfig):
   bocha: BochaConfig
   logging: LoggingConfig
   database: DatabaseConfig
+  tool_http: ToolHttpConfig = Field(default_factory=ToolHttpConfig)
+  tool_output: ToolOutputConfig = Field(default_factory=ToolOutputConfig)
+  ragflow: Optional[RAGFlowConfig] = None
+  report_retrieval: ReportRetrievalConfig = Field(default_factory=ReportRetrievalConfig)
+  history: HistoryConfig = Field(default_factory=HistoryConfig)
+  session_summary: SessionSummaryConfig = Field(default_factory=SessionSummaryConfig)
 
 class ZhitouAgentConfigLoader(ConfigLoader[ZhitouAgentConfig]):
   config_class = ZhitouAgentConfig
@@ -1,13 +1,113 @@
+import json
+from collections import Counter, deque
+from typing import Callable, Deque, Iterable, List, Optional, Union
 from agentscope.memory import InMemoryMemory
+from agentscope.message import Msg
+from zhitou_agent.utils.tokens import estimate_tokens
+
+
+def msg_tokens(msg: Msg) -> int:
+  """Estimated tokens of a message: its text, or its content blocks (tool calls and results) as JSON."""
+  if isinstance(msg.content, str):
+    return estimate_tokens(msg.content)
+  return estimate_tokens(json.dumps(msg.content, ensure_ascii=False, default=str))
 
 
 class TruncatableMemory(InMemoryMemory):
-  def __init__(self, max_len: int):
+  """
+  In-memory agentscope memory that keeps only the newest messages.
+
+  Messages live in a deque used as a ring buffer, so adding and evicting are
+  O(1) instead of copying the list on every add once it is full. Besides
+  max_len, the total size can be capped with max_tokens; each message's token
+  count is computed once when it is added and kept alongside it. The newest
+  message is always kept, even if it alone exceeds max_tokens.
+  """
+
+  def __init__(
+    self,
+    max_len: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    count_tokens: Callable[[Msg], int] = msg_tokens,
+  ):
+    """
+    Args:
+      max_len: Most messages kept, unlimited if None
+      max_tokens: Most estimated tokens kept in total, unlimited if None
+      count_tokens: Token counter of one message
+    """
     super().__init__()
     self.max_len = max_len
+    self.max_tokens = max_tokens
+    self.count_tokens = count_tokens
+    self._messages: Deque[Msg] = deque()
+    self._tokens: Deque[int] = deque()
+    # 每个 id 在 buffer 中的条数，allow_duplicates 时同一 id 可能有多条
+    self._ids: Counter[str] = Counter()
+    self.total_tokens = 0
+
+  def _append(self, msg: Msg) -> None:
+    tokens = self.count_tokens(msg)
+    self._messages.append(msg)
+    self._tokens.append(tokens)
+    self._ids[msg.id] += 1
+    self.total_tokens += tokens
+
+  def _evict(self) -> None:
+    while self._messages and (
+      (self.max_len is not None and len(self._messages) > self.max_len)
+      or (self.max_tokens is not None and self.total_tokens > self.max_tokens and len(self._messages) > 1)
+    ):
+      msg = self._messages.popleft()
+      self.total_tokens -= self._tokens.popleft()
+      self._ids[msg.id] -= 1
+      if self._ids[msg.id] <= 0:
+        del self._ids[msg.id]
+
+  def _reset(self, messages: Iterable[Msg]) -> None:
+    self._messages.clear()
+    self._tokens.clear()
+    self._ids.clear()
+    self.total_tokens = 0
+    for msg in messages:
+      self._append(msg)
+    self._evict()
+
+  async def add(self, memories: Union[List[Msg], Msg, None], allow_duplicates: bool = False) -> None:
+    if memories is None:
+      return
+    if isinstance(memories, Msg):
+      memories = [memories]
+    if not isinstance(memories, list) or not all(isinstance(m, Msg) for m in memories):
+      raise TypeError(f"memories should be a Msg or a list of Msg, got {type(memories)}")
+    for msg in memories:
+      if allow_duplicates or msg.id not in self._ids:
+        self._append(msg)
+    # 保持 buffer 在 max_len 条、max_tokens 个 token 以内
+    self._evict()
+
+  async def delete(self, index: Union[Iterable[int], int]) -> None:
+    indices = {index} if isinstance(index, int) else set(index)
+    invalid = [i for i in indices if i < 0 or i >= len(self._messages)]
+    if invalid:
+      raise IndexError(f"The index {invalid} does not exist.")
+    self._reset([msg for i, msg in enumerate(self._messages) if i not in indices])
+
+  async def size(self) -> int:
+    return len(self._messages)
+
+  async def get_memory(self) -> List[Msg]:
+    return list(self._messages)
+
+  async def clear(self) -> None:
+    self._reset([])
+
+  def state_dict(self) -> dict:
+    return {"content": [msg.to_dict() for msg in self._messages]}
 
-  def add(self, msg):
-    super().add(msg)
-    # 保持 buffer 长度 <= max_len
-    if len(self._messages) > self.max_len:
-      self._messages = self._messages[-self.max_len :]
+  def load_state_dict(self, state_dict: dict, strict: bool = True) -> None:
+    messages = []
+    for data in state_dict.get("content", []):
+      data = {k: v for k, v in data.items() if k != "type"}
+      messages.append(Msg.from_dict(data))
+    self._reset(messages)
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark of TruncatableMemory against the list-slicing implementation it replaced.
+
+Adds messages one at a time to a memory that is already full, so every add
+also evicts, and reports the mean time per add for several buffer sizes.
+
+Usage:
+  uv run --package zhitou_agent zhitou-agent-memory-benchmark
+  uv run --package zhitou_agent zhitou-agent-memory-benchmark --adds 20000 --max-len 100 1000 10000 --max-tokens 50000
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional
+from agentscope.memory import InMemoryMemory
+from agentscope.message import Msg
+from zhitou_agent.memory.TruncatableMemory import TruncatableMemory
+
+
+class SlicingMemory(InMemoryMemory):
+  """The previous implementation: append, then copy the newest max_len messages into a new list."""
+
+  def __init__(self, max_len: int):
+    super().__init__()
+    self.max_len = max_len
+
+  async def add(self, memories, allow_duplicates: bool = False) -> None:
+    await super().add(memories, allow_duplicates=allow_duplicates)
+    if len(self.content) > self.max_len:
+      self.content = self.content[-self.max_len :]
+
+
+def make_messages(count: int, chars: int) -> List[Msg]:
+  text = "贵州茅台2023年营业收入同比增长" * (chars // 16 + 1)
+  messages = []
+  for i in range(count):
+    role = "user" if i % 2 == 0 else "assistant"
+    messages.append(Msg(name=role, content=text[:chars], role=role))
+  return messages
+
+
+async def time_adds(memory: InMemoryMemory, warmup: List[Msg], messages: List[Msg]) -> float:
+  """Fills the memory with warmup, then returns the mean seconds per add of messages."""
+  await memory.add(warmup)
+  start = time.perf_counter()
+  for msg in messages:
+    await memory.add(msg)
+  return (time.perf_counter() - start) / len(messages)
+
+
+async def run_benchmark(
+  adds: int, max_lens: List[int], chars: int, max_tokens: Optional[int] = None
+) -> List[Dict[str, float]]:
+  results = []
+  for max_len in max_lens:
+    warmup = make_messages(max_len, chars)
+    messages = make_messages(adds, chars)
+    # 新旧实现都开启 id 去重（agentscope 默认行为），保证比较公平
+    row = {
+      "max_len": max_len,
+      "slicing_us": await time_adds(SlicingMemory(max_len), warmup, messages) * 1e6,
+      "ring_buffer_us": await time_adds(TruncatableMemory(max_len), warmup, messages) * 1e6,
+    }
+    if max_tokens is not None:
+      row["token_capped_us"] = (
+        await time_adds(TruncatableMemory(max_len, max_tokens=max_tokens), warmup, messages) * 1e6
+      )
+    results.append(row)
+  return results
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description="Benchmark TruncatableMemory against list slicing")
+  parser.add_argument("--adds", type=int, default=5000, help="Timed adds per buffer size")
+  parser.add_argument("--max-len", type=int, nargs="+", default=[50, 500, 5000], help="Buffer sizes")
+  parser.add_argument("--chars", type=int, default=200, help="Characters per message")
+  parser.add_argument("--max-tokens", type=int, help="Also time a token-capped TruncatableMemory")
+  args = parser.parse_args()
+
+  results = asyncio.run(run_benchmark(args.adds, args.max_len, args.chars, args.max_tokens))
+  header = f"{'max_len':>8} {'slicing µs/add':>15} {'ring µs/add':>12} {'speedup':>8}"
+  if args.max_tokens is not None:
+    header += f" {'capped µs/add':>14}"
+  print(header)
+  for row in results:
+    line = (
+      f"{row['max_len']:>8} {row['slicing_us']:>15.2f} {row['ring_buffer_us']:>12.2f} "
+      f"{row['slicing_us'] / row['ring_buffer_us']:>7.1f}x"
+    )
+    if "token_capped_us" in row:
+      line += f" {row['token_capped_us']:>14.2f}"
+    print(line)
+
+
+if __name__ == "__main__":
+  main()
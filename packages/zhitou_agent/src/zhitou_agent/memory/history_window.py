@@ -0,0 +1,240 @@
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from agno.db.base import BaseDb, SessionType
+from agno.db.postgres import PostgresDb
+from core.config.models import HistoryConfig
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from zhitou_agent.utils.tokens import estimate_tokens
+
+# 每条消息的固定开销（角色、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class MessageTokenCache:
+  """
+  Process-wide LRU of estimated token counts per stored message.
+
+  Stored messages never change, so a message is counted once and every later
+  turn of the session only counts the messages added since.
+  """
+
+  def __init__(self, max_entries: int = 50_000):
+    self.max_entries = max_entries
+    self._lock = threading.Lock()
+    self._counts: "OrderedDict[str, int]" = OrderedDict()
+
+  def count(self, key: Optional[str], message: Dict[str, Any]) -> int:
+    if key is None:
+      return message_tokens(message)
+    with self._lock:
+      if key in self._counts:
+        self._counts.move_to_end(key)
+        return self._counts[key]
+    tokens = message_tokens(message)
+    with self._lock:
+      self._counts[key] = tokens
+      while len(self._counts) > self.max_entries:
+        self._counts.popitem(last=False)
+    return tokens
+
+  def __len__(self) -> int:
+    return len(self._counts)
+
+
+_token_cache = MessageTokenCache()
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+  """Estimated tokens of a stored agno message dict: content plus tool call arguments."""
+  content = message.get("content")
+  if content is not None and not isinstance(content, str):
+    content = json.dumps(content, ensure_ascii=False, default=str)
+  tokens = estimate_tokens(content or "") + MESSAGE_OVERHEAD_TOKENS
+  if message.get("tool_calls"):
+    tokens += estimate_tokens(json.dumps(message["tool_calls"], ensure_ascii=False, default=str))
+  return tokens
+
+
+# session metadata 中记录已折叠进摘要的最后一个运行
+SUMMARY_RUN_ID_KEY = "summary_run_id"
+
+
+def get_field(value: Any, name: str, default: Any = None) -> Any:
+  if isinstance(value, dict):
+    return value.get(name, default)
+  return getattr(value, name, default)
+
+
+def as_message_dict(message: Any) -> Dict[str, Any]:
+  if isinstance(message, dict):
+    return message
+  return message.to_dict() if hasattr(message, "to_dict") else vars(message)
+
+
+def session_runs(session: Any) -> List[Any]:
+  """Runs of a stored session that agno replays as history, oldest first."""
+  runs = get_field(session, "runs") or []
+  # 子运行（团队成员等）不会作为历史回放
+  return [run for run in runs if not get_field(run, "parent_run_id")]
+
+
+def session_summary_text(session: Any) -> str:
+  summary = get_field(session, "summary")
+  return (get_field(summary, "summary") or "") if summary else ""
+
+
+def unsummarized_runs(session: Any) -> List[Any]:
+  """Runs newer than the last run folded into the session summary (all runs if there is none)."""
+  runs = session_runs(session)
+  run_id = (get_field(session, "metadata") or {}).get(SUMMARY_RUN_ID_KEY)
+  if run_id and session_summary_text(session):
+    for index, run in enumerate(runs):
+      if get_field(run, "run_id") == run_id:
+        return runs[index + 1 :]
+  return runs
+
+
+# 只取出每个运行的 run_id、parent_run_id 和消息，不读取会话的其余数据和运行的事件等字段
+_HISTORY_SQL = """
+SELECT summary, metadata,
+  CASE WHEN jsonb_typeof(runs) = 'array' THEN (
+    SELECT jsonb_agg(
+      jsonb_build_object('run_id', run->'run_id', 'parent_run_id', run->'parent_run_id', 'messages', run->'messages')
+      ORDER BY position
+    )
+    FROM jsonb_array_elements(runs) WITH ORDINALITY AS r(run, position)
+  ) END AS runs
+FROM "{schema}"."{table}"
+WHERE session_id = :session_id
+"""
+
+
+def read_history_session(db: BaseDb, session_id: str) -> Optional[Dict[str, Any]]:
+  """
+  Reads what HistoryWindow needs of a stored session: summary, metadata and
+  the run ids and messages of its runs.
+
+  On PostgresDb the runs are projected in SQL, so session data and run events
+  never leave the database; other dbs read the whole session.
+  """
+  if isinstance(db, PostgresDb):
+    sql = text(_HISTORY_SQL.format(schema=db.db_schema, table=db.session_table_name))
+    try:
+      with db.Session() as sess:
+        row = sess.execute(sql, {"session_id": session_id}).fetchone()
+      return None if row is None else dict(row._mapping)
+    except ProgrammingError:
+      # 会话表尚未创建等情况交给 agno 处理
+      pass
+  return db.get_session(session_id=session_id, session_type=SessionType.AGENT, deserialize=False)
+
+
+@dataclass
+class HistorySelection:
+  num_runs: int
+  tokens: int
+  available_runs: int
+  summary_tokens: int = 0
+
+
+class HistoryWindow:
+  """
+  Picks how many of the newest runs of a session fit a token budget.
+
+  Runs are added from the newest backwards until the next one would exceed the
+  budget, so short chats get a long window and a few tool-heavy runs a short
+  one. With use_summary, only runs newer than the session summary are
+  candidates. The result is passed to agno as num_history_runs; agno itself
+  still loads and replays the history. Only messages agno replays are counted:
+  system messages and messages that were history in their own run are skipped,
+  and tool results beyond max_tool_calls_from_history count as dropped.
+
+  The session is read with a blocking db call, so async callers run it in a
+  thread.
+  """
+
+  def __init__(
+    self,
+    db: BaseDb,
+    config: Optional[HistoryConfig] = None,
+    token_cache: Optional[MessageTokenCache] = None,
+    use_summary: bool = False,
+  ):
+    """
+    Args:
+      db: agno db the session is stored in
+      config: Budget and bounds of the window
+      token_cache: Token count cache, the process-wide one by default
+      use_summary: The agent adds the session summary to its context, so runs
+        already folded into the summary are not replayed and the summary's
+        tokens count against the budget
+    """
+    self.db = db
+    self.config = config or HistoryConfig()
+    self.use_summary = use_summary
+    self.token_cache = token_cache if token_cache is not None else _token_cache
+
+  def run_tokens(self, run: Any, tool_calls_left: List[int]) -> int:
+    run_id = get_field(run, "run_id")
+    messages = [as_message_dict(m) for m in get_field(run, "messages") or []]
+    tokens = 0
+    for index in range(len(messages) - 1, -1, -1):
+      message = messages[index]
+      if message.get("role") == "system" or message.get("from_history"):
+        continue
+      if message.get("role") == "tool":
+        if tool_calls_left[0] <= 0:
+          continue
+        tool_calls_left[0] -= 1
+      key = message.get("id") or (f"{run_id}:{index}" if run_id else None)
+      tokens += self.token_cache.count(key, message)
+    return tokens
+
+  def select(self, session_id: str, reserved_tokens: int = 0) -> HistorySelection:
+    """
+    Args:
+      session_id: Session whose stored runs are measured
+      reserved_tokens: Part of the budget already used elsewhere, e.g. by retrieved context
+
+    Returns:
+      Number of newest runs to replay and their estimated tokens
+    """
+    config = self.config
+    session = read_history_session(self.db, session_id)
+    if not session:
+      return HistorySelection(num_runs=0, tokens=0, available_runs=0)
+    runs = unsummarized_runs(session) if self.use_summary else session_runs(session)
+    summary_tokens = estimate_tokens(session_summary_text(session)) if self.use_summary else 0
+    budget = config.token_budget - reserved_tokens - summary_tokens
+    limit = config.max_tool_calls_from_history
+    tool_calls_left = [limit if limit is not None else len(runs) * 1000]
+    num_runs, tokens = 0, 0
+    for run in reversed(runs[-config.max_runs :]):
+      run_tokens = self.run_tokens(run, tool_calls_left)
+      if num_runs >= config.min_runs and tokens + run_tokens > budget:
+        break
+      num_runs += 1
+      tokens += run_tokens
+    return HistorySelection(
+      num_runs=num_runs, tokens=tokens, available_runs=len(runs), summary_tokens=summary_tokens
+    )
+
+  def num_history_runs(self, session_id: str, reserved_tokens: int = 0) -> int:
+    """num_history_runs for the next run of the session; max_runs if the session cannot be read."""
+    try:
+      selection = self.select(session_id, reserved_tokens)
+    except Exception as e:
+      logger.warning(f"Could not measure history of session {session_id}, using {self.config.max_runs} runs: {e}")
+      return self.config.max_runs
+    logger.debug(
+      f"History window of session {session_id}: {selection.num_runs}/{selection.available_runs} runs, "
+      f"~{selection.tokens} tokens, summary ~{selection.summary_tokens} tokens "
+      f"(budget {self.config.token_budget - reserved_tokens})"
+    )
+    # agno 要求至少为 1；没有历史时该值不起作用
+    return max(selection.num_runs, 1)
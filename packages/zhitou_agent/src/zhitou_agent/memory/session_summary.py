@@ -0,0 +1,176 @@
+"""Background job folding older runs of long sessions into the agno session summary."""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from agno.db.base import BaseDb, SessionType
+from agno.session.summary import SessionSummary
+from core.config.models import DashsopeConfig, SessionSummaryConfig
+from loguru import logger
+from zhitou_agent.memory.history_window import (
+  SUMMARY_RUN_ID_KEY,
+  as_message_dict,
+  get_field,
+  session_summary_text,
+  unsummarized_runs,
+)
+from zhitou_agent.prompt.summary import session_summary_prompt
+from zhitou_agent.tools.http_client import get_http_client
+from zhitou_agent.utils.tokens import estimate_tokens, truncate_to_tokens
+
+_ROLE_NAMES = {"user": "用户", "assistant": "助手"}
+
+
+def runs_to_transcript(runs: List[Any], max_message_tokens: int, max_tokens: int) -> str:
+  """
+  Renders runs as a plain transcript of user and assistant text.
+
+  Tool calls and results are left out; each message is clipped to
+  max_message_tokens and the oldest runs are dropped beyond max_tokens.
+  """
+  blocks: List[str] = []
+  total = 0
+  for run in reversed(runs):
+    lines = []
+    for message in (as_message_dict(m) for m in get_field(run, "messages") or []):
+      role = message.get("role")
+      content = message.get("content")
+      if role not in _ROLE_NAMES or message.get("from_history") or not isinstance(content, str):
+        continue
+      if content.strip():
+        lines.append(f"{_ROLE_NAMES[role]}：{truncate_to_tokens(content.strip(), max_message_tokens)}")
+    block = "\n".join(lines)
+    tokens = estimate_tokens(block)
+    if blocks and total + tokens > max_tokens:
+      break
+    blocks.append(block)
+    total += tokens
+  return "\n\n".join(reversed([b for b in blocks if b]))
+
+
+class SessionSummarizer:
+  """
+  Keeps a rolling summary of long sessions in the agno session `summary` field.
+
+  Once a session has keep_runs + batch_runs runs that are not in the summary,
+  all but the newest keep_runs are folded into it with one LLM call, and the
+  last folded run is recorded in the session metadata. The agent adds the
+  summary to its context and HistoryWindow only replays the newer runs, so the
+  replayed history stays between keep_runs and keep_runs + batch_runs runs plus
+  a summary of bounded size, however long the session gets.
+
+  agno writes the whole session at the end of a run, so a run that started
+  before a summary was stored drops it again; the next pass then redoes it.
+  """
+
+  def __init__(self, db: BaseDb, dashscope: DashsopeConfig, config: Optional[SessionSummaryConfig] = None):
+    self.db = db
+    self.dashscope = dashscope
+    self.config = config or SessionSummaryConfig()
+    # session_id -> 上次检查时的 updated_at，未变化的会话不再检查
+    self._checked: Dict[str, Any] = {}
+
+  def _runs_to_fold(self, session: Any) -> List[Any]:
+    runs = unsummarized_runs(session)
+    if len(runs) < self.config.keep_runs + self.config.batch_runs:
+      return []
+    return runs[: len(runs) - self.config.keep_runs]
+
+  async def _complete(self, previous_summary: str, transcript: str) -> str:
+    config = self.config
+    user_content = f"之前的摘要：\n{previous_summary or '（无）'}\n\n之后的对话：\n{transcript}"
+    response = await get_http_client().post(
+      f"{self.dashscope.openai_compatible_base_url.rstrip('/')}/chat/completions",
+      headers={"Authorization": f"Bearer {self.dashscope.apikey}"},
+      json={
+        "model": config.model,
+        "messages": [
+          {"role": "system", "content": session_summary_prompt},
+          {"role": "user", "content": user_content},
+        ],
+        "max_tokens": config.max_summary_tokens,
+        "temperature": 0.2,
+      },
+      timeout=config.timeout_seconds,
+    )
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"].strip()
+
+  async def summarize_session(self, session_id: str) -> bool:
+    """
+    Folds the older runs of one session into its summary if enough have accumulated.
+
+    Returns:
+      Whether a new summary was stored
+    """
+    session = await asyncio.to_thread(
+      self.db.get_session, session_id=session_id, session_type=SessionType.AGENT
+    )
+    if session is None:
+      return False
+    runs = self._runs_to_fold(session)
+    if not runs:
+      return False
+
+    previous_summary = session_summary_text(session)
+    transcript = runs_to_transcript(
+      runs, self.config.max_message_tokens, self.config.max_input_tokens
+    )
+    summary = await self._complete(previous_summary, transcript) if transcript else previous_summary
+    if not summary:
+      return False
+
+    # 生成摘要期间会话可能已被新的运行改写，重新读取后再写回
+    latest = await asyncio.to_thread(
+      self.db.get_session, session_id=session_id, session_type=SessionType.AGENT
+    )
+    if latest is None or session_summary_text(latest) != previous_summary:
+      return False
+    last_run_id = get_field(runs[-1], "run_id")
+    if not any(get_field(run, "run_id") == last_run_id for run in latest.runs or []):
+      return False
+    latest.summary = SessionSummary(summary=summary, updated_at=datetime.now())
+    latest.metadata = {**(latest.metadata or {}), SUMMARY_RUN_ID_KEY: last_run_id}
+    await asyncio.to_thread(self.db.upsert_session, latest)
+    logger.info(
+      f"Summarized {len(runs)} runs of session {session_id} "
+      f"(~{estimate_tokens(transcript)} -> ~{estimate_tokens(summary)} tokens)"
+    )
+    return True
+
+  async def run_once(self) -> int:
+    """Checks the most recently updated sessions once; returns how many were summarized."""
+    sessions, _ = await asyncio.to_thread(
+      self.db.get_sessions,
+      session_type=SessionType.AGENT,
+      sort_by="updated_at",
+      sort_order="desc",
+      limit=self.config.scan_limit,
+      deserialize=False,
+    )
+    summarized = 0
+    for session in sessions:
+      session_id, updated_at = session["session_id"], session.get("updated_at")
+      if self._checked.get(session_id) == updated_at or not self._runs_to_fold(session):
+        self._checked[session_id] = updated_at
+        continue
+      try:
+        if await self.summarize_session(session_id):
+          summarized += 1
+      except Exception:
+        logger.exception(f"Failed to summarize session {session_id}")
+        continue
+      self._checked[session_id] = updated_at
+    # 只保留最近扫描到的会话
+    recent = {s["session_id"] for s in sessions}
+    self._checked = {k: v for k, v in self._checked.items() if k in recent}
+    return summarized
+
+  async def run_forever(self) -> None:
+    """Runs run_once every interval_seconds until cancelled."""
+    while True:
+      try:
+        await self.run_once()
+      except Exception:
+        logger.exception("Session summary pass failed")
+      await asyncio.sleep(self.config.interval_seconds)
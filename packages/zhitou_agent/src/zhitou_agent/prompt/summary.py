@@ -0,0 +1,10 @@
+session_summary_prompt = """
+你负责压缩投资顾问智能体与用户的长对话。给定之前的对话摘要（可能为空）和之后的若干轮对话，输出一份更新后的完整摘要，供智能体在后续对话中代替这些原始记录使用。
+
+要求：
+- 保留用户的投资目标、风险偏好、资金规模、持仓和关注的股票（含代码）等长期有效的信息。
+- 保留已经讨论过的结论、给出的建议和关键数据（数字、日期、来源），以及尚未解决的问题。
+- 删除寒暄、重复内容和工具调用的细节。
+- 新信息与旧摘要冲突时以新信息为准。
+- 使用简洁的中文要点，不要编造对话中没有的内容，只输出摘要本身。
+"""
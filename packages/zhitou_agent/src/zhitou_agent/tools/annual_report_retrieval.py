@@ -0,0 +1,181 @@
+"""Annual report retrieval tool backed by the RAGFlow knowledge base."""
+
+import asyncio
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from core.config.models import RAGFlowConfig, ReportRetrievalConfig, ToolOutputConfig
+from core.integration.ragflow.async_client import AsyncRAGFlowClient
+from loguru import logger
+from zhitou_agent.tools.http_client import get_http_client
+from zhitou_agent.tools.search_cache import SearchCache
+from zhitou_agent.tools.tool_output import compact_json, fit_text_items
+
+_WHITESPACE = re.compile(r"\s+")
+# (base_url, kb_name) -> dataset ID，知识库 ID 不会变化，进程内只查询一次
+_dataset_ids: Dict[Tuple[str, str], str] = {}
+
+Filter = Tuple[Optional[str], Optional[str]]  # (stock_code, year)
+
+
+def annual_report_condition(stock_code: Optional[str], year: Optional[str]) -> Dict[str, Any]:
+  """RAGFlow metadata_condition matching the annual report metadata written by the worker."""
+  conditions = [
+    {"name": "document_type", "comparison_operator": "is", "value": "china_annual_report"}
+  ]
+  if stock_code:
+    conditions.append({"name": "stock_code", "comparison_operator": "is", "value": stock_code})
+  if year:
+    conditions.append({"name": "year", "comparison_operator": "is", "value": year})
+  return {"logic": "and", "conditions": conditions}
+
+
+class AnnualReportRetrievalTools:
+  def __init__(
+    self,
+    ragflow: RAGFlowConfig,
+    config: Optional[ReportRetrievalConfig] = None,
+    cache: Optional[SearchCache] = None,
+    output: Optional[ToolOutputConfig] = None,
+  ):
+    """
+    Args:
+      ragflow: RAGFlow connection; retrieval runs against the ragflow.kb_name dataset
+      config: Retrieval options
+      cache: Optional result cache, usually shared_search_cache(config.cache, "report_retrieval")
+      output: How results are encoded for the model, compact by default
+    """
+    self.ragflow = ragflow
+    self.config = config or ReportRetrievalConfig()
+    self.cache = cache
+    self.output = output or ToolOutputConfig()
+
+  def _client(self) -> AsyncRAGFlowClient:
+    # 请求走进程共享的连接池，客户端本身很轻
+    return AsyncRAGFlowClient(
+      api_key=self.ragflow.apikey,
+      base_url=self.ragflow.url,
+      http_config=self.ragflow.http,
+      max_concurrency=self.config.max_concurrency,
+      client=get_http_client(),
+    )
+
+  async def _dataset_id(self, client: AsyncRAGFlowClient) -> str:
+    key = (self.ragflow.url, self.ragflow.kb_name)
+    if key not in _dataset_ids:
+      datasets = await client.list_datasets(name=self.ragflow.kb_name)
+      if not datasets:
+        raise LookupError(f"Knowledge base {self.ragflow.kb_name!r} not found")
+      _dataset_ids[key] = datasets[0]["id"]
+    return _dataset_ids[key]
+
+  async def _retrieve(
+    self, client: AsyncRAGFlowClient, dataset_id: str, question: str, report_filter: Filter
+  ) -> List[Dict[str, Any]]:
+    stock_code, year = report_filter
+    cache_key = (
+      self.cache.key(f"{question}|{stock_code or '*'}|{year or '*'}", self.config.page_size, "report")
+      if self.cache is not None
+      else None
+    )
+    if cache_key is not None:
+      cached = await self.cache.get(cache_key)
+      if cached is not None:
+        return json.loads(cached)
+
+    data = await client.retrieve(
+      [dataset_id],
+      question,
+      metadata_condition=annual_report_condition(stock_code, year),
+      page_size=self.config.page_size,
+      similarity_threshold=self.config.similarity_threshold,
+      vector_similarity_weight=self.config.vector_similarity_weight,
+    )
+    chunks = []
+    for chunk in data.get("chunks") or []:
+      item = {
+        "id": chunk.get("id"),
+        "document": chunk.get("document_keyword") or chunk.get("docnm_kwd") or "",
+        "similarity": round(float(chunk.get("similarity") or 0.0), 3),
+        "content": _WHITESPACE.sub(" ", chunk.get("content") or "").strip(),
+      }
+      if stock_code:
+        item["stock_code"] = stock_code
+      if year:
+        item["year"] = year
+      chunks.append(item)
+    if cache_key is not None:
+      await self.cache.set(cache_key, compact_json(chunks), "report")
+    return chunks
+
+  async def search_annual_reports(
+    self,
+    question: str,
+    stock_codes: Optional[List[str]] = None,
+    years: Optional[List[str]] = None,
+  ) -> str:
+    """Search the text of A-share listed companies' annual reports (年报) in the local knowledge base.
+    Prefer this over web search for facts stated in annual reports, such as revenue, profit, segments,
+    risks or management discussion: it is faster and returns the authoritative report text.
+
+    Args:
+      question (`str`):
+        What to look for, phrased as a question or keywords in Chinese, e.g. `2023年营业收入及同比变化`.
+      stock_codes (`list[str]`, optional):
+        6-digit stock codes to restrict the search to, e.g. `["600519"]`. Omit to search all companies.
+      years (`list[str]`, optional):
+        Report years to restrict the search to, e.g. `["2023", "2024"]`. Omit to search all years.
+
+    Returns:
+      `str`:
+          JSON with `chunks` of report text, most relevant first; each has the report
+          `document` name, `similarity` and `content` (long content may end with `…`).
+    """
+    codes = list(dict.fromkeys(c.strip() for c in stock_codes or [] if c and c.strip()))
+    report_years = list(dict.fromkeys(str(y).strip() for y in years or [] if str(y).strip()))
+    filters: List[Filter] = [
+      (code, year) for code in codes or [None] for year in report_years or [None]
+    ]
+    selected = filters[: self.config.max_filters]
+    envelope: Dict[str, Any] = {"question": question}
+    if len(selected) < len(filters):
+      envelope["droppedFilters"] = len(filters) - len(selected)
+
+    client = self._client()
+    try:
+      dataset_id = await self._dataset_id(client)
+    except Exception as e:
+      logger.exception("")
+      return compact_json({**envelope, "error": f"Knowledge base unavailable: {e}"})
+
+    async def run(report_filter: Filter) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+      try:
+        return await self._retrieve(client, dataset_id, question, report_filter), None
+      except Exception as e:
+        logger.exception("")
+        return [], f"{type(e).__name__}: {e}"
+
+    outcomes = await asyncio.gather(*(run(report_filter) for report_filter in selected))
+    errors = [
+      {"stock_code": code, "year": year, "error": error}
+      for (code, year), (_, error) in zip(selected, outcomes)
+      if error is not None
+    ]
+    if errors:
+      envelope["errors"] = errors
+
+    # 各筛选条件的结果按排名轮流合并，比较多家公司时每家都有靠前的结果
+    merged: Dict[str, Dict[str, Any]] = {}
+    ranked = [chunks for chunks, _ in outcomes]
+    for rank in range(max((len(chunks) for chunks in ranked), default=0)):
+      for chunks in ranked:
+        if rank < len(chunks):
+          chunk = chunks[rank]
+          merged.setdefault(chunk["id"] or f"{chunk['document']}:{rank}", chunk)
+    items = [{k: v for k, v in chunk.items() if k != "id"} for chunk in merged.values()]
+
+    if not self.output.compact:
+      return json.dumps({**envelope, "chunks": items}, ensure_ascii=False, indent=2)
+    return fit_text_items(
+      items, envelope, self.config.token_budget, "content", results_key="chunks"
+    )
@@ -1,145 +1,272 @@
 """Bocha web search tool for agentscope."""
 
+import asyncio
 import json
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import httpx
 from agentscope.message import TextBlock
 from agentscope.tool import ToolResponse
+from core.config.models import ToolOutputConfig
 from loguru import logger
+from zhitou_agent.tools.http_client import get_http_client
+from zhitou_agent.tools.search_cache import SearchCache, normalize_query
+from zhitou_agent.tools.tool_output import encode_search_result, fit_web_results
+
+
+class BochaAPIError(Exception):
+  """Bocha answered with a non-200 code in the response body."""
+
+
+def _url_key(url: str) -> str:
+  """URL for deduplication: lower-case host, no fragment, tracking parameters or trailing slash."""
+  try:
+    parts = urlsplit(url.strip())
+  except ValueError:
+    return url
+  query = urlencode(
+    [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.startswith("utm_")]
+  )
+  return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), query, ""))
+
+
+def _error_message(e: Exception) -> str:
+  if isinstance(e, BochaAPIError):
+    return f"API Error: {e}"
+  if isinstance(e, httpx.HTTPStatusError):
+    return f"Error: HTTP error occurred: {e.response.status_code} - {e.response.text}"
+  if isinstance(e, httpx.RequestError):
+    return f"Error: Request error occurred: {str(e)}"
+  return f"Error: Unexpected error occurred: {str(e)}"
 
 
 class BoChaTools:
-  def __init__(self, apikey: str):
+  def __init__(
+    self,
+    apikey: str,
+    cache: Optional[SearchCache] = None,
+    max_concurrency: int = 4,
+    max_queries: int = 8,
+    output: Optional[ToolOutputConfig] = None,
+  ):
+    """
+    Args:
+      apikey: Bocha API key
+      cache: Optional result cache, usually the process-wide shared_search_cache()
+      max_concurrency: Searches multi_web_search runs at the same time
+      max_queries: Queries multi_web_search accepts per call, the rest are dropped
+      output: How results are encoded for the model, compact by default
+    """
     self.apikey = apikey
     self.base_url = "https://api.bocha.cn/v1"
+    self.cache = cache
+    self.max_concurrency = max_concurrency
+    self.max_queries = max_queries
+    self.output = output or ToolOutputConfig()
 
   async def bocha_web_search(self, *args, **kwargs):
     return self.web_search(*args, **kwargs)
 
+  async def _search(self, query: str, count: int, freshness: str) -> Dict[str, Any]:
+    """
+    Runs one Bocha search, through the cache if there is one.
+
+    Raises:
+      BochaAPIError: If Bocha returns a non-200 code
+      httpx.HTTPError: If the request fails
+    """
+    cache_key = self.cache.key(query, count, freshness) if self.cache is not None else None
+    if cache_key is not None:
+      cached = await self.cache.get(cache_key)
+      logger.debug(
+        f"web_search cache {'hit' if cached is not None else 'miss'}: {query!r} "
+        f"(hit rate {self.cache.stats.hit_rate:.1%} of {self.cache.stats.lookups})"
+      )
+      if cached is not None:
+        return json.loads(cached)
+
+    headers = {
+      "Authorization": f"Bearer {self.apikey}",
+      "Content-Type": "application/json",
+    }
+    payload = {
+      "query": query,
+      "summary": True,
+      "freshness": freshness,
+      "count": count,
+    }
+
+    client = get_http_client()
+    response = await client.post(
+      f"{self.base_url}/web-search", json=payload, headers=headers
+    )
+    response.raise_for_status()
+    result = response.json()
+
+    # Check API response code
+    if result.get("code") != 200:
+      raise BochaAPIError(result.get("msg", "Unknown error from Bocha API"))
+
+    data = result.get("data", {})
+
+    # Format the response as JSON
+    web_pages = data.get("webPages")
+    web_results = web_pages.get("value", []) if web_pages else []
+
+    # Structure web results
+    formatted_web_results = []
+    for item in web_results:
+      formatted_web_results.append(
+        {
+          "name": item.get("name", "N/A"),
+          "url": item.get("url", "N/A"),
+          "snippet": item.get("snippet", "N/A"),
+          "siteName": item.get("siteName", ""),
+          "dateLastCrawled": item.get("dateLastCrawled", ""),
+        }
+      )
+
+    # Structure image results
+    images = data.get("images")
+    image_results = images.get("value", []) if images else []
+    formatted_image_results = []
+    for img in image_results:
+      formatted_image_results.append(
+        {
+          "contentUrl": img.get("contentUrl", "N/A"),
+          "thumbnailUrl": img.get("thumbnailUrl", ""),
+          "name": img.get("name", ""),
+        }
+      )
+
+    json_result = {
+      "query": query,
+      "totalEstimatedMatches": web_pages.get("totalEstimatedMatches", 0)
+      if web_pages
+      else 0,
+      "webResults": formatted_web_results,
+      "imageResults": formatted_image_results,
+    }
+    if cache_key is not None:
+      await self.cache.set(cache_key, json.dumps(json_result, ensure_ascii=False), freshness)
+    return json_result
+
   async def web_search(
     self,
     query: str,
     count: int = 10,
+    freshness: str = "noLimit",
   ) -> ToolResponse:
     """Search the web using Bocha API and return results. You shuold always call this tool why you are not 100% sure about facts.
     Don't try to search too many keywords at one time, split into multiple searching if you are not menat to joint search.
+    To run several independent searches, call `multi_web_search` once instead of calling this tool repeatedly.
 
     Args:
       query (`str`):
         The search query string.
       count (`int`, defaults to `10`, bounded in [1, 50]):
         The number of search results to return.
+      freshness (`str`, defaults to `noLimit`):
+        Time range of the results: `oneDay`, `oneWeek`, `oneMonth`, `oneYear`,
+        `noLimit`, or a date range like `2025-01-01..2025-04-06`.
 
     Returns:
       `ToolResponse`:
-          The response containing the search results from Bocha API,
-          including web pages and images.
+          The response containing the search results from Bocha API as JSON;
+          long snippets may be shortened and end with `…`.
     """
-
-    headers = {
-      "Authorization": f"Bearer {self.apikey}",
-      "Content-Type": "application/json",
-    }
-    payload = {
-      "query": query,
-      "summary": True,
-      "freshness": "noLimit",
-      "count": count,
-    }
-
     try:
-      async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-          f"{self.base_url}/web-search", json=payload, headers=headers
-        )
-        response.raise_for_status()
-        result = response.json()
-
-        # Check API response code
-        if result.get("code") != 200:
-          error_msg = result.get("msg", "Unknown error from Bocha API")
-          return ToolResponse(
-            content=[
-              TextBlock(
-                type="text",
-                text=f"API Error: {error_msg}",
-              ),
-            ],
-          )
-
-        data = result.get("data", {})
-
-        # Format the response as JSON
-        web_pages = data.get("webPages")
-        web_results = web_pages.get("value", []) if web_pages else []
-
-        # Structure web results
-        formatted_web_results = []
-        for item in web_results:
-          formatted_web_results.append(
-            {
-              "name": item.get("name", "N/A"),
-              "url": item.get("url", "N/A"),
-              "snippet": item.get("snippet", "N/A"),
-              "siteName": item.get("siteName", ""),
-              "dateLastCrawled": item.get("dateLastCrawled", ""),
-            }
-          )
-
-        # Structure image results
-        images = data.get("images")
-        image_results = images.get("value", []) if images else []
-        formatted_image_results = []
-        for img in image_results:
-          formatted_image_results.append(
-            {
-              "contentUrl": img.get("contentUrl", "N/A"),
-              "thumbnailUrl": img.get("thumbnailUrl", ""),
-              "name": img.get("name", ""),
-            }
-          )
-
-        # Create JSON response
-        json_result = {
-          "query": query,
-          "totalEstimatedMatches": web_pages.get("totalEstimatedMatches", 0)
-          if web_pages
-          else 0,
-          "webResults": formatted_web_results,
-          "imageResults": formatted_image_results,
-        }
-
-        return json.dumps(json_result, indent=2) # 这里注意要返回合法JSON String，不然agui前端tool call reponse组件比较难处理
-
-    except httpx.HTTPStatusError as e:
-      logger.exception("")
-      error_msg = f"HTTP error occurred: {e.response.status_code} - {e.response.text}"
-      return ToolResponse(
-        content=[
-          TextBlock(
-            type="text",
-            text=f"Error: {error_msg}",
-          ),
-        ],
-      )
-    except httpx.RequestError as e:
-      logger.exception("")
-      error_msg = f"Request error occurred: {str(e)}"
-      return ToolResponse(
-        content=[
-          TextBlock(
-            type="text",
-            text=f"Error: {error_msg}",
-          ),
-        ],
-      )
+      json_result = await self._search(query, count, freshness)
+      return encode_search_result(json_result, self.output) # 这里注意要返回合法JSON String，不然agui前端tool call reponse组件比较难处理
     except Exception as e:
       logger.exception("")
-      error_msg = f"Unexpected error occurred: {str(e)}"
       return ToolResponse(
         content=[
           TextBlock(
             type="text",
-            text=f"Error: {error_msg}",
+            text=_error_message(e),
           ),
         ],
       )
+
+  async def multi_web_search(
+    self,
+    queries: List[str],
+    count: int = 5,
+    freshness: str = "noLimit",
+  ) -> str:
+    """Run several web searches at once and return their merged results. Prefer this over calling `web_search`
+    several times when a question needs multiple narrow searches, e.g. one query per company or per metric.
+
+    Args:
+      queries (`list[str]`):
+        The search query strings, at most 8; each should be narrow and independent.
+      count (`int`, defaults to `5`, bounded in [1, 50]):
+        The number of search results to return per query.
+      freshness (`str`, defaults to `noLimit`):
+        Time range of the results: `oneDay`, `oneWeek`, `oneMonth`, `oneYear`,
+        `noLimit`, or a date range like `2025-01-01..2025-04-06`.
+
+    Returns:
+      `str`:
+          JSON with `queries` (each query with its match count, or its error) and
+          `webResults` deduplicated by URL, best-ranked first; `queries` of a
+          result lists the indexes of the queries that found it.
+    """
+    # 归一化后相同的查询只搜索一次
+    unique: Dict[str, str] = {}
+    for query in queries:
+      if query and query.strip():
+        unique.setdefault(normalize_query(query), query.strip())
+    selected = list(unique.values())[: self.max_queries]
+    dropped = len(unique) - len(selected)
+
+    semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def run(query: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+      async with semaphore:
+        try:
+          return await self._search(query, count, freshness), None
+        except Exception as e:
+          logger.exception("")
+          return None, _error_message(e)
+
+    outcomes = await asyncio.gather(*(run(query) for query in selected))
+
+    query_summaries = []
+    for query, (result, error) in zip(selected, outcomes):
+      if error is not None:
+        query_summaries.append({"query": query, "error": error})
+      else:
+        query_summaries.append({
+          "query": query,
+          "totalEstimatedMatches": result["totalEstimatedMatches"],
+          "results": len(result["webResults"]),
+        })
+
+    # 按排名轮流合并各查询的结果，使每个查询的靠前结果都排在前面
+    merged: Dict[str, Dict[str, Any]] = {}
+    ranked = [result["webResults"] if result else [] for result, _ in outcomes]
+    for rank in range(max((len(r) for r in ranked), default=0)):
+      for index, web_results in enumerate(ranked):
+        if rank >= len(web_results):
+          continue
+        item = web_results[rank]
+        key = _url_key(item["url"])
+        if key in merged:
+          if index not in merged[key]["queries"]:
+            merged[key]["queries"].append(index)
+        else:
+          merged[key] = {**item, "queries": [index]}
+
+    envelope: Dict[str, Any] = {"queries": query_summaries}
+    if dropped:
+      envelope["droppedQueries"] = dropped
+    if self.output.compact:
+      return fit_web_results(
+        list(merged.values()),
+        envelope,
+        self.output.multi_search_token_budget,
+        self.output.min_snippet_tokens,
+      )
+    return json.dumps({**envelope, "webResults": list(merged.values())}, ensure_ascii=False)
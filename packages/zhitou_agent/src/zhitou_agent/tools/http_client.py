@@ -0,0 +1,87 @@
+"""Process-wide pooled HTTP client of the agent tools."""
+
+import asyncio
+import importlib.util
+from typing import Optional
+import httpx
+from core.config.models import ToolHttpConfig
+from loguru import logger
+
+_config: ToolHttpConfig = ToolHttpConfig()
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def configure_http_client(config: ToolHttpConfig) -> None:
+  """
+  Sets the options of the shared client. Call once at startup, before the first
+  tool request; a client that already exists keeps its options.
+  """
+  global _config
+  if _client is not None and not _client.is_closed and config != _config:
+    logger.warning("Shared HTTP client already created, new options apply after it is closed")
+  _config = config
+
+
+def _create_client(config: ToolHttpConfig) -> httpx.AsyncClient:
+  http2 = config.http2
+  if http2 and importlib.util.find_spec("h2") is None:
+    logger.warning("h2 is not installed, the shared HTTP client falls back to HTTP/1.1")
+    http2 = False
+  return httpx.AsyncClient(
+    http2=http2,
+    timeout=httpx.Timeout(config.read_timeout, connect=config.connect_timeout),
+    limits=httpx.Limits(
+      max_connections=config.max_connections,
+      max_keepalive_connections=config.max_keepalive_connections,
+      keepalive_expiry=config.keepalive_expiry,
+    ),
+  )
+
+
+def _discard_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+  """
+  Closes a client created on another event loop.
+
+  Its connections can only be closed on their own loop: if that loop is still
+  running (in another thread) the close is scheduled there, otherwise the loop
+  is gone and the client is only dropped.
+  """
+  if client.is_closed:
+    return
+  if loop is not None and loop.is_running() and not loop.is_closed():
+    logger.info("Event loop changed, closing the shared HTTP client of the previous loop")
+    asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+  else:
+    logger.info(
+      "Event loop changed, dropping the shared HTTP client of the previous loop, "
+      "which is no longer running; call close_http_client() before the loop ends"
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+  """
+  Returns the shared AsyncClient, creating it on first use.
+
+  All tools share its connection pool, so repeated requests to the same host
+  reuse kept-alive (and with HTTP/2, multiplexed) connections instead of paying
+  a TCP and TLS handshake each time. Must be called from a running event loop;
+  connections cannot cross event loops, so a different loop (e.g. a CLI that
+  calls asyncio.run per turn) gets a new client and the previous one is closed.
+  """
+  global _client, _client_loop
+  loop = asyncio.get_running_loop()
+  if _client is None or _client.is_closed or _client_loop is not loop:
+    if _client is not None:
+      _discard_client(_client, _client_loop)
+    _client = _create_client(_config)
+    _client_loop = loop
+  return _client
+
+
+async def close_http_client() -> None:
+  """Closes the shared client and its connections; the next get_http_client() creates a new one."""
+  global _client, _client_loop
+  client, _client, _client_loop = _client, None, None
+  if client is not None and not client.is_closed:
+    await client.aclose()
@@ -0,0 +1,190 @@
+"""Result cache of the search and retrieval tools."""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+from core.config.models import SearchCacheConfig
+from loguru import logger
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+  """NFKC-normalizes, case-folds and collapses whitespace, so 全角/半角 and spacing variants share an entry."""
+  return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", query)).strip().casefold()
+
+
+@dataclass
+class SearchCacheStats:
+  hits: int = 0
+  misses: int = 0
+  evictions: int = 0
+  expirations: int = 0
+  errors: int = 0
+
+  @property
+  def lookups(self) -> int:
+    return self.hits + self.misses
+
+  @property
+  def hit_rate(self) -> float:
+    return self.hits / self.lookups if self.lookups else 0.0
+
+  def to_dict(self) -> Dict[str, Any]:
+    return {**asdict(self), "lookups": self.lookups, "hit_rate": self.hit_rate}
+
+
+class SearchCache:
+  """
+  TTL + LRU cache of web search results, shared by all agents of the process.
+
+  Entries are keyed by the normalized query, the result count and the
+  freshness; their TTL follows the freshness, so a search for the past day
+  expires after minutes while an unrestricted one is kept for hours. The least
+  recently used entry is evicted once max_entries is reached. Only successful
+  results should be stored.
+
+  Usage:
+    cache = SearchCache(config)
+    key = cache.key(query, count, freshness)
+    result = await cache.get(key)
+    if result is None:
+      result = await search(...)
+      await cache.set(key, result, freshness)
+  """
+
+  def __init__(self, config: Optional[SearchCacheConfig] = None):
+    self.config = config or SearchCacheConfig()
+    self.stats = SearchCacheStats()
+    self._lock = threading.Lock()
+    self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # key -> (过期时间, 结果)
+
+  def key(self, query: str, count: int, freshness: str = "noLimit") -> str:
+    return f"{self.config.key_prefix}{freshness}:{count}:{normalize_query(query)}"
+
+  def ttl(self, freshness: str) -> float:
+    return self.config.ttl_seconds.get(freshness, self.config.default_ttl_seconds)
+
+  async def get(self, key: str) -> Optional[str]:
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None and entry[0] <= time.monotonic():
+        del self._entries[key]
+        self.stats.expirations += 1
+        entry = None
+      if entry is None:
+        self.stats.misses += 1
+        return None
+      self._entries.move_to_end(key)
+      self.stats.hits += 1
+      return entry[1]
+
+  async def set(self, key: str, value: str, freshness: str = "noLimit") -> None:
+    with self._lock:
+      self._entries[key] = (time.monotonic() + self.ttl(freshness), value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.config.max_entries:
+        self._entries.popitem(last=False)
+        self.stats.evictions += 1
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  async def close(self) -> None:
+    pass
+
+
+class RedisSearchCache(SearchCache):
+  """
+  SearchCache backed by Redis, shared across processes and API instances.
+
+  Expiry is left to Redis (SET with EX), eviction to its maxmemory policy. A
+  Redis error counts as a miss and is logged, the search itself goes on.
+  """
+
+  def __init__(self, config: SearchCacheConfig):
+    super().__init__(config)
+    import redis.asyncio as redis  # 可选依赖，只有配置了 redis_url 才需要
+
+    self._redis = redis.from_url(config.redis_url, decode_responses=True)
+
+  async def get(self, key: str) -> Optional[str]:
+    try:
+      value = await self._redis.get(key)
+    except Exception as e:
+      self.stats.errors += 1
+      self.stats.misses += 1
+      logger.warning(f"Search cache lookup failed: {e}")
+      return None
+    if value is None:
+      self.stats.misses += 1
+    else:
+      self.stats.hits += 1
+    return value
+
+  async def set(self, key: str, value: str, freshness: str = "noLimit") -> None:
+    try:
+      await self._redis.set(key, value, ex=max(int(self.ttl(freshness)), 1))
+    except Exception as e:
+      self.stats.errors += 1
+      logger.warning(f"Search cache store failed: {e}")
+
+  def __len__(self) -> int:
+    return 0
+
+  async def close(self) -> None:
+    await self._redis.aclose()
+
+
+_shared_caches: Dict[str, SearchCache] = {}
+_shared_lock = threading.Lock()
+
+
+def current_search_cache(name: str = "web_search") -> Optional[SearchCache]:
+  """The process-wide cache of that name if one was created, without creating it."""
+  return _shared_caches.get(name)
+
+
+def search_cache_stats() -> Dict[str, Dict[str, Any]]:
+  """Stats of every process-wide cache, by name."""
+  return {name: cache.stats.to_dict() for name, cache in list(_shared_caches.items())}
+
+
+def shared_search_cache(
+  config: Optional[SearchCacheConfig] = None, name: str = "web_search"
+) -> Optional[SearchCache]:
+  """
+  Returns the process-wide cache of that name, created from config on first use.
+
+  Returns:
+    None if caching is disabled; a RedisSearchCache if redis_url is set and the
+    redis package is installed, otherwise an in-memory SearchCache
+  """
+  config = config or SearchCacheConfig()
+  if not config.enabled:
+    return None
+  with _shared_lock:
+    cache = _shared_caches.get(name)
+    if cache is None:
+      if config.redis_url:
+        try:
+          cache = RedisSearchCache(config)
+        except ImportError:
+          logger.warning("redis is not installed, falling back to the in-memory search cache")
+      if cache is None:
+        cache = SearchCache(config)
+      _shared_caches[name] = cache
+    return cache
+
+
+async def close_search_cache() -> None:
+  """Closes the process-wide caches."""
+  with _shared_lock:
+    caches = list(_shared_caches.values())
+    _shared_caches.clear()
+  for cache in caches:
+    await cache.close()
@@ -0,0 +1,123 @@
+"""Token-compact encoding of tool results."""
+
+import json
+from typing import Any, Dict, List, Optional
+from core.config.models import ToolOutputConfig
+from zhitou_agent.utils.tokens import estimate_tokens, truncate_to_tokens
+
+# 紧凑模式下保留的网页结果字段
+_WEB_RESULT_FIELDS = ("name", "url", "snippet", "siteName")
+
+
+def compact_json(value: Any) -> str:
+  """JSON without indentation or spaces, non-ASCII kept as is (\\uXXXX escapes cost several tokens each)."""
+  return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _fair_shares(sizes: List[int], available: int) -> List[int]:
+  """Splits `available` over items so that small items keep their size and large ones share the rest equally."""
+  shares = [0] * len(sizes)
+  remaining = max(available, 0)
+  order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+  for position, i in enumerate(order):
+    share = remaining // (len(sizes) - position)
+    shares[i] = min(sizes[i], share)
+    remaining -= shares[i]
+  return shares
+
+
+def fit_text_items(
+  items: List[Dict[str, Any]],
+  envelope: Dict[str, Any],
+  token_budget: int,
+  text_key: str,
+  min_text_tokens: int = 20,
+  results_key: str = "results",
+) -> str:
+  """
+  Encodes items with one long text field compactly within a token budget.
+
+  The text fields are truncated so that the whole payload fits the budget,
+  shortest texts kept intact first; if even texts of min_text_tokens do not
+  fit, the lowest-ranked items are dropped and counted in `omittedResults`.
+  The result is always valid JSON.
+
+  Args:
+    items: Items to encode, best first
+    envelope: Other top-level fields of the payload, e.g. the query
+    token_budget: Estimated tokens the encoded payload may use
+    text_key: Key of the text field that may be truncated
+    min_text_tokens: Smallest text worth keeping
+    results_key: Key of the items in the payload
+
+  Returns:
+    Compact JSON string
+  """
+  results = list(items)
+  while True:
+    skeleton = [{k: v for k, v in r.items() if k != text_key} for r in results]
+    overhead = estimate_tokens(compact_json({**envelope, results_key: skeleton}))
+    # 每个文本字段还需要 "key":"" 这几个字符
+    overhead += (len(text_key) // 4 + 2) * len(results)
+    sizes = [estimate_tokens(r.get(text_key, "")) for r in results]
+    shares = _fair_shares(sizes, token_budget - overhead)
+    too_small = [
+      i for i, share in enumerate(shares) if share < min(sizes[i], min_text_tokens)
+    ]
+    if not too_small or len(results) <= 1:
+      break
+    results.pop()  # 去掉排名最低的结果后重新分配
+
+  fitted = []
+  for result, size, share in zip(results, sizes, shares):
+    if text_key in result and share < size:
+      result = {**result, text_key: truncate_to_tokens(result[text_key], share)}
+    fitted.append(result)
+  payload = {**envelope, results_key: fitted}
+  if len(results) < len(items):
+    payload["omittedResults"] = len(items) - len(results)
+  return compact_json(payload)
+
+
+def fit_web_results(
+  web_results: List[Dict[str, Any]],
+  envelope: Dict[str, Any],
+  token_budget: int,
+  min_snippet_tokens: int = 20,
+) -> str:
+  """
+  Encodes Bocha web results compactly within a token budget.
+
+  Only name, url, snippet and non-empty siteName are kept (plus any `queries`
+  index list); snippets are fitted with fit_text_items.
+  """
+  results = []
+  for item in web_results:
+    result = {k: item[k] for k in _WEB_RESULT_FIELDS if item.get(k)}
+    if "queries" in item:
+      result["queries"] = item["queries"]
+    results.append(result)
+  return fit_text_items(
+    results, envelope, token_budget, "snippet", min_snippet_tokens, results_key="webResults"
+  )
+
+
+def encode_search_result(
+  json_result: Dict[str, Any], config: Optional[ToolOutputConfig] = None
+) -> str:
+  """
+  Encodes one web_search result for the model.
+
+  In compact mode image results and dateLastCrawled are dropped, there is no
+  indentation and snippets are fitted to config.token_budget; otherwise the
+  full result is returned as indented JSON.
+  """
+  config = config or ToolOutputConfig()
+  if not config.compact:
+    return json.dumps(json_result, indent=2)
+  return fit_web_results(
+    json_result.get("webResults", []),
+    {"query": json_result.get("query"), "totalEstimatedMatches": json_result.get("totalEstimatedMatches", 0)},
+    config.token_budget,
+    config.min_snippet_tokens,
+  )
@@ -0,0 +1,28 @@
+import math
+
+ELLIPSIS = "…"
+
+
+def estimate_tokens(text: str) -> int:
+  """
+  Cheap token estimate without a tokenizer.
+
+  Counts one token per non-ASCII character (Chinese text is roughly one token
+  per character with the Qwen tokenizer) and one per four ASCII characters.
+  Good enough for budgets; not exact.
+  """
+  if not text:
+    return 0
+  ascii_chars = len(text.encode("ascii", "ignore"))
+  return len(text) - ascii_chars + math.ceil(ascii_chars / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+  """Shortens text to about max_tokens estimated tokens, ending with an ellipsis if cut."""
+  if estimate_tokens(text) <= max_tokens:
+    return text
+  # 按字符比例估算截断位置，再逐步收缩到预算内
+  end = max(int(len(text) * max_tokens / max(estimate_tokens(text), 1)), 0)
+  while end > 0 and estimate_tokens(text[:end]) + 1 > max_tokens:
+    end -= max(1, end // 20)
+  return text[:max(end, 0)].rstrip() + ELLIPSIS